@@ -0,0 +1,39 @@
+"""Модели приложения api в интерфейсе администратора."""
+
+from django.contrib import admin
+from django.contrib.admin import ModelAdmin
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from api.admin_performance import PerformanceAdminMixin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(PerformanceAdminMixin, ModelAdmin):
+    """Отображение данных модели Job в админ-зоне."""
+
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'run_at', 'started', 'worker')
+    list_filter = ('status',)
+    search_fields = ('name', 'key')
+    readonly_fields = ('created', 'started', 'worker', 'error')
+    actions = ('retry_jobs',)
+
+    @admin.action(description='Повторить выбранные задачи с ошибкой')
+    def retry_jobs(self, request, queryset):
+        """Возвращает задачи с ошибкой в очередь.
+
+        Задача, ключ которой уже есть у задачи в очереди, не повторяется.
+        """
+        retried = 0
+        for job in queryset.filter(status=Job.FAILED):
+            try:
+                with transaction.atomic():
+                    retried += Job.objects.filter(pk=job.pk).update(
+                        status=Job.QUEUED, attempts=0, run_at=timezone.now())
+            except IntegrityError:
+                continue
+        self.message_user(
+            request, f'Задач возвращено в очередь: {retried}.')
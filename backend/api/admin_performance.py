@@ -0,0 +1,92 @@
+"""Интерфейс администратора для таблиц с большим количеством строк."""
+
+from django.db.models import CASCADE, PROTECT, RESTRICT
+from django.utils.text import capfirst
+
+from api.pagination import EstimatedCountPaginator
+
+
+class PerformanceAdminMixin:
+    """Примесь к ModelAdmin для больших таблиц.
+
+    Количество строк списка оценивается пагинатором
+    EstimatedCountPaginator, а количество строк без фильтров отдельно не
+    запрашивается. Связанные объекты из list_select_related загружаются
+    одним запросом и на страницах изменения и удаления, где строковое
+    представление объекта использует поля связанных моделей.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    empty_value_display = '-пусто-'
+
+    def get_queryset(self, request):
+        """Объекты модели со связанными объектами из list_select_related."""
+        queryset = super().get_queryset(request)
+        if isinstance(self.list_select_related, (list, tuple)):
+            queryset = queryset.select_related(*self.list_select_related)
+        return queryset
+
+
+class DeferredDeletionAdminMixin:
+    """Примесь к ModelAdmin моделей, удаляемых в фоне.
+
+    Удаление из интерфейса администратора только отмечает объекты
+    удаленными методом delete_later (recipes/deletion.py). Страница
+    подтверждения не перечисляет связанные объекты: их может быть
+    слишком много, и их удаляет фоновая задача. Права на удаление
+    связанных объектов при этом проверяются, как в Django, но по
+    моделям, а не по объектам: для удаления нужны права на все модели с
+    интерфейсом администратора, строки которых удаляются каскадно.
+    """
+
+    def delete_later(self, obj):
+        """Отмечает объект удаленным и ставит в очередь его удаление."""
+        raise NotImplementedError
+
+    def delete_model(self, request, obj):
+        """Отмечает объект удаленным."""
+        self.delete_later(obj)
+
+    def delete_queryset(self, request, queryset):
+        """Отмечает удаленными выбранные объекты."""
+        for obj in queryset:
+            self.delete_later(obj)
+
+    def get_deleted_objects(self, objs, request):
+        """Удаляемые объекты без связанных, недостающие права и
+        защищенные объекты."""
+        objs = list(objs)
+        perms_needed = set()
+        protected = []
+        pending = [(self.model, self.model._base_manager.filter(
+            pk__in=[obj.pk for obj in objs]))]
+        visited = set()
+        while pending:
+            model, queryset = pending.pop()
+            for relation in model._meta.related_objects:
+                if relation.many_to_many or relation in visited:
+                    continue
+                visited.add(relation)
+                related = relation.related_model
+                children = related._base_manager.filter(
+                    **{f'{relation.field.name}__in': queryset})
+                if relation.on_delete in (PROTECT, RESTRICT):
+                    protected.extend(
+                        f'{capfirst(related._meta.verbose_name)}: {child}'
+                        for child in children
+                    )
+                elif relation.on_delete is CASCADE:
+                    model_admin = self.admin_site._registry.get(related)
+                    if (model_admin is not None
+                            and not model_admin.has_delete_permission(
+                                request)):
+                        perms_needed.add(related._meta.verbose_name)
+                    pending.append((related, children))
+        return (
+            [str(obj) for obj in objs],
+            {self.opts.verbose_name_plural: len(objs)},
+            perms_needed,
+            protected,
+        )
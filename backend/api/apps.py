@@ -1,6 +1,8 @@
 """Настройки конфигурации приложения api."""
 
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
@@ -8,3 +10,25 @@ class ApiConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        """Подключает обработчики сигналов, подсчет запросов к БД,
+         отметку записи для маршрутизации на реплики и журнал медленных
+         запросов."""
+        from api import signals  # noqa: F401
+        from api.db_routing import install_write_observer
+        from api.instrumentation import install_query_observer
+        from api.slow_queries import install_slow_query_logger
+
+        connection_created.connect(
+            install_query_observer, dispatch_uid='api_query_observer')
+        if settings.DB_REPLICAS:
+            connection_created.connect(
+                install_write_observer,
+                dispatch_uid='api_write_observer'
+            )
+        if settings.SLOW_QUERY_THRESHOLD_MS > 0:
+            connection_created.connect(
+                install_slow_query_logger,
+                dispatch_uid='api_slow_query_logger'
+            )
@@ -0,0 +1,272 @@
+"""Сравнение синхронных и асинхронных представлений под нагрузкой.
+
+Синхронный путь обслуживается обработчиком WSGI в фиксированном пуле
+потоков — как воркеры gunicorn, — асинхронный путь обслуживается
+обработчиком ASGI в одном цикле событий с заданным количеством
+одновременных запросов, как воркер uvicorn. Оба пути работают в одном
+процессе, поэтому пропускную способность можно сравнивать вместе с
+пиковым объемом памяти (по tracemalloc) и количеством потоков.
+
+Задержка сети до PostgreSQL имитируется паузой перед каждым запросом к
+БД: на локальной SQLite запросы выполняются за микросекунды и не
+показывают выигрыша от конкурентности.
+"""
+
+import asyncio
+import io
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import ModuleType
+from urllib.parse import quote
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import include, path
+
+from api import urls as api_urls
+from api.benchmarks import percentile
+from recipes.models import Ingredient, Recipe, Tag
+
+
+class ThreadCounter:
+    """Наибольшее количество одновременно работающих потоков."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+
+    def sample(self):
+        """Обновляет наибольшее значение."""
+        self.peak = max(self.peak, threading.active_count())
+
+
+def build_cases(user):
+    """Эндпойнты, обслуживаемые асинхронными представлениями."""
+    cases = [
+        ('recipes-list', '/api/recipes/'),
+        ('tags-list', '/api/tags/'),
+        ('users-subscriptions', '/api/users/subscriptions/?recipes_limit=3'),
+    ]
+    recipe = Recipe.objects.filter(author=user).first()
+    if recipe is not None:
+        cases.append(('recipes-detail', f'/api/recipes/{recipe.id}/'))
+    tag = Tag.objects.first()
+    if tag is not None:
+        cases.append(('recipes-list-tags', f'/api/recipes/?tags={tag.slug}'))
+    ingredient = Ingredient.objects.first()
+    if ingredient is not None:
+        cases.append((
+            'ingredients-autocomplete',
+            f'/api/ingredients/?name={quote(ingredient.name[:3])}'))
+    return cases
+
+
+def build_urlconf(use_async):
+    """Конфигурация URL с асинхронными представлениями или без них."""
+    patterns = [
+        pattern for pattern in api_urls.urlpatterns
+        if pattern not in api_urls.async_urlpatterns
+    ]
+    if use_async:
+        patterns = api_urls.async_urlpatterns + patterns
+    urlconf = ModuleType(f'async_benchmark_urls_{use_async}')
+    urlconf.urlpatterns = [
+        path('api/', include((patterns, api_urls.app_name))),
+    ]
+    return urlconf
+
+
+@contextmanager
+def simulated_db_latency(seconds):
+    """Добавляет паузу перед каждым запросом к БД."""
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    if not seconds:
+        yield
+        return
+    connection_created.connect(install)
+    for connection in connections.all():
+        install(None, connection)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        for connection in connections.all():
+            if delay in connection.execute_wrappers:
+                connection.execute_wrappers.remove(delay)
+
+
+def split_path(url):
+    """Путь и строка запроса URL."""
+    url_path, _, query = url.partition('?')
+    return url_path, query
+
+
+def wsgi_environ(method, url, headers, body=b'', content_type=''):
+    """Окружение WSGI для запроса."""
+    url_path, query = split_path(url)
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url_path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': content_type,
+        'CONTENT_LENGTH': str(len(body)),
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        environ[f'HTTP_{name.upper().replace("-", "_")}'] = value
+    return environ
+
+
+def wsgi_get(handler, url, headers):
+    """Выполняет GET-запрос через обработчик WSGI."""
+    status = []
+    response = handler(
+        wsgi_environ('GET', url, headers),
+        lambda code, response_headers: status.append(code)
+    )
+    try:
+        body = b''.join(response)
+    finally:
+        response.close()
+    return int(status[0].split()[0]), body
+
+
+async def asgi_get(application, url, headers):
+    """Выполняет GET-запрос через обработчик ASGI."""
+    url_path, query = split_path(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': url_path,
+        'raw_path': url_path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode())
+            for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    incoming = asyncio.Queue()
+    incoming.put_nowait(
+        {'type': 'http.request', 'body': b'', 'more_body': False})
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, incoming.get, send)
+    return messages[0]['status'], b''.join(
+        message.get('body', b'') for message in messages[1:])
+
+
+def run_sync(url, headers, requests, workers, threads):
+    """Запросы к синхронному пути из пула потоков."""
+    handler = WSGIHandler()
+
+    def timed(_):
+        started = time.perf_counter()
+        status, body = wsgi_get(handler, url, headers)
+        threads.sample()
+        return time.perf_counter() - started, status, body
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(timed, range(requests)))
+
+
+def run_async(url, headers, requests, concurrency, threads):
+    """Запросы к асинхронному пути в одном цикле событий."""
+    application = ASGIHandler()
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with semaphore:
+                started = time.perf_counter()
+                status, body = await asgi_get(application, url, headers)
+                threads.sample()
+                return time.perf_counter() - started, status, body
+
+        return await asyncio.gather(*(timed() for _ in range(requests)))
+
+    return asyncio.run(main())
+
+
+def measure_mode(use_async, url, headers, requests, parallelism):
+    """Пропускная способность, задержки и память одного пути."""
+    runner = run_async if use_async else run_sync
+    threads = ThreadCounter()
+    with override_settings(
+            ROOT_URLCONF=build_urlconf(use_async), THROTTLE_ENABLED=False):
+        runner(url, headers, parallelism, parallelism, threads)
+        started = time.perf_counter()
+        results = runner(url, headers, requests, parallelism, threads)
+        elapsed = time.perf_counter() - started
+        tracemalloc.start()
+        runner(url, headers, parallelism * 2, parallelism, threads)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    latencies = sorted(latency * 1000 for latency, _, _ in results)
+    return {
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'peak_kb': round(peak / 1024, 1),
+        'threads': threads.peak,
+        'statuses': sorted({status for _, status, _ in results}),
+        'body': results[0][2],
+    }
+
+
+def compare_paths(cases, headers, requests=200, workers=4, concurrency=50,
+                  db_latency=0.002):
+    """Сравнивает синхронный и асинхронный пути для списка эндпойнтов.
+
+    cases — пары (имя, URL). Для каждого эндпойнта дополнительно
+    проверяется, что оба пути возвращают одинаковое тело ответа.
+    """
+    results = {}
+    with simulated_db_latency(db_latency):
+        for name, url in cases:
+            sync = measure_mode(False, url, headers, requests, workers)
+            asynchronous = measure_mode(
+                True, url, headers, requests, concurrency)
+            same_body = sync.pop('body') == asynchronous.pop('body')
+            results[name] = {
+                'url': url,
+                'sync': sync,
+                'async': asynchronous,
+                'same_body': same_body,
+                'speedup': round(asynchronous['rps'] / sync['rps'], 2),
+            }
+    return results
@@ -0,0 +1,236 @@
+"""Асинхронные представления для чтения данных API.
+
+Представления обслуживают методы GET и HEAD самых нагруженных
+эндпойнтов при запуске проекта через foodgram.asgi (uvicorn) с
+включенной настройкой ASYNC_READ_VIEWS. Данные читаются асинхронным ORM
+функциями aread_* из api/readers.py, поэтому ответы совпадают с ответами
+вьюсетов DRF. Остальные методы передаются синхронному представлению
+вьюсета.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django_filters.utils import translate_validation
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    Throttled,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.authentication import CachedTokenAuthentication
+from api.facets import facet_counts, parse_facets
+from api.filters import IngredientFilter, RecipeFilter
+from api.instrumentation import measure
+from api.pagination import CustomPageNumberPagination
+from api.readers import (
+    aread_ingredients,
+    aread_recipes,
+    aread_subscriptions,
+    aread_tags,
+)
+from api.throttling import enter_scope, limiter, scope_throttles
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import CustomUser
+
+READ_METHODS = ('GET', 'HEAD')
+
+authentication = CachedTokenAuthentication()
+renderer = JSONRenderer()
+
+
+def render(data, status=200, headers=None):
+    """Ответ в формате JSONRenderer.
+
+    Ответ рендерится сразу: для Response из DRF Django вызвал бы
+    рендеринг через sync_to_async.
+    """
+    return HttpResponse(
+        renderer.render(data),
+        status=status,
+        headers=headers,
+        content_type=renderer.media_type
+    )
+
+
+def error_response(exc):
+    """Ответ с ошибкой в формате обработчика исключений DRF."""
+    headers = {}
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        headers['WWW-Authenticate'] = authentication.authenticate_header(None)
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = '%d' % exc.wait
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {'detail': exc.detail}
+    return render(data, exc.status_code, headers)
+
+
+async def authenticate(request):
+    """Аутентифицирует запрос и возвращает его в обертке Request DRF."""
+    credentials = await authentication.aauthenticate(request)
+    drf_request = Request(request)
+    drf_request.user, drf_request.auth = credentials or (
+        AnonymousUser(), None)
+    return drf_request
+
+
+def apply_filterset(filterset_class, request, queryset):
+    """Применяет фильтры так же, как DjangoFilterBackend."""
+    filterset = filterset_class(
+        request.query_params, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    return filterset.qs
+
+
+def check_throttles(request, scope):
+    """Проверяет ограничения частоты области так же, как вьюсет DRF."""
+    waits = [
+        throttle.wait() for throttle in scope_throttles(scope)
+        if not throttle.allow_request(request, None)
+    ]
+    if waits:
+        raise Throttled(max(waits))
+
+
+async def filter_queryset(filterset_class, request, queryset):
+    """Асинхронно применяет фильтры к queryset.
+
+    Проверка значений фильтров может обращаться к БД, поэтому
+    выполняется в потоке и только при наличии параметров фильтрации.
+    """
+    if not any(name in request.query_params
+               for name in filterset_class.base_filters):
+        return queryset
+    return await sync_to_async(apply_filterset)(
+        filterset_class, request, queryset)
+
+
+async def recipe_list(request):
+    """Список рецептов с фильтрацией, пагинацией и счетчиками фасетов."""
+    facets = parse_facets(request)
+    queryset = await filter_queryset(
+        RecipeFilter, request, Recipe.objects.all())
+    recipe_ids = queryset.values_list('id', flat=True)
+    paginator = CustomPageNumberPagination()
+    page = await paginator.apaginate_queryset(recipe_ids, request)
+    with measure('serialization'):
+        data = await aread_recipes(
+            recipe_ids if page is None else page, request.user)
+    if page is None:
+        return data
+    data = paginator.get_paginated_response(data).data
+    if facets:
+        with measure('facets'):
+            data['facets'] = await sync_to_async(facet_counts)(
+                request, facets)
+    return data
+
+
+async def recipe_detail(request, pk):
+    """Рецепт по идентификатору."""
+    with measure('serialization'):
+        data = await aread_recipes([pk], request.user)
+    if not data:
+        raise NotFound
+    return data[0]
+
+
+async def tag_list(request):
+    """Список тегов."""
+    with measure('serialization'):
+        return await aread_tags(Tag.objects.all())
+
+
+async def tag_detail(request, pk):
+    """Тег по идентификатору."""
+    with measure('serialization'):
+        data = await aread_tags(Tag.objects.filter(pk=pk))
+    if not data:
+        raise NotFound
+    return data[0]
+
+
+async def ingredient_list(request):
+    """Список ингредиентов с поиском по началу названия."""
+    queryset = await filter_queryset(
+        IngredientFilter, request, Ingredient.objects.all())
+    with measure('serialization'):
+        return await aread_ingredients(queryset)
+
+
+async def ingredient_detail(request, pk):
+    """Ингредиент по идентификатору."""
+    with measure('serialization'):
+        data = await aread_ingredients(Ingredient.objects.filter(pk=pk))
+    if not data:
+        raise NotFound
+    return data[0]
+
+
+async def subscription_list(request):
+    """Авторы, на которых подписан текущий пользователь, с рецептами."""
+    if not request.user.is_authenticated:
+        raise NotAuthenticated
+    authors = CustomUser.objects.filter(
+        author__subscriber=request.user, deleted__isnull=True
+    ).values_list('id', flat=True)
+    paginator = CustomPageNumberPagination()
+    page = await paginator.apaginate_queryset(authors, request)
+    with measure('serialization'):
+        data = await aread_subscriptions(
+            authors if page is None else page,
+            request.query_params.get('recipes_limit'))
+    if page is not None:
+        return paginator.get_paginated_response(data).data
+    return data
+
+
+ASYNC_READ_ROUTES = (
+    # (маршрут, обработчик, имя эндпойнта вьюсета)
+    ('users/subscriptions/', subscription_list, 'users-subscriptions'),
+    ('tags/', tag_list, 'tags-list'),
+    ('tags/<int:pk>/', tag_detail, 'tags-detail'),
+    ('ingredients/', ingredient_list, 'ingredients-list'),
+    ('ingredients/<int:pk>/', ingredient_detail, 'ingredients-detail'),
+    ('recipes/', recipe_list, 'recipes-list'),
+    ('recipes/<int:pk>/', recipe_detail, 'recipes-detail'),
+)
+
+
+def async_read_view(handler, fallback):
+    """Асинхронное представление эндпойнта.
+
+    Методы GET и HEAD обрабатывает handler, остальные — синхронное
+    представление вьюсета fallback. Ограничения области действия
+    вьюсета (api/throttling.py) применяются так же, как во вьюсете.
+    """
+    throttle_scopes = getattr(fallback.cls, 'throttle_scopes', {})
+    scope = throttle_scopes.get(fallback.actions.get('get'))
+
+    async def view(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_to_async(fallback)(request, *args, **kwargs)
+        entered_scope = None
+        try:
+            drf_request = await authenticate(request)
+            if scope is not None:
+                await sync_to_async(check_throttles)(drf_request, scope)
+                entered_scope = enter_scope(scope)
+            return render(await handler(drf_request, *args, **kwargs))
+        except APIException as exc:
+            return error_response(exc)
+        finally:
+            if entered_scope is not None:
+                limiter.release(entered_scope)
+
+    # Проверку CSRF, как и во вьюсетах, выполняет DRF.
+    view.csrf_exempt = True
+    view.__name__ = handler.__name__
+    return view
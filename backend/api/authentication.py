@@ -0,0 +1,169 @@
+"""Кастомная аутентификация для приложения API."""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+TOKEN_CACHE_PREFIX = 'auth-token'
+# Кэши Django, которые не видят другие процессы.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def token_cache_key(key):
+    """Ключ кэша для токена. Сам токен в кэше не хранится."""
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'{TOKEN_CACHE_PREFIX}:{digest}'
+
+
+class LocalTokenCache:
+    """LRU-кэш процесса с коротким временем жизни записей."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key):
+        """Возвращает запись, если она есть и не устарела."""
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return value
+
+    def set(self, cache_key, value):
+        """Сохраняет запись, вытесняя самые давние при переполнении."""
+        with self._lock:
+            self._entries[cache_key] = (
+                time.monotonic() + settings.TOKEN_CACHE_LOCAL_TTL, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > settings.TOKEN_CACHE_LOCAL_SIZE:
+                self._entries.popitem(last=False)
+
+    def delete(self, cache_key):
+        """Удаляет запись."""
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+
+local_token_cache = LocalTokenCache()
+
+
+def shared_cache_enabled():
+    """Общий ли для процессов кэш Django по умолчанию.
+
+    Удаление записи из кэша процесса не видно другим процессам, поэтому
+    такой кэш не годится для записей со временем жизни TOKEN_CACHE_TTL.
+    """
+    return not isinstance(caches['default'], PROCESS_LOCAL_CACHES)
+
+
+def invalidate_token(key):
+    """Удаляет токен из кэша процесса и общего кэша Django."""
+    cache_key = token_cache_key(key)
+    local_token_cache.delete(cache_key)
+    cache.delete(cache_key)
+
+
+def invalidate_user_tokens(user_id):
+    """Удаляет из кэша все токены пользователя."""
+    for key in Token.objects.filter(
+            user_id=user_id).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кэшированием пользователя.
+
+    Пользователь ищется сначала в LRU-кэше процесса (TOKEN_CACHE_LOCAL_TTL
+    секунд), затем в кэше Django (TOKEN_CACHE_TTL секунд) и только потом
+    в БД. Записи удаляются из кэша при выходе пользователя, удалении
+    токена, изменении или удалении пользователя. Кэш других процессов
+    обновляется не позднее чем через TOKEN_CACHE_LOCAL_TTL секунд. Если
+    кэш Django локален для процесса (LocMemCache по умолчанию), он не
+    используется: иначе другие процессы принимали бы отозванные токены
+    до TOKEN_CACHE_TTL секунд.
+
+    Для асинхронных представлений предназначен метод aauthenticate:
+    при попадании в кэш процесса он не покидает цикл событий.
+    """
+
+    def load_entry(self, cache_key, key):
+        """Запись для токена из общего кэша Django или из БД."""
+        shared = shared_cache_enabled()
+        entry = cache.get(cache_key) if shared else None
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            entry = (user, token.created)
+            if shared:
+                cache.set(cache_key, entry, settings.TOKEN_CACHE_TTL)
+        return entry
+
+    def credentials(self, key, entry):
+        """Пользователь и токен из записи кэша."""
+        # Копия защищает запись кэша от изменений в ходе запроса.
+        user, created = copy.copy(entry[0]), entry[1]
+        return user, Token(key=key, user=user, created=created)
+
+    def authenticate_credentials(self, key):
+        """Возвращает пользователя и токен, используя кэш."""
+        cache_key = token_cache_key(key)
+        entry = local_token_cache.get(cache_key)
+        if entry is None:
+            entry = self.load_entry(cache_key, key)
+            local_token_cache.set(cache_key, entry)
+        return self.credentials(key, entry)
+
+    def token_key(self, request):
+        """Ключ токена из заголовка Authorization или None.
+
+        Проверки и сообщения об ошибках совпадают с
+        TokenAuthentication.authenticate.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise AuthenticationFailed(
+                _('Invalid token header. No credentials provided.'))
+        if len(auth) > 2:
+            raise AuthenticationFailed(_(
+                'Invalid token header. '
+                'Token string should not contain spaces.'))
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed(_(
+                'Invalid token header. '
+                'Token string should not contain invalid characters.'))
+
+    async def aauthenticate(self, request):
+        """Асинхронный вариант authenticate."""
+        key = self.token_key(request)
+        if key is None:
+            return None
+        cache_key = token_cache_key(key)
+        entry = local_token_cache.get(cache_key)
+        if entry is None:
+            entry = await sync_to_async(self.load_entry)(cache_key, key)
+            local_token_cache.set(cache_key, entry)
+        return self.credentials(key, entry)
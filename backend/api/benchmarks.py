@@ -0,0 +1,205 @@
+"""Бенчмарк основных эндпойнтов API через тестовый клиент Django.
+
+Для каждого эндпойнта измеряются задержки (p50, p95, среднее),
+количество запросов к БД и объем памяти, выделенной при обработке
+запроса (по tracemalloc). Запросы на запись выполняются в транзакции,
+которая откатывается, а загруженные изображения сохраняются во
+временный каталог, поэтому данные в БД не меняются.
+"""
+
+import base64
+import io
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import CustomUser
+
+BenchmarkCase = namedtuple(
+    'BenchmarkCase', ('name', 'method', 'path', 'data', 'content_type'))
+
+WRITE_METHODS = ('post', 'put', 'patch', 'delete')
+
+
+def benchmark_user():
+    """Автор с наибольшим количеством рецептов."""
+    return CustomUser.objects.annotate(
+        recipes_total=Count('recipes')
+    ).order_by('-recipes_total').first()
+
+
+def image_data_uri(width=1024, height=768):
+    """Изображение в формате base64 для создания рецептов."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), '#49B64E').save(buffer, 'JPEG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/jpeg;base64,{encoded}'
+
+
+def recipe_payload(name='Бенчмарк'):
+    """Данные для создания или обновления рецепта."""
+    return {
+        'ingredients': [
+            {'id': ingredient_id, 'amount': 10}
+            for ingredient_id in Ingredient.objects.values_list(
+                'id', flat=True)[:10]
+        ],
+        'tags': list(Tag.objects.values_list('id', flat=True)[:2]),
+        'image': image_data_uri(),
+        'name': name,
+        'text': 'Рецепт для бенчмарка',
+        'cooking_time': 30,
+    }
+
+
+def build_cases(user):
+    """Эндпойнты, участвующие в бенчмарке."""
+    recipe = Recipe.objects.filter(author=user).first()
+    tag = Tag.objects.first()
+    ingredient = Ingredient.objects.first()
+    cases = [
+        BenchmarkCase('recipes-list', 'get', '/api/recipes/', None, None),
+        BenchmarkCase(
+            'recipes-list-author', 'get',
+            f'/api/recipes/?author={user.id}', None, None),
+        BenchmarkCase(
+            'recipes-list-favorited', 'get',
+            '/api/recipes/?is_favorited=1', None, None),
+        BenchmarkCase(
+            'recipes-list-shopping-cart', 'get',
+            '/api/recipes/?is_in_shopping_cart=1', None, None),
+        BenchmarkCase(
+            'users-subscriptions', 'get',
+            '/api/users/subscriptions/?recipes_limit=3', None, None),
+        BenchmarkCase(
+            'download-shopping-cart', 'get',
+            '/api/recipes/download_shopping_cart/', None, None),
+    ]
+    if tag is not None:
+        cases.append(BenchmarkCase(
+            'recipes-list-tags', 'get',
+            f'/api/recipes/?tags={tag.slug}', None, None))
+    if ingredient is not None:
+        cases.append(BenchmarkCase(
+            'ingredients-autocomplete', 'get',
+            f'/api/ingredients/?name={ingredient.name[:3]}', None, None))
+    if recipe is not None:
+        cases.append(BenchmarkCase(
+            'recipes-detail', 'get', f'/api/recipes/{recipe.id}/',
+            None, None))
+        cases.append(BenchmarkCase(
+            'recipes-update', 'patch', f'/api/recipes/{recipe.id}/',
+            json.dumps(recipe_payload('Обновленный рецепт')),
+            'application/json'))
+    cases.append(BenchmarkCase(
+        'recipes-create', 'post', '/api/recipes/',
+        json.dumps(recipe_payload()), 'application/json'))
+    return cases
+
+
+def percentile(values, fraction):
+    """Процентиль отсортированного списка значений."""
+    if not values:
+        return 0.0
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def perform(client, case, headers):
+    """Выполняет запрос эндпойнта и возвращает ответ."""
+    kwargs = dict(headers)
+    if case.data is not None:
+        kwargs['data'] = case.data
+        kwargs['content_type'] = case.content_type
+    if case.method not in WRITE_METHODS:
+        return getattr(client, case.method)(case.path, **kwargs)
+    with transaction.atomic():
+        response = getattr(client, case.method)(case.path, **kwargs)
+        transaction.set_rollback(True)
+    return response
+
+
+def run_case(client, case, headers, iterations, warmup):
+    """Измеряет задержки, запросы к БД и выделение памяти эндпойнта."""
+    for _ in range(warmup):
+        perform(client, case, headers)
+    latencies = []
+    queries = []
+    statuses = set()
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = perform(client, case, headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+    allocated = []
+    peaks = []
+    for _ in range(max(iterations // 5, 1)):
+        tracemalloc.start()
+        perform(client, case, headers)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocated.append(current)
+        peaks.append(peak)
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'statuses': sorted(statuses),
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries': int(statistics.median(queries)),
+        'retained_kb': round(statistics.median(allocated) / 1024, 1),
+        'peak_kb': round(statistics.median(peaks) / 1024, 1),
+    }
+
+
+def git_revision():
+    """Текущий коммит репозитория или None."""
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(user, iterations=50, warmup=5, only=None):
+    """Выполняет бенчмарк всех эндпойнтов от имени пользователя."""
+    token, _ = Token.objects.get_or_create(user=user)
+    headers = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+    client = Client()
+    results = {}
+    with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root, QUERY_BUDGET_MODE='off',
+            THROTTLE_ENABLED=False):
+        for case in build_cases(user):
+            if only and case.name not in only:
+                continue
+            results[case.name] = run_case(
+                client, case, headers, iterations, warmup)
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'database': connection.vendor,
+            'user_id': user.id,
+            'recipes': Recipe.objects.count(),
+            'users': CustomUser.objects.count(),
+        },
+        'results': results,
+    }
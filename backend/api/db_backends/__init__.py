@@ -0,0 +1 @@
+"""Бэкенды БД с показателями соединений (см. api/db_pool.py)."""
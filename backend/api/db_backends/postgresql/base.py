@@ -0,0 +1,9 @@
+"""Бэкенд PostgreSQL с показателями соединений."""
+
+from django.db.backends.postgresql import base
+
+from api.db_pool import ConnectionMetricsMixin
+
+
+class DatabaseWrapper(ConnectionMetricsMixin, base.DatabaseWrapper):
+    """Соединение с PostgreSQL, сохраняющее показатели в реестр."""
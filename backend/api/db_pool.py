@@ -0,0 +1,131 @@
+"""Показатели постоянных соединений с БД.
+
+Соединения с БД живут CONN_MAX_AGE секунд (настройка DB_CONN_MAX_AGE) и
+переиспользуются последующими запросами того же потока воркера вместо
+установки нового соединения с TLS и аутентификацией на каждый запрос.
+При включенной настройке CONN_HEALTH_CHECKS переиспользуемое соединение
+проверяется в начале запроса, поэтому после перезапуска БД оборванное
+соединение закрывается и заменяется новым без ошибки в запросе.
+
+Бэкенд api.db_backends.postgresql сохраняет в реестр показателей
+количество открытых соединений, время установки соединения (ожидание
+соединения запросом), открытия, закрытия по причинам и результаты
+проверок соединений. Доля запросов, открывших соединение, — отношение
+foodgram_db_connections_opened_total к foodgram_http_requests_total.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS
+
+from api.metrics import COUNTER, GAUGE, HISTOGRAM, register, registry
+
+register(
+    'foodgram_db_connections_open', GAUGE,
+    'Количество открытых соединений с БД.')
+register(
+    'foodgram_db_connections_opened_total', COUNTER,
+    'Количество установленных соединений с БД.')
+register(
+    'foodgram_db_connections_closed_total', COUNTER,
+    'Количество закрытых соединений с БД по причинам.')
+register(
+    'foodgram_db_connect_seconds', HISTOGRAM,
+    'Время установки соединения с БД в секундах.')
+register(
+    'foodgram_db_connect_errors_total', COUNTER,
+    'Количество неудачных попыток установить соединение с БД.')
+register(
+    'foodgram_db_health_checks_total', COUNTER,
+    'Количество проверок соединений с БД по результатам.')
+
+# Причины закрытия соединения.
+CLOSE_UNHEALTHY = 'unhealthy'
+CLOSE_UNUSABLE = 'unusable'
+CLOSE_OBSOLETE = 'obsolete'
+CLOSE_EXPLICIT = 'explicit'
+
+_open_connections = Counter()
+_opened_connections = Counter()
+_counts_lock = threading.Lock()
+
+
+def track_open(alias, delta):
+    """Изменяет количество открытых соединений процесса."""
+    with _counts_lock:
+        _open_connections[alias] += delta
+        if delta > 0:
+            _opened_connections[alias] += delta
+        count = _open_connections[alias]
+    registry.set('foodgram_db_connections_open', count, alias=alias)
+
+
+class ConnectionMetricsMixin:
+    """Примесь к DatabaseWrapper, сохраняющая показатели соединений."""
+
+    _close_reason = None
+
+    def connect(self):
+        """Устанавливает соединение и измеряет время установки."""
+        started = time.perf_counter()
+        try:
+            super().connect()
+        except Exception:
+            registry.inc('foodgram_db_connect_errors_total', alias=self.alias)
+            raise
+        registry.observe(
+            'foodgram_db_connect_seconds',
+            time.perf_counter() - started,
+            alias=self.alias
+        )
+        registry.inc('foodgram_db_connections_opened_total', alias=self.alias)
+        track_open(self.alias, 1)
+
+    def close(self):
+        """Закрывает соединение и учитывает причину закрытия."""
+        was_open = self.connection is not None
+        try:
+            super().close()
+        finally:
+            if was_open and self.connection is None:
+                registry.inc(
+                    'foodgram_db_connections_closed_total',
+                    alias=self.alias,
+                    reason=self._close_reason or CLOSE_EXPLICIT
+                )
+                track_open(self.alias, -1)
+
+    def is_usable(self):
+        """Проверяет соединение и учитывает результат проверки."""
+        usable = super().is_usable()
+        registry.inc(
+            'foodgram_db_health_checks_total',
+            alias=self.alias,
+            result='ok' if usable else 'failed'
+        )
+        return usable
+
+    def close_if_health_check_failed(self):
+        """Закрывает соединение, не прошедшее проверку в начале запроса."""
+        self._close_reason = CLOSE_UNHEALTHY
+        try:
+            super().close_if_health_check_failed()
+        finally:
+            self._close_reason = None
+
+    def close_if_unusable_or_obsolete(self):
+        """Закрывает соединение с ошибками или старше CONN_MAX_AGE."""
+        self._close_reason = (
+            CLOSE_UNUSABLE if self.errors_occurred else CLOSE_OBSOLETE)
+        try:
+            super().close_if_unusable_or_obsolete()
+        finally:
+            self._close_reason = None
+
+
+def opened_connections(alias=DEFAULT_DB_ALIAS):
+    """Количество соединений, открытых текущим процессом."""
+    with _counts_lock:
+        return _opened_connections[alias]
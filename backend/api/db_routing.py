@@ -0,0 +1,148 @@
+"""Маршрутизация запросов к БД между основной БД и репликами.
+
+Чтение в запросах к API безопасными методами выполняется на одной из
+реплик из настройки DB_REPLICAS, выбранной на время запроса. Запросы
+небезопасными методами, а также чтение после записи в том же запросе
+выполняются на основной БД. После записи ответ закрепляет клиента за
+основной БД на DB_PIN_SECONDS секунд: в cookie и в заголовке
+X-DB-Pin-Until передается время окончания закрепления, которое клиент
+без поддержки cookie может вернуть в том же заголовке. Так клиент видит
+свои изменения, пока реплики догоняют основную БД.
+
+Вне запросов к API (команды управления, админка) все запросы
+выполняются на основной БД.
+"""
+
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+API_PREFIX = '/api/'
+DB_PIN_COOKIE = 'db_pin_until'
+DB_PIN_HEADER = 'X-DB-Pin-Until'
+DB_PIN_META = 'HTTP_X_DB_PIN_UNTIL'
+
+# app_label модели таблицы DatabaseCache.
+CACHE_APP_LABEL = 'django_cache'
+WRITE_SQL = re.compile(r'\s*(?:insert|update|delete)\b', re.IGNORECASE)
+
+_current_route = ContextVar('db_route', default=None)
+
+
+class RequestRoute:
+    """Выбор БД для чтения в рамках одного запроса."""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        # Реплика для чтения или None, если читать нужно с основной БД.
+        self.replica = replica
+        self.wrote = False
+
+
+def pinned_until(request):
+    """Время окончания закрепления клиента за основной БД."""
+    value = request.COOKIES.get(DB_PIN_COOKIE) or request.META.get(
+        DB_PIN_META)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def choose_replica(request):
+    """Реплика для чтения или None для основной БД."""
+    if (not settings.DB_REPLICAS
+            or request.method not in SAFE_METHODS
+            or not request.path_info.startswith(API_PREFIX)
+            or pinned_until(request) > time.time()):
+        return None
+    return random.choice(settings.DB_REPLICAS)
+
+
+@contextmanager
+def route_request(request):
+    """Выбирает БД для чтения на время обработки запроса."""
+    route = RequestRoute(choose_replica(request))
+    token = _current_route.set(route)
+    try:
+        yield route
+    finally:
+        _current_route.reset(token)
+
+
+def observe_write(execute, sql, params, many, context):
+    """Обертка connection.execute_wrapper, отмечающая запись в запросе.
+
+    Запись определяется по SQL: router.db_for_write Django вызывает и
+    без записи, например при присваивании связанного объекта.
+    """
+    route = _current_route.get()
+    if route is not None and not route.wrote and WRITE_SQL.match(sql):
+        route.wrote = True
+    return execute(sql, params, many, context)
+
+
+def install_write_observer(sender, connection, **kwargs):
+    """Подключает отметку записи к соединению с основной БД."""
+    if (connection.alias == DEFAULT_DB_ALIAS
+            and observe_write not in connection.execute_wrappers):
+        connection.execute_wrappers.append(observe_write)
+
+
+def pin_response(route, response):
+    """Закрепляет клиента за основной БД, если запрос выполнил запись."""
+    if not route.wrote:
+        return response
+    until = f'{time.time() + settings.DB_PIN_SECONDS:.3f}'
+    response.set_cookie(
+        DB_PIN_COOKIE,
+        until,
+        max_age=settings.DB_PIN_SECONDS,
+        httponly=True,
+        samesite='Lax'
+    )
+    response[DB_PIN_HEADER] = until
+    return response
+
+
+class ReplicaRouter:
+    """Роутер БД: чтение с реплик, запись в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        """БД для чтения: реплика запроса, если записи еще не было.
+
+        Кэш Django в БД (DatabaseCache) всегда читается с основной БД:
+        ведра жетонов и записи кэша токенов должны быть актуальными.
+        """
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return DEFAULT_DB_ALIAS
+        route = _current_route.get()
+        if route is None:
+            return None
+        if route.wrote or route.replica is None:
+            # Явный выбор: иначе Django прочитал бы связанные объекты
+            # из БД, в которой был загружен исходный объект.
+            return DEFAULT_DB_ALIAS
+        return route.replica
+
+    def db_for_write(self, model, **hints):
+        """Запись всегда выполняется в основную БД.
+
+        Объект, прочитанный с реплики, также сохраняется в основную БД.
+        """
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики содержат те же данные, что и основная БД."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Миграции применяются только к основной БД."""
+        return db not in settings.DB_REPLICAS
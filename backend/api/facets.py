@@ -0,0 +1,128 @@
+"""Количество рецептов по значениям фильтров для панели фильтров.
+
+Параметр facets списка рецептов (?facets=tags,author) добавляет к
+странице словарь facets: для каждого тега и для FACET_AUTHORS_LIMIT
+авторов с наибольшим количеством рецептов — сколько рецептов вернет
+список, если выбрать это значение при остальных текущих фильтрах.
+Фильтр самого фасета при подсчете не применяется, поэтому счетчики
+тегов не меняются при выборе тегов.
+
+Счетчики тегов считаются одним запросом с группировкой по маске тегов
+(recipes/tag_masks.py): групп не больше, чем сочетаний тегов, а маски
+читаются из индекса recipe_tag_mask_idx без соединений. Счетчики
+авторов считаются запросом с группировкой по автору. Счетчики хранятся
+в кэше Django FACETS_CACHE_TTL секунд под ключом из значений остальных
+фильтров: повторные запросы и переключение значений фасета не
+обращаются к БД, а изменения рецептов учитываются с задержкой до
+FACETS_CACHE_TTL секунд.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+from api.filters import RecipeFilter
+from recipes.models import Recipe, RecipeTag, Tag
+from recipes.tag_masks import tag_bit
+from users.models import CustomUser
+
+# Параметры запроса, не влияющие на набор рецептов.
+IGNORED_PARAMS = ('page', 'limit', 'facets')
+# Фильтры, результат которых зависит от пользователя.
+USER_PARAMS = ('is_favorited', 'is_in_shopping_cart')
+
+
+def count_tags(queryset):
+    """Количество рецептов queryset с каждым тегом."""
+    tags = list(Tag.objects.values_list('id', 'slug'))
+    counts = dict.fromkeys((tag_id for tag_id, _ in tags), 0)
+    for mask, count in queryset.values_list('tag_mask').annotate(
+            count=Count('id')):
+        for tag_id in counts:
+            if mask & tag_bit(tag_id):
+                counts[tag_id] += count
+    unmasked = [tag_id for tag_id in counts if not tag_bit(tag_id)]
+    if unmasked:
+        counts.update(RecipeTag.objects.filter(
+            recipe__in=queryset, tag_id__in=unmasked
+        ).values_list('tag_id').annotate(count=Count('id')).order_by())
+    return [
+        {'id': tag_id, 'slug': slug, 'count': counts[tag_id]}
+        for tag_id, slug in tags
+    ]
+
+
+def count_authors(queryset):
+    """Авторы с наибольшим количеством рецептов queryset."""
+    counts = list(queryset.values_list('author_id').annotate(
+        count=Count('id')
+    ).order_by('-count', 'author_id')[:settings.FACET_AUTHORS_LIMIT])
+    usernames = dict(CustomUser.objects.filter(
+        id__in=[author_id for author_id, _ in counts]
+    ).values_list('id', 'username'))
+    return [
+        {'id': author_id, 'username': usernames.get(author_id),
+         'count': count}
+        for author_id, count in counts
+    ]
+
+
+# Фасеты: имя совпадает с именем параметра фильтра RecipeFilter.
+FACETS = {
+    'tags': count_tags,
+    'author': count_authors,
+}
+
+
+def parse_facets(request):
+    """Имена фасетов из параметра facets или пустой список."""
+    value = request.query_params.get('facets', '')
+    names = list(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in FACETS]
+    if unknown:
+        raise ValidationError({'facets': (
+            f'Неизвестные фасеты: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(FACETS)}.'
+        )})
+    return names
+
+
+def facet_signature(request, name):
+    """Хэш значений фильтров запроса, кроме фильтра фасета name."""
+    params = sorted(
+        (key, sorted(request.query_params.getlist(key)))
+        for key in request.query_params
+        if key != name and key not in IGNORED_PARAMS
+    )
+    user = None
+    if any(key in USER_PARAMS for key, _ in params):
+        user = request.user.pk
+    return hashlib.sha256(
+        json.dumps([params, user]).encode()).hexdigest()
+
+
+def facet_queryset(request, name):
+    """Рецепты по фильтрам запроса, кроме фильтра фасета name."""
+    data = request.query_params.copy()
+    data.pop(name, None)
+    return RecipeFilter(
+        data, queryset=Recipe.objects.all(), request=request
+    ).qs.order_by()
+
+
+def facet_counts(request, names):
+    """Счетчики фасетов names для фильтров запроса."""
+    facets = {}
+    for name in names:
+        key = f'facets:{name}:{facet_signature(request, name)}'
+        counts = cache.get(key)
+        if counts is None:
+            counts = FACETS[name](facet_queryset(request, name))
+            cache.set(key, counts, settings.FACETS_CACHE_TTL)
+        facets[name] = counts
+    return facets
@@ -0,0 +1,86 @@
+"""Поля сериализаторов для приложения API."""
+
+import base64
+import binascii
+import re
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from drf_extra_fields.fields import HybridImageField
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import ImageField
+
+NON_BASE64 = re.compile(r'[^A-Za-z0-9+/=]')
+
+
+class RecipeImageField(HybridImageField):
+    """Изображение в base64 или файлом из multipart/form-data.
+
+    Изображение в base64 декодируется частями во временный файл, а не в
+    память, как в Base64ImageField. Формат и размеры изображения в обоих
+    случаях проверяются по файлу на диске без декодирования пикселей.
+    """
+
+    BASE64_HEADER = ';base64,'
+    # Кратно 4, чтобы части декодировались независимо.
+    CHUNK_SIZE = 64 * 1024
+    FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+    def to_internal_value(self, data):
+        if data in self.EMPTY_VALUES:
+            return None
+        if isinstance(data, str):
+            data = self.decode_to_file(data)
+        return self.validate_image(ImageField.to_internal_value(self, data))
+
+    def decode_to_file(self, data):
+        """Декодирует изображение из base64 во временный файл."""
+        start = data.find(self.BASE64_HEADER)
+        start = 0 if start == -1 else start + len(self.BASE64_HEADER)
+        file = TemporaryUploadedFile('image', None, 0, None)
+        pending = ''
+        try:
+            for offset in range(start, len(data), self.CHUNK_SIZE):
+                # Посторонние символы base64.b64decode пропускает,
+                # поэтому удаляются до разбиения на группы по 4 символа.
+                chunk = pending + NON_BASE64.sub(
+                    '', data[offset:offset + self.CHUNK_SIZE])
+                usable = len(chunk) - len(chunk) % 4
+                file.write(base64.b64decode(chunk[:usable]))
+                pending = chunk[usable:]
+            if pending:
+                file.write(base64.b64decode(pending))
+        except (binascii.Error, ValueError):
+            file.close()
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        file.size = file.tell()
+        file.seek(0)
+        try:
+            # Читается только заголовок: расширение нужно для проверки
+            # имени файла в ImageField.
+            image_format = Image.open(file).format
+        except Exception:
+            file.close()
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        file.seek(0)
+        file.name = f'image.{self.get_extension(image_format)}'
+        return file
+
+    def get_extension(self, image_format):
+        """Расширение файла для формата Pillow."""
+        return 'jpg' if image_format == 'JPEG' else image_format.lower()
+
+    def validate_image(self, file):
+        """Проверяет формат и размеры изображения и задает имя файла."""
+        image_format = file.image.format
+        if image_format not in self.FORMATS:
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        max_dimension = settings.IMAGE_MAX_DIMENSION
+        if max(file.image.size) > max_dimension:
+            raise ValidationError(
+                f'Ширина и высота изображения не должны превышать '
+                f'{max_dimension} пикселей.')
+        file.name = f'{uuid.uuid4()}.{self.get_extension(image_format)}'
+        return file
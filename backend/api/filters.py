@@ -1,16 +1,26 @@
 """Кастомные фильтры для приложения API."""
 
 from django_filters import (
-    AllValuesFilter,
     CharFilter,
+    ChoiceFilter,
     FilterSet,
     ModelMultipleChoiceFilter,
     NumberFilter,
 )
 
 from recipes.models import Ingredient, Recipe, Tag
+from recipes.tag_masks import filter_all_tags, filter_any_tags
 
 RECIPE_IS_INCLUDED_IN = 1
+RECIPE_ORDERING_CHOICES = (
+    ('trending', 'По популярности за последнее время'),
+)
+TAGS_MATCH_ANY = 'any'
+TAGS_MATCH_ALL = 'all'
+TAGS_MATCH_CHOICES = (
+    (TAGS_MATCH_ANY, 'Хотя бы один из тегов'),
+    (TAGS_MATCH_ALL, 'Все теги'),
+)
 
 
 class RecipeFilter(FilterSet):
@@ -19,9 +29,14 @@ class RecipeFilter(FilterSet):
     tags = ModelMultipleChoiceFilter(
         field_name='tags__slug',
         queryset=Tag.objects.all(),
-        to_field_name='slug'
+        to_field_name='slug',
+        method='filter_tags'
+    )
+    tags_match = ChoiceFilter(
+        choices=TAGS_MATCH_CHOICES,
+        method='match_tags',
     )
-    author = AllValuesFilter(
+    author = NumberFilter(
         field_name="author__id",
     )
     is_favorited = NumberFilter(
@@ -30,6 +45,10 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = NumberFilter(
         method='recipe_is_in_shopping_cart',
     )
+    ordering = ChoiceFilter(
+        choices=RECIPE_ORDERING_CHOICES,
+        method='order_recipes',
+    )
 
     class Meta:
         """Поля фильтрации рецептов."""
@@ -42,6 +61,20 @@ class RecipeFilter(FilterSet):
         )
         model = Recipe
 
+    def filter_tags(self, queryset, name, tags):
+        """Рецепты хотя бы с одним из тегов или, при tags_match=all, со
+        всеми тегами по маске тегов."""
+        if not tags:
+            return queryset
+        tag_ids = [tag.id for tag in tags]
+        if self.form.cleaned_data.get('tags_match') == TAGS_MATCH_ALL:
+            return filter_all_tags(queryset, tag_ids)
+        return filter_any_tags(queryset, tag_ids)
+
+    def match_tags(self, queryset, name, value):
+        """Режим сравнения тегов учитывается фильтром tags."""
+        return queryset
+
     def filter_recipe(self, queryset, name, value, filter_parameters):
         """Фильтрует рецепт в зависимости от переданных параметров."""
         if value == RECIPE_IS_INCLUDED_IN:
@@ -64,6 +97,18 @@ class RecipeFilter(FilterSet):
         return self.filter_recipe(
             queryset, name, value, shopping_cart_parameters)
 
+    def order_recipes(self, queryset, name, value):
+        """Сортирует рецепты по популярности за последнее время.
+
+        Соединение с RecipeTrend внутреннее, поэтому сортировка идет по
+        индексу recipe_trend_score_idx. Строка популярности есть у каждого
+        рецепта: ее создают сигнал post_save, seed_dataset и миграция
+        0010_fill_recipe_trends, а для рецептов, созданных в обход них,
+        — recompute_trending.
+        """
+        return queryset.filter(trend__isnull=False).order_by(
+            '-trend__score', '-id')
+
 
 class IngredientFilter(FilterSet):
     """Фильтр ингредиентов."""
@@ -0,0 +1,130 @@
+"""Сбор показателей обработки запросов API.
+
+Показатели текущего запроса хранятся в контекстной переменной, поэтому
+доступны из middleware, представлений и обертки запросов к БД без
+передачи объекта запроса. Обертка устанавливается на каждое соединение
+с БД при его создании: в ASGI запросы к БД выполняются в потоках
+sync_to_async, куда контекстная переменная передается вместе с
+контекстом, а соединения с БД у каждого потока свои.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+UNRESOLVED_ENDPOINT = '<unresolved>'
+
+_current_profile = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Показатели обработки одного запроса."""
+
+    __slots__ = ('request', 'queries', 'db_time', 'phases', 'recorded')
+
+    def __init__(self, request=None):
+        self.request = request
+        self.queries = 0
+        self.db_time = 0.0
+        self.phases = {}
+        # Список для сохранения SQL-запросов или None, если не требуется.
+        self.recorded = None
+
+    def add_phase(self, phase, seconds):
+        """Добавляет время, затраченное на этап обработки запроса."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+def current_profile():
+    """Возвращает показатели текущего запроса или None."""
+    return _current_profile.get()
+
+
+def endpoint_name(request):
+    """Имя эндпойнта в виде namespace:url_name."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.url_name is None:
+        return UNRESOLVED_ENDPOINT
+    return match.view_name
+
+
+def observe_query(execute, sql, params, many, context):
+    """Обертка connection.execute_wrapper, считающая запросы к БД."""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        profile.queries += 1
+        profile.db_time += duration
+        if profile.recorded is not None:
+            profile.recorded.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'duration': duration,
+            })
+
+
+def install_query_observer(sender, connection, **kwargs):
+    """Подключает подсчет запросов к соединению с БД."""
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
+
+
+@contextmanager
+def profile_request(request=None):
+    """Включает сбор показателей для текущего запроса.
+
+    Если показатели уже собираются внешним вызовом, возвращает их.
+    """
+    profile = _current_profile.get()
+    if profile is not None:
+        yield profile
+        return
+    profile = RequestProfile(request)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def measure(phase):
+    """Измеряет время выполнения блока как этап обработки запроса."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_phase(phase, time.perf_counter() - started)
+
+
+class TimedSerializer:
+    """Обертка сериализатора, измеряющая время получения его данных."""
+
+    def __init__(self, serializer):
+        self._serializer = serializer
+
+    def __getattr__(self, name):
+        return getattr(self._serializer, name)
+
+    @property
+    def data(self):
+        """Данные сериализатора с учетом времени сериализации."""
+        with measure('serialization'):
+            return self._serializer.data
+
+
+class InstrumentedViewMixin:
+    """Миксин представлений DRF, измеряющий время сериализации."""
+
+    def get_serializer(self, *args, **kwargs):
+        """Возвращает сериализатор в обертке, измеряющей время."""
+        return TimedSerializer(super().get_serializer(*args, **kwargs))
@@ -0,0 +1,257 @@
+"""Очередь фоновых задач в таблице БД.
+
+Задача — вызов функции модуля с именованными аргументами, которые
+сохраняются в JSON в строке модели Job. Задача, поставленная в очередь
+внутри транзакции, видна воркерам только после ее фиксации и исчезает
+при откате, поэтому задачи не теряются и не выполняются для
+несохраненных данных.
+
+Задачи с одинаковым ключом key дедуплицируются: пока задача с ключом
+ждет в очереди, новая задача с тем же ключом не создается. Функции задач
+читают актуальное состояние из БД, поэтому одно выполнение учитывает все
+изменения, сделанные до его начала. Функции задач должны быть
+идемпотентными: задача выполняется повторно после ошибки и после
+остановки воркера во время ее выполнения.
+
+Воркеры команды run_workers забирают задачи запросом SELECT ... FOR
+UPDATE SKIP LOCKED: на PostgreSQL несколько воркеров не ждут друг друга
+и не получают одну задачу. На SQLite запись в БД и так выполняется по
+очереди, а задачу получает воркер, первым изменивший ее статус.
+Выполненная задача удаляется. Задача с ошибкой повторяется через
+JOB_RETRY_DELAY · 2^(n - 1) секунд после n-й попытки, после
+JOB_MAX_ATTEMPTS попыток остается в таблице со статусом failed. Задачи,
+выполняющиеся дольше JOB_TIMEOUT секунд, считаются прерванными
+остановкой воркера и возвращаются в очередь.
+
+При JOB_QUEUE_ENABLED=False функция задачи вызывается сразу при
+постановке в очередь.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    DatabaseError,
+    IntegrityError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.metrics import COUNTER, HISTOGRAM, register, registry
+from api.models import Job
+
+logger = logging.getLogger(__name__)
+
+register(
+    'foodgram_jobs_enqueued_total', COUNTER,
+    'Количество задач, поставленных в очередь, и дубликатов.')
+register(
+    'foodgram_jobs_finished_total', COUNTER,
+    'Количество выполнений задач по результатам.')
+register(
+    'foodgram_job_wait_seconds', HISTOGRAM,
+    'Время ожидания задачи в очереди в секундах.')
+register(
+    'foodgram_job_duration_seconds', HISTOGRAM,
+    'Время выполнения задачи в секундах.')
+
+# Результаты выполнения задачи.
+DONE = 'done'
+RETRY = 'retry'
+FAILED = 'failed'
+# Как часто воркер ищет прерванные задачи, в секундах.
+REQUEUE_INTERVAL = 60
+
+
+def job_name(function):
+    """Имя функции задачи для import_string."""
+    return f'{function.__module__}.{function.__qualname__}'
+
+
+def enqueue(function, key=None, delay=0, **payload):
+    """Ставит вызов function(**payload) в очередь.
+
+    Возвращает задачу или None, если задача с тем же ключом уже выполнена
+    или очередь отключена.
+    """
+    if not settings.JOB_QUEUE_ENABLED:
+        function(**payload)
+        return None
+    name = job_name(function)
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                name=name,
+                payload=payload,
+                key=key,
+                run_at=timezone.now() + timedelta(seconds=delay)
+            )
+    except IntegrityError:
+        registry.inc(
+            'foodgram_jobs_enqueued_total', job=name, result='duplicate')
+        return Job.objects.filter(key=key, status=Job.QUEUED).first()
+    registry.inc('foodgram_jobs_enqueued_total', job=name, result='created')
+    return job
+
+
+def claim(worker):
+    """Забирает из очереди задачу, срок которой наступил, или None.
+
+    Без поддержки SELECT ... FOR UPDATE (SQLite) задача выбирается вне
+    транзакции: транзакция SQLite, начатая чтением, не может дождаться
+    блокировки записи и сразу завершается ошибкой.
+    """
+    locking = connection.features.has_select_for_update
+    while True:
+        now = timezone.now()
+        with transaction.atomic() if locking else nullcontext():
+            job = Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.QUEUED, run_at__lte=now
+            ).order_by('run_at', 'id').first()
+            if job is None:
+                return None
+            if Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+                    status=Job.RUNNING,
+                    attempts=F('attempts') + 1,
+                    started=now,
+                    worker=worker):
+                job.status = Job.RUNNING
+                job.attempts += 1
+                job.started = now
+                job.worker = worker
+                return job
+
+
+def retry_or_fail(job, error):
+    """Возвращает задачу в очередь с задержкой или отмечает ошибку.
+
+    Изменяется, только если задача все еще выполняется с тем же началом
+    выполнения. Возвращает результат или None, если задачу уже вернул в
+    очередь другой воркер.
+    """
+    running = Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, started=job.started)
+    if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+        return FAILED if running.update(
+            status=Job.FAILED, error=error) else None
+    delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+    try:
+        with transaction.atomic():
+            updated = running.update(
+                status=Job.QUEUED,
+                run_at=timezone.now() + timedelta(seconds=delay),
+                error=error
+            )
+    except IntegrityError:
+        # В очереди уже есть задача с тем же ключом, она и выполнит работу.
+        updated = running.delete()[0]
+    return RETRY if updated else None
+
+
+def run_job(job):
+    """Выполняет полученную задачу и возвращает результат."""
+    registry.observe(
+        'foodgram_job_wait_seconds',
+        max((job.started - job.run_at).total_seconds(), 0),
+        job=job.name
+    )
+    started = time.perf_counter()
+    try:
+        import_string(job.name)(**job.payload)
+    except Exception:
+        logger.exception('Ошибка задачи %s (id=%s, попытка %s)',
+                         job.name, job.pk, job.attempts)
+        result = retry_or_fail(job, traceback.format_exc()) or RETRY
+    else:
+        Job.objects.filter(pk=job.pk).delete()
+        result = DONE
+    registry.observe(
+        'foodgram_job_duration_seconds',
+        time.perf_counter() - started,
+        job=job.name
+    )
+    registry.inc('foodgram_jobs_finished_total', job=job.name, result=result)
+    registry.flush()
+    return result
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, выполняющиеся дольше JOB_TIMEOUT."""
+    threshold = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT)
+    requeued = 0
+    for job in Job.objects.filter(status=Job.RUNNING, started__lt=threshold):
+        result = retry_or_fail(
+            job, f'Задача не завершена воркером {job.worker} за '
+                 f'{settings.JOB_TIMEOUT} с.')
+        if result is None:
+            continue
+        logger.warning('Задача %s (id=%s) прервана: воркер %s не завершил '
+                       'ее за %s с', job.name, job.pk, job.worker,
+                       settings.JOB_TIMEOUT)
+        registry.inc(
+            'foodgram_jobs_finished_total', job=job.name,
+            result=f'timeout_{result}')
+        requeued += 1
+    return requeued
+
+
+def worker_name(index):
+    """Имя воркера: хост, процесс и номер потока."""
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def work(index, stop, once=False):
+    """Цикл воркера: выполняет задачи, пока не установлен stop.
+
+    При once=True воркер завершается, когда в очереди не остается задач,
+    срок которых наступил. Соединение потока с БД обслуживается так же,
+    как в начале и в конце запроса.
+    """
+    name = worker_name(index)
+    requeued_at = 0.0
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                if time.monotonic() - requeued_at >= REQUEUE_INTERVAL:
+                    requeued_at = time.monotonic()
+                    requeue_stale()
+                job = claim(name)
+                if job is not None:
+                    run_job(job)
+                    continue
+            except DatabaseError:
+                logger.exception('Воркер %s: ошибка БД', name)
+            if once:
+                return
+            stop.wait(settings.JOB_POLL_INTERVAL)
+    finally:
+        connection.close()
+        registry.flush(force=True)
+
+
+def work_in_threads(threads, stop, once=False):
+    """Запускает воркеры в потоках и ждет их завершения."""
+    workers = [
+        threading.Thread(
+            target=work,
+            args=(index, stop, once),
+            name=f'job-worker-{index}'
+        )
+        for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
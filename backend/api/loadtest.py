@@ -0,0 +1,226 @@
+"""Нагрузочное тестирование запущенного экземпляра API.
+
+Виртуальные пользователи работают конкурентно в одном цикле asyncio,
+каждый через собственное keep-alive соединение HTTP/1.1, и повторяют
+типичные сценарии: просмотр ленты, фильтрация по тегу, открытие
+рецепта, добавление в избранное и список покупок, скачивание списка
+покупок, подписка на автора. Рецепты и авторы выбираются с перекосом в
+сторону популярных, чтобы воспроизвести гонки на уникальных
+ограничениях Favorite, ShoppingCart и Subscription.
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+SCENARIO_STEPS = (
+    # (шаг, вероятность выполнения в сессии)
+    ('browse_feed', 1.0),
+    ('filter_by_tag', 0.6),
+    ('open_recipe', 0.8),
+    ('favorite', 0.3),
+    ('add_to_cart', 0.3),
+    ('download_cart', 0.1),
+    ('follow_author', 0.15),
+)
+
+
+class HTTPConnection:
+    """Минимальный асинхронный клиент HTTP/1.1 с keep-alive."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        """Закрывает соединение."""
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        """Выполняет запрос и возвращает код ответа и тело."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+        payload = b'' if body is None else json.dumps(body).encode()
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Connection: keep-alive',
+            'Accept: application/json',
+            f'Content-Length: {len(payload)}',
+        ]
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines.extend(f'{name}: {value}'
+                     for name, value in (headers or {}).items())
+        self.writer.write(
+            ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+        return await asyncio.wait_for(self.read_response(), self.timeout)
+
+    async def read_response(self):
+        """Читает ответ с телом фиксированной длины или chunked."""
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Соединение закрыто сервером.')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding') == 'chunked':
+            body = b''
+            while size := int((await self.reader.readline()).strip(), 16):
+                body += (await self.reader.readexactly(size + 2))[:-2]
+            await self.reader.readline()
+        else:
+            body = await self.reader.readexactly(
+                int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, body
+
+
+class Statistics:
+    """Результаты запросов по шагам сценариев."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, step, status, latency):
+        """Сохраняет результат запроса."""
+        self.latencies[step].append(latency)
+        self.statuses[step][status] += 1
+
+    def report(self, elapsed):
+        """Сводка: пропускная способность, процентили и ошибки."""
+        steps = {}
+        total = errors = 0
+        for step, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            statuses = self.statuses[step]
+            step_errors = sum(
+                count for status, count in statuses.items()
+                if not isinstance(status, int) or status >= 500)
+            total += len(latencies)
+            errors += step_errors
+            steps[step] = {
+                'requests': len(latencies),
+                'rps': round(len(latencies) / elapsed, 1),
+                'p50_ms': percentile(latencies, 0.5),
+                'p95_ms': percentile(latencies, 0.95),
+                'p99_ms': percentile(latencies, 0.99),
+                'error_rate': round(step_errors / len(latencies), 4),
+                'statuses': {
+                    str(status): count for status, count in statuses.items()
+                },
+            }
+        return {
+            'elapsed_s': round(elapsed, 1),
+            'requests': total,
+            'rps': round(total / elapsed, 1) if elapsed else 0.0,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'steps': steps,
+        }
+
+
+def percentile(values, fraction):
+    """Процентиль отсортированного списка задержек в миллисекундах."""
+    if not values:
+        return 0.0
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+    return round(values[index] * 1000, 2)
+
+
+class VirtualUser:
+    """Пользователь, повторяющий сценарии до окончания теста."""
+
+    def __init__(self, base_url, token, catalog, statistics, timeout, hot):
+        self.connection = HTTPConnection(base_url, timeout)
+        self.headers = {'Authorization': f'Token {token}'}
+        self.catalog = catalog
+        self.statistics = statistics
+        self.hot = hot
+        self.random = random.Random()
+
+    def pick(self, items):
+        """Выбирает элемент, отдавая предпочтение первым (популярным)."""
+        if self.random.random() < 0.8:
+            return self.random.choice(items[:self.hot])
+        return self.random.choice(items)
+
+    async def call(self, step, method, path, body=None):
+        """Выполняет запрос шага и сохраняет результат."""
+        started = time.perf_counter()
+        try:
+            status, _ = await self.connection.request(
+                method, path, self.headers, body)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                ConnectionError, ValueError, IndexError) as error:
+            status = type(error).__name__
+            await self.connection.close()
+        self.statistics.record(step, status, time.perf_counter() - started)
+
+    async def run_session(self):
+        """Один проход по сценарию посещения сайта."""
+        recipe = self.pick(self.catalog['recipes'])
+        author = self.pick(self.catalog['authors'])
+        page = self.random.randint(1, 5)
+        tag = self.random.choice(self.catalog['tags'])
+        actions = {
+            'browse_feed': ('GET', f'/api/recipes/?page={page}'),
+            'filter_by_tag': ('GET', f'/api/recipes/?tags={tag}'),
+            'open_recipe': ('GET', f'/api/recipes/{recipe}/'),
+            'favorite': ('POST', f'/api/recipes/{recipe}/favorite/'),
+            'add_to_cart': ('POST', f'/api/recipes/{recipe}/shopping_cart/'),
+            'download_cart': ('GET', '/api/recipes/download_shopping_cart/'),
+            'follow_author': ('POST', f'/api/users/{author}/subscribe/'),
+        }
+        undo = []
+        for step, probability in SCENARIO_STEPS:
+            if self.random.random() >= probability:
+                continue
+            method, path = actions[step]
+            await self.call(step, method, path)
+            if method == 'POST':
+                undo.append((f'un{step}', path))
+        for step, path in undo:
+            await self.call(step, 'DELETE', path)
+
+    async def run(self, deadline):
+        """Повторяет сценарии до наступления deadline."""
+        try:
+            while time.monotonic() < deadline:
+                await self.run_session()
+        finally:
+            await self.connection.close()
+
+
+async def run_load_test(base_url, tokens, catalog, concurrency, duration,
+                        timeout=30, hot=10):
+    """Запускает виртуальных пользователей и возвращает сводку."""
+    statistics = Statistics()
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        VirtualUser(
+            base_url, tokens[number % len(tokens)], catalog, statistics,
+            timeout, hot
+        ).run(deadline)
+        for number in range(concurrency)
+    ))
+    return statistics.report(time.perf_counter() - started)
@@ -0,0 +1 @@
+"""Файл импорта пакета management."""
@@ -0,0 +1 @@
+"""Файл импорта management commands."""
@@ -0,0 +1,74 @@
+"""Бенчмарк основных эндпойнтов API."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_test_environment
+
+from api.benchmarks import benchmark_user, run_benchmarks
+from users.models import CustomUser
+
+REPORT_FIELDS = ('p50_ms', 'p95_ms', 'queries', 'peak_kb')
+
+
+class Command(BaseCommand):
+    """Класс бенчмарка эндпойнтов API через тестовый клиент Django.
+
+    Результаты можно сохранить в JSON (--output) и сравнить с
+    результатами другого коммита (--compare).
+    """
+
+    help = ('Измеряет задержки, запросы к БД и выделение памяти '
+            'основных эндпойнтов API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--user', default=None,
+            help='Email пользователя. По умолчанию автор с наибольшим '
+                 'количеством рецептов.')
+        parser.add_argument(
+            '--only', nargs='*', default=None,
+            help='Имена эндпойнтов, для которых выполняется бенчмарк.')
+        parser.add_argument(
+            '--output', default=None, help='Файл для сохранения JSON.')
+        parser.add_argument(
+            '--compare', default=None,
+            help='JSON предыдущего запуска для сравнения.')
+
+    @override_settings(METRICS_ENABLED=False)
+    def handle(self, *args, **options):
+        """Функция фактической логики бенчмарка."""
+        setup_test_environment()
+        if options['user']:
+            user = CustomUser.objects.filter(email=options['user']).first()
+        else:
+            user = benchmark_user()
+        if user is None:
+            raise CommandError(
+                'Пользователь не найден. Заполните БД командой '
+                'seed_dataset.')
+        report = run_benchmarks(
+            user, options['iterations'], options['warmup'], options['only'])
+        baseline = {}
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)['results']
+        self.stdout.write(
+            f'{"эндпойнт":32}' + ''.join(
+                f'{field:>18}' for field in REPORT_FIELDS))
+        for name, result in report['results'].items():
+            row = f'{name:32}'
+            for field in REPORT_FIELDS:
+                value = f'{result[field]}'
+                if name in baseline and baseline[name][field]:
+                    change = (result[field] / baseline[name][field] - 1) * 100
+                    value += f' ({change:+.0f}%)'
+                row += f'{value:>18}'
+            self.stdout.write(row)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты сохранены в {options["output"]}.'))
@@ -0,0 +1,85 @@
+"""Сравнение синхронных и асинхронных представлений API."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_test_environment
+from rest_framework.authtoken.models import Token
+
+from api.async_benchmarks import build_cases, compare_paths
+from api.benchmarks import benchmark_user
+
+REPORT_FIELDS = ('rps', 'p50_ms', 'p95_ms', 'peak_kb', 'threads')
+
+
+class Command(BaseCommand):
+    """Класс сравнения синхронного и асинхронного путей обработки.
+
+    Синхронный путь обслуживается пулом из --workers потоков, как
+    воркерами gunicorn, асинхронный — циклом событий с --concurrency
+    одновременными запросами. Для каждого пути выводятся пропускная
+    способность, задержки, пиковый объем памяти и количество потоков.
+    """
+
+    help = ('Сравнивает синхронные вьюсеты и асинхронные представления '
+            'для чтения под конкурентной нагрузкой.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Потоки синхронного пути.')
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help='Одновременные запросы асинхронного пути.')
+        parser.add_argument(
+            '--db-latency', type=float, default=2,
+            help='Имитируемая задержка каждого запроса к БД, мс.')
+        parser.add_argument(
+            '--only', nargs='*', default=None,
+            help='Имена эндпойнтов, для которых выполняется сравнение.')
+        parser.add_argument(
+            '--output', default=None, help='Файл для сохранения JSON.')
+
+    @override_settings(METRICS_ENABLED=False)
+    def handle(self, *args, **options):
+        """Функция фактической логики сравнения."""
+        setup_test_environment()
+        user = benchmark_user()
+        if user is None:
+            raise CommandError(
+                'Пользователь не найден. Заполните БД командой '
+                'seed_dataset.')
+        token, _ = Token.objects.get_or_create(user=user)
+        cases = [
+            (name, url) for name, url in build_cases(user)
+            if not options['only'] or name in options['only']
+        ]
+        results = compare_paths(
+            cases,
+            {'Authorization': f'Token {token.key}'},
+            options['requests'],
+            options['workers'],
+            options['concurrency'],
+            options['db_latency'] / 1000
+        )
+        self.stdout.write(
+            f'{"эндпойнт":26}{"путь":>7}' + ''.join(
+                f'{field:>10}' for field in REPORT_FIELDS) + '  коды')
+        for name, result in results.items():
+            for mode in ('sync', 'async'):
+                self.stdout.write(
+                    f'{name:26}{mode:>7}' + ''.join(
+                        f'{result[mode][field]:>10}'
+                        for field in REPORT_FIELDS)
+                    + f'  {result[mode]["statuses"]}')
+            self.stdout.write(f'{"":26}{"x":>7}{result["speedup"]:>10}')
+            if not result['same_body']:
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: ответы синхронного и асинхронного путей '
+                    f'различаются.'))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты сохранены в {options["output"]}.'))
@@ -0,0 +1,58 @@
+"""Сравнение загрузки фото рецепта в base64 и в multipart/form-data."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_test_environment
+from rest_framework.authtoken.models import Token
+
+from api.benchmarks import benchmark_user
+from api.upload_benchmarks import compare_uploads
+
+REPORT_FIELDS = ('body_kb', 'peak_kb', 'ms')
+
+
+class Command(BaseCommand):
+    """Класс сравнения способов загрузки фото рецепта.
+
+    Создает рецепт с фото размером около --size-mb мегабайт в JSON с
+    изображением в base64 и в multipart/form-data и выводит размер тела
+    запроса, пиковый объем памяти при обработке и время обработки.
+    """
+
+    help = ('Измеряет пиковый объем памяти при загрузке фото рецепта '
+            'в base64 и в multipart/form-data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=10)
+        parser.add_argument('--iterations', type=int, default=3)
+        parser.add_argument(
+            '--output', default=None, help='Файл для сохранения JSON.')
+
+    @override_settings(METRICS_ENABLED=False)
+    def handle(self, *args, **options):
+        """Функция фактической логики сравнения."""
+        setup_test_environment()
+        user = benchmark_user()
+        if user is None:
+            raise CommandError(
+                'Пользователь не найден. Заполните БД командой '
+                'seed_dataset.')
+        token, _ = Token.objects.get_or_create(user=user)
+        results = compare_uploads(
+            {'Authorization': f'Token {token.key}'},
+            options['size_mb'],
+            options['iterations']
+        )
+        self.stdout.write(f'Размер фото: {results["photo_kb"]} КБ')
+        self.stdout.write(f'{"способ":12}' + ''.join(
+            f'{field:>12}' for field in REPORT_FIELDS) + '  коды')
+        for mode, result in results['modes'].items():
+            self.stdout.write(f'{mode:12}' + ''.join(
+                f'{result[field]:>12}' for field in REPORT_FIELDS)
+                + f'  {result["statuses"]}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты сохранены в {options["output"]}.'))
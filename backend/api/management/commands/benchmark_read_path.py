@@ -0,0 +1,126 @@
+"""Сравнение сериализаторов и облегченного пути чтения списков."""
+
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.readers import (
+    read_ingredients,
+    read_recipes,
+    read_subscriptions,
+    read_tags,
+)
+from api.serializers import (
+    IngredientSerializer,
+    RecipeReadSerializer,
+    SubscriptionSerializer,
+    TagSerializer,
+)
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    """Класс сравнения путей чтения списочных эндпойнтов.
+
+    Для каждого эндпойнта проверяет, что облегченный путь чтения
+    возвращает тот же JSON, что и сериализатор, и выводит пропускную
+    способность обоих путей в объектах в секунду.
+    """
+
+    help = ('Проверяет совпадение ответов облегченного пути чтения с '
+            'сериализаторами и измеряет их пропускную способность.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество повторов для каждого пути.')
+        parser.add_argument(
+            '--limit', type=int, default=50,
+            help='Количество рецептов и подписок в одной выборке.')
+        parser.add_argument(
+            '--user', default=None,
+            help='Email пользователя, от имени которого читаются данные.')
+
+    def make_request(self, user, **query_params):
+        """Создает запрос DRF для контекста сериализаторов."""
+        request = Request(APIRequestFactory().get('/', query_params))
+        request.user = user
+        return request
+
+    def get_cases(self, user, limit):
+        """Пары функций чтения (сериализатор, облегченный путь)."""
+        tags = Tag.objects.all()
+        ingredients = Ingredient.objects.all()
+        recipe_ids = list(
+            Recipe.objects.values_list('id', flat=True)[:limit])
+        recipe_request = self.make_request(user)
+        cases = {
+            'tags': (
+                lambda: TagSerializer(tags, many=True).data,
+                lambda: read_tags(tags),
+            ),
+            'ingredients': (
+                lambda: IngredientSerializer(ingredients, many=True).data,
+                lambda: read_ingredients(ingredients),
+            ),
+            'recipes': (
+                lambda: RecipeReadSerializer(
+                    Recipe.objects.filter(id__in=recipe_ids),
+                    many=True, context={'request': recipe_request}
+                ).data,
+                lambda: read_recipes(recipe_ids, user),
+            ),
+        }
+        if user.is_authenticated:
+            author_ids = list(CustomUser.objects.filter(
+                author__subscriber=user
+            ).values_list('id', flat=True)[:limit])
+            subscription_request = self.make_request(
+                user, recipes_limit=3)
+            cases['subscriptions'] = (
+                lambda: SubscriptionSerializer(
+                    CustomUser.objects.filter(id__in=author_ids),
+                    many=True, context={'request': subscription_request}
+                ).data,
+                lambda: read_subscriptions(author_ids, recipes_limit=3),
+            )
+        return cases
+
+    def measure(self, read, repeat):
+        """Возвращает количество объектов в секунду для функции чтения."""
+        objects = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            objects += len(read())
+        elapsed = time.perf_counter() - started
+        return objects / elapsed if elapsed else 0.0
+
+    def handle(self, *args, **options):
+        """Проверка контракта и измерение пропускной способности."""
+        user = AnonymousUser()
+        if options['user']:
+            user = CustomUser.objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError(
+                    f'Пользователь {options["user"]} не найден.')
+        renderer = JSONRenderer()
+        for name, (serialize, read) in self.get_cases(
+                user, options['limit']).items():
+            if renderer.render(serialize()) != renderer.render(read()):
+                raise CommandError(
+                    f'Ответ облегченного пути для {name} отличается от '
+                    'ответа сериализатора.')
+            serializer_rate = self.measure(serialize, options['repeat'])
+            values_rate = self.measure(read, options['repeat'])
+            self.stdout.write(
+                f'{name}: сериализатор {serializer_rate:.0f} объектов/с, '
+                f'values() {values_rate:.0f} объектов/с, '
+                f'ускорение x{values_rate / (serializer_rate or 1):.1f}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Ответы облегченного пути совпадают с сериализаторами.'))
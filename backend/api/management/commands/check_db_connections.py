@@ -0,0 +1,115 @@
+"""Проверка постоянных соединений с БД."""
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import override_settings
+
+from api.async_benchmarks import wsgi_get
+from api.db_pool import opened_connections
+
+
+def break_connection(alias=DEFAULT_DB_ALIAS):
+    """Обрывает текущее соединение, как при перезапуске БД.
+
+    В PostgreSQL процесс соединения завершается с сервера через
+    отдельное соединение, для остальных БД закрывается соединение
+    драйвера в обход Django.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        connection.connection.close()
+        return
+    backend_pid = connection.connection.get_backend_pid()
+    killer = connections.create_connection(alias)
+    try:
+        with killer.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [backend_pid])
+    finally:
+        killer.close()
+
+
+def run_pool_checks(url, requests=20, alias=DEFAULT_DB_ALIAS):
+    """Проверяет переиспользование и восстановление соединений.
+
+    Запросы выполняются через обработчик WSGI, который, как gunicorn,
+    вызывает закрытие устаревших соединений в начале и в конце запроса.
+    Возвращает список кортежей (проверка, результат, описание).
+    """
+    handler = WSGIHandler()
+    connection = connections[alias]
+    persistent = connection.settings_dict['CONN_MAX_AGE'] != 0
+    connection.close()
+    opened = opened_connections(alias)
+    statuses = [wsgi_get(handler, url, {})[0] for _ in range(requests)]
+    new_connections = opened_connections(alias) - opened
+    expected = 1 if persistent else requests
+    results = [(
+        'переиспользование соединений',
+        set(statuses) == {200} and new_connections == expected,
+        f'{requests} запросов, новых соединений: {new_connections} '
+        f'(ожидается {expected})'
+    )]
+    if not persistent:
+        return results
+    if connection.connection is None:
+        connection.ensure_connection()
+    break_connection(alias)
+    opened = opened_connections(alias)
+    status, _ = wsgi_get(handler, url, {})
+    reconnected = opened_connections(alias) - opened
+    results.append((
+        'восстановление после обрыва соединения',
+        status == 200 and reconnected == 1,
+        f'ответ {status}, новых соединений: {reconnected}'
+    ))
+    return results
+
+
+class Command(BaseCommand):
+    """Класс проверки переиспользования и восстановления соединений.
+
+    Выполняет запросы к эндпойнту через обработчик WSGI и считает новые
+    соединения с основной БД: при постоянных соединениях все запросы
+    должны обслуживаться одним соединением. Затем соединение обрывается,
+    как при перезапуске БД, и следующий запрос должен успешно выполниться
+    на новом соединении.
+    """
+
+    help = 'Проверяет переиспользование и восстановление соединений с БД.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='/api/tags/',
+            help='Эндпойнт для запросов (по умолчанию /api/tags/).'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Количество запросов (по умолчанию 20).'
+        )
+
+    @override_settings(METRICS_ENABLED=False)
+    def handle(self, *args, **options):
+        """Функция фактической логики проверки соединений."""
+        settings_dict = connection.settings_dict
+        self.stdout.write(
+            f'CONN_MAX_AGE={settings_dict["CONN_MAX_AGE"]}, '
+            f'CONN_HEALTH_CHECKS={settings_dict["CONN_HEALTH_CHECKS"]}')
+        results = run_pool_checks(options['url'], options['requests'])
+        failed = []
+        for name, passed, description in results:
+            mark = 'OK' if passed else 'ОШИБКА'
+            self.stdout.write(f'{mark:7}{name:40}{description}')
+            if not passed:
+                failed.append(name)
+        if failed:
+            if (len(results) > 1 and not results[1][1]
+                    and not settings_dict['CONN_HEALTH_CHECKS']):
+                self.stdout.write(
+                    'Без DB_CONN_HEALTH_CHECKS оборванное соединение '
+                    'заменяется только после ошибки в запросе.')
+            raise CommandError('Проверка не пройдена: ' + ', '.join(failed))
+        self.stdout.write(self.style.SUCCESS('Соединения с БД в порядке.'))
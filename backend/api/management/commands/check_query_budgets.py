@@ -0,0 +1,121 @@
+"""Проверка бюджетов запросов к БД на синтетических данных."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from api.query_budget import get_budget
+from api.urls import app_name, router_version_1
+from recipes.seeding import seed_dataset
+from users.models import CustomUser
+
+
+def router_endpoints():
+    """Эндпойнты роутера API, доступные по методу GET.
+
+    Возвращает пары (имя эндпойнта, URL). Для детальных эндпойнтов
+    используется первый объект из queryset вьюсета.
+    """
+    for prefix, viewset, basename in router_version_1.registry:
+        lookup = None
+        for route in router_version_1.get_routes(viewset):
+            if 'get' not in route.mapping:
+                continue
+            kwargs = {}
+            if route.detail:
+                if lookup is None:
+                    lookup = viewset.queryset.values_list(
+                        'pk', flat=True).first()
+                if lookup is None:
+                    continue
+                lookup_field = viewset.lookup_url_kwarg or viewset.lookup_field
+                kwargs[lookup_field] = lookup
+            endpoint = f'{app_name}:{route.name.format(basename=basename)}'
+            yield endpoint, reverse(endpoint, kwargs=kwargs)
+
+
+def run_budget_checks(user=None):
+    """Запрашивает все эндпойнты роутера и считает запросы к БД.
+
+    Возвращает список кортежей (эндпойнт, количество запросов, бюджет).
+    Все эндпойнты должны отвечать без ошибок.
+    """
+    client = Client()
+    headers = {}
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        headers['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+    results = []
+    with override_settings(QUERY_BUDGET_MODE='off'):
+        for endpoint, url in router_endpoints():
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, **headers)
+            if response.status_code >= 400:
+                raise AssertionError(
+                    f'Эндпойнт {endpoint} ({url}) вернул '
+                    f'{response.status_code}.')
+            results.append((endpoint, len(queries), get_budget(endpoint)))
+    return results
+
+
+def budget_violations(results):
+    """Отбирает результаты проверки, превысившие бюджет."""
+    return [
+        (endpoint, queries, budget)
+        for endpoint, queries, budget in results
+        if budget is not None and queries > budget
+    ]
+
+
+class Command(BaseCommand):
+    """Класс проверки бюджетов запросов эндпойнтов роутера API.
+
+    Создает тестовую БД, заполняет ее синтетическими данными, запрашивает
+    все GET-эндпойнты роутера от имени пользователя и завершается ошибкой,
+    если хотя бы один эндпойнт превысил бюджет из QUERY_BUDGETS.
+    """
+
+    help = 'Проверяет бюджеты запросов к БД для эндпойнтов API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Количество пользователей в тестовых данных.')
+        parser.add_argument(
+            '--recipes', type=int, default=50,
+            help='Количество рецептов в тестовых данных.')
+
+    @override_settings(METRICS_ENABLED=False)
+    def handle(self, *args, **options):
+        """Функция фактической логики проверки бюджетов."""
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user_ids = seed_dataset(
+                users=options['users'], recipes=options['recipes'])
+            results = run_budget_checks(
+                CustomUser.objects.get(id=user_ids[0]))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        for endpoint, queries, budget in results:
+            budget = '-' if budget is None else budget
+            self.stdout.write(f'{endpoint}: {queries} (бюджет {budget})')
+        violations = budget_violations(results)
+        if violations:
+            raise CommandError(
+                'Превышены бюджеты запросов: ' + ', '.join(
+                    f'{endpoint} ({queries} > {budget})'
+                    for endpoint, queries, budget in violations))
+        self.stdout.write(self.style.SUCCESS(
+            'Все эндпойнты укладываются в бюджеты запросов.'))
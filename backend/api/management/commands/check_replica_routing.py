@@ -0,0 +1,119 @@
+"""Проверка маршрутизации запросов к БД между основной БД и репликами."""
+
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.authtoken.models import Token
+
+from api.db_routing import DB_PIN_HEADER
+from recipes.models import Recipe
+from recipes.seeding import seed_dataset
+from users.models import CustomUser
+
+
+def routing_scenarios(recipe_id):
+    """Сценарии проверки: (название, метод, URL, заголовки, ожидание).
+
+    Ожидание 'replica' означает чтение только с реплик, 'default' —
+    только с основной БД.
+    """
+    recipes_url = '/api/recipes/'
+    favorite_url = f'/api/recipes/{recipe_id}/favorite/'
+    pin = {DB_PIN_HEADER: f'{time.time() + 60:.3f}'}
+    return (
+        ('чтение', 'get', recipes_url, {}, 'replica'),
+        ('запись', 'post', favorite_url, {}, 'default'),
+        ('чтение после записи (cookie)', 'get', recipes_url, {}, 'default'),
+        ('удаление', 'delete', favorite_url, {}, 'default'),
+        ('чтение без cookie', 'get', recipes_url, {}, 'replica'),
+        ('чтение с заголовком закрепления', 'get', recipes_url, pin,
+         'default'),
+    )
+
+
+def run_routing_checks(user, recipe_id):
+    """Выполняет сценарии и определяет БД, к которым были запросы.
+
+    Возвращает список кортежей (сценарий, код ответа, псевдонимы БД,
+    ожидание, результат проверки).
+    """
+    token, _ = Token.objects.get_or_create(user=user)
+    client = Client()
+    auth = {'Authorization': f'Token {token.key}'}
+    aliases = [DEFAULT_DB_ALIAS, *settings.DB_REPLICAS]
+    results = []
+    for name, method, url, headers, expected in routing_scenarios(recipe_id):
+        if name == 'чтение без cookie':
+            client.cookies.clear()
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(
+                    CaptureQueriesContext(connections[alias]))
+                for alias in aliases
+            }
+            response = getattr(client, method)(
+                url, headers={**auth, **headers})
+        used = sorted(alias for alias in aliases if len(captured[alias]))
+        if expected == 'replica':
+            passed = bool(used) and DEFAULT_DB_ALIAS not in used
+        else:
+            passed = used == [DEFAULT_DB_ALIAS]
+        results.append((name, response.status_code, used, expected, passed))
+    return results
+
+
+class Command(BaseCommand):
+    """Класс проверки маршрутизации чтения на реплики.
+
+    Создает тестовые БД, в которых реплики из DB_REPLICAS являются
+    зеркалами основной БД (настройка TEST MIRROR), заполняет их
+    синтетическими данными и выполняет сценарии чтения и записи.
+    Для каждого сценария выводятся БД, к которым были запросы.
+    Команда завершается ошибкой, если чтение не попало на реплику или
+    запись и чтение после нее не попали на основную БД.
+    """
+
+    help = 'Проверяет маршрутизацию запросов к БД на реплики.'
+
+    @override_settings(METRICS_ENABLED=False)
+    def handle(self, *args, **options):
+        """Функция фактической логики проверки маршрутизации."""
+        if not settings.DB_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены: задайте DB_REPLICA_HOSTS.')
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user_ids = seed_dataset(users=3, recipes=10, favorites_per_user=0)
+            user = CustomUser.objects.get(id=user_ids[0])
+            recipe_id = Recipe.objects.values_list('id', flat=True).first()
+            results = run_routing_checks(user, recipe_id)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        failed = []
+        for name, status, used, expected, passed in results:
+            mark = 'OK' if passed else 'ОШИБКА'
+            self.stdout.write(
+                f'{mark:7}{name:34}{status:>5}  {", ".join(used) or "-"}'
+                f' (ожидается {expected})')
+            if not passed:
+                failed.append(name)
+        if failed:
+            raise CommandError(
+                'Неверная маршрутизация: ' + ', '.join(failed))
+        self.stdout.write(self.style.SUCCESS(
+            'Чтение выполняется на репликах, запись и чтение после нее — '
+            'на основной БД.'))
@@ -0,0 +1,106 @@
+"""Нагрузочное тестирование запущенного экземпляра API."""
+
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.loadtest import run_load_test
+from recipes.models import Recipe, Tag
+from users.models import CustomUser
+
+LOAD_TEST_USER_PREFIX = 'loadtest'
+
+
+class Command(BaseCommand):
+    """Класс нагрузочного тестирования API по HTTP.
+
+    Сервер запускается отдельно с теми же настройками БД, например:
+    gunicorn --workers 4 foodgram.wsgi
+    gunicorn --workers 4 -k uvicorn.workers.UvicornWorker foodgram.asgi
+    Команда создает пользователей с токенами, выбирает рецепты и авторов
+    для сценариев и выводит пропускную способность, процентили задержек
+    и долю ошибок по каждому шагу сценария.
+    """
+
+    help = 'Нагружает запущенный сервер API типичными сценариями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--concurrency', type=int, default=20,
+            help='Количество одновременных виртуальных пользователей.')
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность теста в секундах.')
+        parser.add_argument(
+            '--users', type=int, default=50,
+            help='Количество учетных записей виртуальных пользователей.')
+        parser.add_argument(
+            '--hot', type=int, default=10,
+            help='Количество популярных рецептов и авторов, на которые '
+                 'приходится большая часть действий.')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument(
+            '--output', default=None, help='Файл для сохранения JSON.')
+
+    def prepare_tokens(self, count):
+        """Создает пользователей нагрузочного теста и их токены."""
+        tokens = []
+        for number in range(count):
+            user, _ = CustomUser.objects.get_or_create(
+                username=f'{LOAD_TEST_USER_PREFIX}{number}',
+                defaults={
+                    'email': f'{LOAD_TEST_USER_PREFIX}{number}@example.com',
+                    'first_name': 'Нагрузочный',
+                    'last_name': 'Тест',
+                }
+            )
+            token, _ = Token.objects.get_or_create(user=user)
+            tokens.append(token.key)
+        return tokens
+
+    def prepare_catalog(self):
+        """Рецепты, авторы и теги для сценариев."""
+        catalog = {
+            'recipes': list(
+                Recipe.objects.values_list('id', flat=True)[:1000]),
+            'authors': list(Recipe.objects.order_by().values_list(
+                'author_id', flat=True).distinct()[:1000]),
+            'tags': list(Tag.objects.values_list('slug', flat=True)),
+        }
+        if not all(catalog.values()):
+            raise CommandError(
+                'В БД нет рецептов или тегов. Заполните БД командой '
+                'seed_dataset.')
+        return catalog
+
+    @override_settings(METRICS_ENABLED=False)
+    def handle(self, *args, **options):
+        """Функция фактической логики нагрузочного теста."""
+        tokens = self.prepare_tokens(options['users'])
+        catalog = self.prepare_catalog()
+        report = asyncio.run(run_load_test(
+            options['url'], tokens, catalog, options['concurrency'],
+            options['duration'], options['timeout'], options['hot']))
+        self.stdout.write(
+            f'Запросов: {report["requests"]}, {report["rps"]} в секунду, '
+            f'доля ошибок {report["error_rate"]:.2%}')
+        self.stdout.write(
+            f'{"шаг":18}{"запросов":>10}{"rps":>8}{"p50":>9}{"p95":>9}'
+            f'{"p99":>9}  коды ответов')
+        for step, result in report['steps'].items():
+            statuses = ', '.join(
+                f'{status}: {count}'
+                for status, count in sorted(result['statuses'].items()))
+            self.stdout.write(
+                f'{step:18}{result["requests"]:>10}{result["rps"]:>8}'
+                f'{result["p50_ms"]:>9}{result["p95_ms"]:>9}'
+                f'{result["p99_ms"]:>9}  {statuses}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты сохранены в {options["output"]}.'))
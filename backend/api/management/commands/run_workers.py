@@ -0,0 +1,74 @@
+"""Запуск воркеров очереди фоновых задач."""
+
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.jobs import work_in_threads
+
+
+def run_process(threads, once):
+    """Процесс воркеров: останавливается по SIGTERM после текущих задач."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work_in_threads(threads, stop, once)
+
+
+class Command(BaseCommand):
+    """Класс запуска воркеров очереди фоновых задач.
+
+    Воркеры выполняются в --threads потоках каждого из --processes
+    процессов. Потоков достаточно для задач, ждущих БД и диск; задачи,
+    занимающие процессор (обработка изображений), стоит распределять
+    по процессам. По SIGTERM и SIGINT воркеры завершают текущие задачи
+    и останавливаются.
+    """
+
+    help = 'Выполняет фоновые задачи из очереди в БД.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Завершиться, когда в очереди не останется задач.')
+
+    def handle(self, *args, **options):
+        """Функция фактической логики запуска воркеров."""
+        processes, threads = options['processes'], options['threads']
+        if processes < 1 or threads < 1:
+            raise CommandError(
+                'Количество процессов и потоков должно быть больше нуля.')
+        self.stdout.write(
+            f'Запуск воркеров: процессов {processes}, потоков {threads}.')
+        if processes == 1:
+            stop = threading.Event()
+            for signal_number in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signal_number, lambda *args: stop.set())
+            work_in_threads(threads, stop, options['once'])
+        else:
+            # Дочерние процессы не должны использовать соединения
+            # родительского процесса.
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            children = [
+                context.Process(
+                    target=run_process, args=(threads, options['once']))
+                for _ in range(processes)
+            ]
+            for child in children:
+                child.start()
+
+            def stop_children(*args):
+                for child in children:
+                    child.terminate()
+
+            for signal_number in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signal_number, stop_children)
+            for child in children:
+                child.join()
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены.'))
@@ -0,0 +1,79 @@
+"""Просмотр самых медленных сохраненных профилей запросов."""
+
+import io
+import pstats
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.profiling import load_profiles
+
+
+class Command(BaseCommand):
+    """Класс вывода самых медленных профилей из PROFILER_DIR."""
+
+    help = ('Выводит самые медленные сохраненные профили запросов, их '
+            'самые затратные функции и SQL-запросы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Количество выводимых профилей.')
+        parser.add_argument(
+            '--top', type=int, default=15,
+            help='Количество функций и SQL-запросов для каждого профиля.')
+        parser.add_argument(
+            '--sort', default='cumulative',
+            choices=('cumulative', 'tottime', 'ncalls'),
+            help='Порядок сортировки функций профиля cProfile.')
+        parser.add_argument(
+            '--endpoint', default=None,
+            help='Выводить только профили указанного эндпойнта.')
+
+    def handle(self, *args, **options):
+        """Функция фактической логики вывода профилей."""
+        directory = Path(settings.PROFILER_DIR)
+        profiles = load_profiles(directory)
+        if options['endpoint']:
+            profiles = [
+                profile for profile in profiles
+                if profile['endpoint'] == options['endpoint']
+            ]
+        profiles.sort(key=lambda profile: profile['duration'], reverse=True)
+        if not profiles:
+            self.stdout.write(f'В каталоге {directory} нет профилей.')
+            return
+        for profile in profiles[:options['limit']]:
+            created = datetime.fromtimestamp(profile['created'])
+            queries = profile['queries']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{profile["duration"] * 1000:.1f} мс  '
+                f'{profile["method"]} {profile["path"]}  '
+                f'[{profile["endpoint"]}, {profile["status"]}]  '
+                f'{created:%Y-%m-%d %H:%M:%S}  {profile["profile"]}'
+            ))
+            self.stdout.write(
+                f'SQL: {len(queries)} запросов, '
+                f'{sum(query["duration"] for query in queries) * 1000:.1f} мс'
+            )
+            for query in sorted(
+                    queries, key=lambda query: query['duration'],
+                    reverse=True)[:options['top']]:
+                self.stdout.write(
+                    f'  {query["duration"] * 1000:8.2f} мс  {query["sql"]}')
+            self.stdout.write(self.format_functions(
+                directory / profile['profile'], profile['engine'], options))
+
+    def format_functions(self, path, engine, options):
+        """Самые затратные функции профиля в текстовом виде."""
+        if not path.exists():
+            return f'Файл профиля {path} не найден.'
+        if engine != 'cprofile':
+            return path.read_text()
+        stream = io.StringIO()
+        stats = pstats.Stats(str(path), stream=stream)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(
+            options['top'])
+        return stream.getvalue()
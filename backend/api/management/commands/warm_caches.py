@@ -0,0 +1,50 @@
+"""Прогрев кэшей после развертывания."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.warmup import warm_caches
+
+REPORT_FIELDS = ('requests', 'errors', 'ms', 'max_ms')
+
+
+class Command(BaseCommand):
+    """Класс прогрева кэшей после развертывания.
+
+    Параллельно выполняет запросы к каталогам, первым страницам списков
+    рецептов и самым популярным рецептам, а на PostgreSQL с расширением
+    pg_prewarm загружает таблицы рецептов в буферный кэш основной БД и
+    реплик. Выводит время каждого шага.
+    """
+
+    help = 'Прогревает кэши БД запросами к основным эндпойнтам чтения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARM_CACHES_PAGES)
+        parser.add_argument(
+            '--recipes', type=int, default=settings.WARM_CACHES_RECIPES)
+        parser.add_argument('--workers', type=int, default=8)
+
+    def handle(self, *args, **options):
+        """Функция фактической логики прогрева."""
+        steps, prewarmed, elapsed = warm_caches(
+            options['pages'],
+            options['recipes'],
+            options['workers'],
+            settings.DATABASES
+        )
+        self.stdout.write(f'{"шаг":26}' + ''.join(
+            f'{field:>10}' for field in REPORT_FIELDS))
+        for step, summary in steps.items():
+            self.stdout.write(f'{step:26}' + ''.join(
+                f'{summary[field]:>10}' for field in REPORT_FIELDS))
+        for alias, blocks in prewarmed.items():
+            self.stdout.write(
+                f'pg_prewarm {alias}: ' + (
+                    'недоступен' if blocks is None
+                    else f'загружено блоков {blocks}'))
+        errors = sum(summary['errors'] for summary in steps.values())
+        style = self.style.WARNING if errors else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Прогрев завершен за {elapsed:.1f} с, ошибок: {errors}.'))
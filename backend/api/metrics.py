@@ -0,0 +1,324 @@
+"""Реестр показателей эндпойнтов API в формате Prometheus.
+
+Каждый процесс копит показатели в памяти и не чаще раза в
+METRICS_FLUSH_INTERVAL секунд сохраняет их снимок в файл
+METRICS_DIR/<pid>-<время запуска>.json. Эндпойнт показателей суммирует
+снимки всех процессов, поэтому значения агрегируются по всем воркерам
+gunicorn. Время запуска в имени файла не дает новому процессу с тем же
+pid перезаписать снимок завершившегося.
+
+Счетчики и гистограммы завершившихся процессов продолжают входить в
+сумму, чтобы она не уменьшалась при перезапуске воркеров: при сборе
+показателей они переносятся в общий архив METRICS_DIR/archive.json, а
+снимки завершившихся процессов удаляются, поэтому количество файлов не
+растет с каждым перезапуском. Индикаторы (GAUGE) описывают текущее
+состояние, поэтому суммируются только по работающим процессам: процесс
+считается работающим, если процесс с его pid существует и его снимок —
+последний из снимков с этим pid. Процесс, уже сохранявший снимки,
+сохраняет последний снимок при завершении.
+
+При METRICS_ENABLED=False снимки не сохраняются. Команды, отправляющие
+синтетические запросы через middleware (проверки и бенчмарки),
+отключают показатели, чтобы не смешивать их с показателями сервиса.
+"""
+
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+# Архив счетчиков и гистограмм завершившихся процессов и его блокировка.
+ARCHIVE_FILE = 'archive.json'
+ARCHIVE_LOCK_FILE = 'archive.lock'
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+METRICS = {
+    'foodgram_http_requests_total': (
+        COUNTER, 'Количество обработанных запросов.'),
+    'foodgram_http_request_duration_seconds': (
+        HISTOGRAM, 'Время обработки запроса в секундах.'),
+    'foodgram_http_response_bytes_total': (
+        COUNTER, 'Суммарный размер ответов в байтах.'),
+    'foodgram_db_queries_total': (
+        COUNTER, 'Количество запросов к БД.'),
+    'foodgram_db_query_seconds_total': (
+        COUNTER, 'Суммарное время запросов к БД в секундах.'),
+    'foodgram_serialization_seconds_total': (
+        COUNTER, 'Суммарное время сериализации в секундах.'),
+}
+
+
+def register(name, metric_type, description):
+    """Регистрирует новый показатель в реестре."""
+    METRICS[name] = (metric_type, description)
+
+
+def process_alive(pid):
+    """Существует ли процесс с идентификатором pid."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_gauge(name):
+    """Является ли показатель индикатором."""
+    return METRICS.get(name, (GAUGE,))[0] == GAUGE
+
+
+class MetricsRegistry:
+    """Показатели текущего процесса с сохранением снимков в файлы."""
+
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        self._file_pid = None
+        self._file_name = None
+
+    def _key(self, name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Увеличивает счетчик."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Устанавливает значение индикатора текущего процесса."""
+        with self._lock:
+            self._samples[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """Добавляет наблюдение в гистограмму."""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._samples.get(key)
+            if histogram is None:
+                histogram = self._samples[key] = (
+                    [0] * (len(DURATION_BUCKETS) + 1) + [0.0])
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            else:
+                histogram[len(DURATION_BUCKETS)] += 1
+            histogram[-1] += value
+
+    def snapshot(self):
+        """Снимок показателей процесса в сериализуемом виде."""
+        with self._lock:
+            return [
+                [name, dict(labels), value]
+                for (name, labels), value in self._samples.items()
+            ]
+
+    def file_name(self):
+        """Имя файла снимка текущего процесса.
+
+        Пересоздается после fork, чтобы дочерний процесс не писал в файл
+        родителя.
+        """
+        pid = os.getpid()
+        if self._file_pid != pid:
+            self._file_pid = pid
+            self._file_name = f'{pid}-{time.time_ns()}.json'
+        return self._file_name
+
+    def flush(self, force=False):
+        """Сохраняет снимок показателей процесса в общий каталог."""
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not settings.METRICS_ENABLED or not directory or (
+                not force
+                and now - self._flushed_at < settings.METRICS_FLUSH_INTERVAL):
+            return
+        self._flushed_at = now
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        write_json(directory / self.file_name(), self.snapshot())
+
+    def flush_at_exit(self):
+        """Сохраняет последний снимок процесса, уже сохранявшего снимки.
+
+        Процессы, не сохранявшие снимков (например, команды manage.py),
+        файлов не оставляют.
+        """
+        if self._flushed_at and self._file_pid == os.getpid():
+            self.flush(force=True)
+
+    def read_snapshots(self):
+        """Снимки других процессов из METRICS_DIR.
+
+        Снимки завершившихся процессов переносятся в архив. Возвращает
+        пары (снимок, работает ли процесс); архив возвращается как снимок
+        завершившегося процесса.
+        """
+        directory = settings.METRICS_DIR
+        if not directory or not os.path.isdir(directory):
+            return []
+        directory = Path(directory)
+        own_file = self.file_name()
+        snapshots = []
+        for path in directory.glob('*.json'):
+            if path.name in (own_file, ARCHIVE_FILE):
+                continue
+            try:
+                pid = int(path.stem.partition('-')[0])
+                modified = path.stat().st_mtime
+                snapshots.append(
+                    (path, pid, modified, json.loads(path.read_text())))
+            except (OSError, ValueError):
+                continue
+        latest = {}
+        for _, pid, modified, _ in snapshots:
+            latest[pid] = max(latest.get(pid, modified), modified)
+        alive = {
+            pid: pid != os.getpid() and process_alive(pid)
+            for pid in latest
+        }
+        live = []
+        dead = []
+        for path, pid, modified, snapshot in snapshots:
+            if alive[pid] and modified == latest[pid]:
+                live.append((snapshot, True))
+            else:
+                dead.append(path)
+        return live + [(archive_snapshots(directory, dead), False)]
+
+    def collect(self):
+        """Суммирует показатели всех процессов.
+
+        Индикаторы завершившихся процессов не учитываются.
+        """
+        return merge_snapshots(
+            [(self.snapshot(), True)] + self.read_snapshots())
+
+    def render(self):
+        """Показатели всех процессов в текстовом формате Prometheus."""
+        families = {}
+        for (name, labels), value in sorted(self.collect().items()):
+            families.setdefault(name, []).append((labels, value))
+        lines = []
+        for name, samples in families.items():
+            metric_type, description = METRICS.get(name, (GAUGE, ''))
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in samples:
+                if metric_type == HISTOGRAM:
+                    lines.extend(render_histogram(name, labels, value))
+                else:
+                    lines.append(
+                        f'{name}{render_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def render_labels(labels):
+    """Метки показателя в формате Prometheus."""
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def render_histogram(name, labels, value):
+    """Строки гистограммы в формате Prometheus."""
+    *buckets, total = value
+    cumulative = 0
+    lines = []
+    for bound, count in zip(DURATION_BUCKETS + ('+Inf',), buckets):
+        cumulative += count
+        bucket_labels = render_labels(labels + (('le', bound),))
+        lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+    lines.append(f'{name}_sum{render_labels(labels)} {total}')
+    lines.append(f'{name}_count{render_labels(labels)} {cumulative}')
+    return lines
+
+
+def write_json(path, data):
+    """Атомарно записывает data в файл path в формате JSON."""
+    temporary_path = path.with_suffix('.tmp')
+    temporary_path.write_text(json.dumps(data))
+    os.replace(temporary_path, path)
+
+
+def merge_snapshots(snapshots):
+    """Суммирует снимки из пар (снимок, работает ли процесс).
+
+    Индикаторы завершившихся процессов пропускаются.
+    """
+    merged = {}
+    for snapshot, alive in snapshots:
+        for name, labels, value in snapshot:
+            if not alive and is_gauge(name):
+                continue
+            key = name, tuple(sorted(labels.items()))
+            if isinstance(value, list):
+                current = merged.get(key, [0] * len(value))
+                merged[key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def archive_snapshots(directory, paths):
+    """Переносит снимки завершившихся процессов paths в архив.
+
+    Возвращает снимок архива. Архив изменяется под блокировкой файла,
+    поэтому параллельные сборы показателей не учитывают снимок дважды.
+    Имена перенесенных снимков сохраняются в архиве до следующего
+    переноса: если процесс прервется после записи архива, но до
+    удаления снимков, они будут удалены без повторного учета.
+    """
+    archive_path = directory / ARCHIVE_FILE
+    with open(directory / ARCHIVE_LOCK_FILE, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            archive = json.loads(archive_path.read_text())
+        except (OSError, ValueError):
+            archive = {'merged': [], 'samples': []}
+        for name in archive['merged']:
+            (directory / name).unlink(missing_ok=True)
+        snapshots = [(archive['samples'], False)]
+        merged_names = []
+        for path in paths:
+            if path.name in archive['merged']:
+                continue
+            try:
+                snapshots.append((json.loads(path.read_text()), False))
+            except (OSError, ValueError):
+                continue
+            merged_names.append(path.name)
+        if not merged_names:
+            return archive['samples']
+        samples = [
+            [name, dict(labels), value]
+            for (name, labels), value in merge_snapshots(snapshots).items()
+        ]
+        write_json(archive_path, {'merged': merged_names, 'samples': samples})
+        for name in merged_names:
+            (directory / name).unlink(missing_ok=True)
+    return samples
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush_at_exit)
@@ -0,0 +1,249 @@
+"""Middleware для приложения API.
+
+Middleware работают и в WSGI, и в ASGI: при асинхронной цепочке
+обработчиков запрос обрабатывается в цикле событий без перехода в
+отдельный поток, что необходимо асинхронным представлениям.
+"""
+
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from api.db_routing import pin_response, route_request
+from api.instrumentation import endpoint_name, profile_request
+from api.metrics import registry
+from api.profiling import (
+    arun_profiled,
+    ashould_profile,
+    run_profiled,
+    should_profile,
+)
+from api.query_budget import check_budget
+
+SERVER_TIMING_HEADER = 'HTTP_X_SERVER_TIMING'
+
+
+class HybridMiddleware:
+    """Базовый класс middleware, поддерживающего WSGI и ASGI.
+
+    Наследники реализуют process(request, profile, response) — обработку
+    ответа после его получения в показателях запроса profile.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with profile_request(request) as profile:
+            response = self.get_response(request)
+        return self.process(request, profile, response, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with profile_request(request) as profile:
+            response = await self.get_response(request)
+        return self.process(request, profile, response, started)
+
+    def process(self, request, profile, response, started):
+        """Обрабатывает ответ с учетом показателей запроса."""
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Собирает показатели обработки запросов по каждому эндпойнту."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process(self, request, profile, response, started):
+        """Сохраняет показатели запроса в реестр."""
+        duration = time.perf_counter() - started
+        endpoint = endpoint_name(request)
+        registry.inc(
+            'foodgram_http_requests_total',
+            endpoint=endpoint,
+            method=request.method,
+            status=response.status_code
+        )
+        registry.observe(
+            'foodgram_http_request_duration_seconds',
+            duration,
+            endpoint=endpoint
+        )
+        registry.inc(
+            'foodgram_db_queries_total', profile.queries, endpoint=endpoint)
+        registry.inc(
+            'foodgram_db_query_seconds_total',
+            profile.db_time,
+            endpoint=endpoint
+        )
+        registry.inc(
+            'foodgram_serialization_seconds_total',
+            profile.phases.get('serialization', 0.0),
+            endpoint=endpoint
+        )
+        if not response.streaming:
+            registry.inc(
+                'foodgram_http_response_bytes_total',
+                len(response.content),
+                endpoint=endpoint
+            )
+        registry.flush()
+        return response
+
+
+class ServerTimingMiddleware(HybridMiddleware):
+    """Добавляет заголовок Server-Timing к ответам API.
+
+    Заголовок добавляется, если включена настройка SERVER_TIMING или
+    запрос staff-пользователя содержит заголовок X-Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.is_async:
+            # Синхронные хуки Django вызывал бы через sync_to_async.
+            self.process_view = self.aprocess_view
+            self.process_template_response = (
+                self.aprocess_template_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        response = super().__call__(request)
+        if self.is_enabled(request):
+            self.add_header(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await super().__acall__(request)
+        if (SERVER_TIMING_HEADER in request.META
+                and not settings.SERVER_TIMING):
+            # Проверка staff-пользователя может обратиться к БД.
+            enabled = await sync_to_async(self.is_enabled)(request)
+        else:
+            enabled = self.is_enabled(request)
+        if enabled:
+            self.add_header(request, response)
+        return response
+
+    def process(self, request, profile, response, started):
+        """Запоминает показатели для заголовка."""
+        request._timing = (profile, started, time.perf_counter())
+        return response
+
+    def add_header(self, request, response):
+        """Добавляет заголовок Server-Timing к ответу."""
+        profile, started, finished = request._timing
+        view_started = getattr(request, '_timing_view_started', started)
+        view_finished = getattr(request, '_timing_view_finished', finished)
+        timings = (
+            ('db', profile.db_time, f'{profile.queries} queries'),
+            ('serialize', profile.phases.get('serialization', 0.0),
+             'get_serializer().data'),
+            ('render', finished - view_finished, 'renderer'),
+            ('view', view_finished - view_started, 'view'),
+            ('total', finished - started, 'total'),
+        )
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.2f};desc="{description}"'
+            for name, seconds, description in timings
+        )
+
+    def is_enabled(self, request):
+        """Проверяет, нужно ли добавить заголовок к ответу."""
+        if not endpoint_name(request).startswith('api:'):
+            return False
+        if settings.SERVER_TIMING:
+            return True
+        user = getattr(request, 'user', None)
+        return (SERVER_TIMING_HEADER in request.META
+                and user is not None and user.is_staff)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Запоминает время начала работы представления."""
+        request._timing_view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """Запоминает время окончания работы представления до рендеринга."""
+        request._timing_view_finished = time.perf_counter()
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args,
+                            view_kwargs):
+        """Асинхронный вариант process_view."""
+        request._timing_view_started = time.perf_counter()
+
+    async def aprocess_template_response(self, request, response):
+        """Асинхронный вариант process_template_response."""
+        request._timing_view_finished = time.perf_counter()
+        return response
+
+
+class QueryBudgetMiddleware(HybridMiddleware):
+    """Проверяет количество запросов к БД по бюджету эндпойнта."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGETS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process(self, request, profile, response, started):
+        """Сравнивает количество запросов с бюджетом эндпойнта."""
+        if settings.QUERY_BUDGET_MODE != 'off':
+            check_budget(endpoint_name(request), profile.queries)
+        return response
+
+
+class ProfilerMiddleware(HybridMiddleware):
+    """Профилирует запросы по требованию staff-пользователей и выборочно."""
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not should_profile(request):
+            return self.get_response(request)
+        return run_profiled(self.get_response, request)
+
+    async def __acall__(self, request):
+        if not await ashould_profile(request):
+            return await self.get_response(request)
+        return await arun_profiled(self.get_response, request)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Выбирает БД для чтения и закрепляет клиента после записи."""
+
+    def __init__(self, get_response):
+        if not settings.DB_REPLICAS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with route_request(request) as route:
+            response = self.get_response(request)
+        return pin_response(route, response)
+
+    async def __acall__(self, request):
+        with route_request(request) as route:
+            response = await self.get_response(request)
+        return pin_response(route, response)
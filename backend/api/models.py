@@ -0,0 +1,108 @@
+"""Описание моделей приложения api."""
+
+from django.db.models import (
+    CharField,
+    DateTimeField,
+    Index,
+    JSONField,
+    Model,
+    PositiveSmallIntegerField,
+    Q,
+    TextField,
+    UniqueConstraint,
+)
+from django.utils import timezone
+
+
+class Job(Model):
+    """Модель фоновых задач.
+
+    Очередь задач и ее обработка описаны в api/jobs.py. Выполненные
+    задачи удаляются, задачи с исчерпанными попытками остаются в таблице
+    со статусом failed и текстом последней ошибки.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = CharField(
+        'Функция',
+        max_length=200
+    )
+    payload = JSONField(
+        'Аргументы',
+        default=dict
+    )
+    key = CharField(
+        'Ключ дедупликации',
+        max_length=200,
+        null=True,
+        blank=True
+    )
+    status = CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=QUEUED
+    )
+    attempts = PositiveSmallIntegerField(
+        'Попыток',
+        default=0
+    )
+    run_at = DateTimeField(
+        'Выполнить после',
+        default=timezone.now
+    )
+    created = DateTimeField(
+        'Дата создания',
+        auto_now_add=True
+    )
+    started = DateTimeField(
+        'Начало выполнения',
+        null=True,
+        blank=True
+    )
+    worker = CharField(
+        'Воркер',
+        max_length=100,
+        blank=True
+    )
+    error = TextField(
+        'Последняя ошибка',
+        blank=True
+    )
+
+    class Meta:
+        """Общие параметры модели фоновых задач."""
+
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            Index(
+                fields=('run_at', 'id'),
+                condition=Q(status='queued'),
+                name='job_queued_run_at_idx'
+            ),
+            Index(
+                fields=('started',),
+                condition=Q(status='running'),
+                name='job_running_started_idx'
+            ),
+        )
+        constraints = (
+            UniqueConstraint(
+                fields=('key',),
+                condition=Q(status='queued'),
+                name='job_queued_key_unique'
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта Job."""
+        return f'{self.name} ({self.get_status_display()})'
@@ -1,6 +1,114 @@
 """Кастомная пагинация для приложения API."""
 
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+# Время жизни оценки количества строк таблицы в кэше процесса, секунд.
+TABLE_ESTIMATE_TTL = 60
+
+_table_estimates = {}
+_table_estimates_lock = threading.Lock()
+
+
+def table_estimate(connection, table):
+    """Оценка количества строк таблицы PostgreSQL по pg_class.reltuples.
+
+    Значение обновляют VACUUM и ANALYZE, поэтому оно кэшируется в
+    процессе на TABLE_ESTIMATE_TTL секунд. Для таблиц без статистики
+    возвращает None.
+    """
+    key = (connection.alias, table)
+    with _table_estimates_lock:
+        estimate, expires_at = _table_estimates.get(key, (None, 0))
+    if expires_at > time.monotonic():
+        return estimate
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(table)]
+        )
+        row = cursor.fetchone()
+    estimate = int(row[0]) if row is not None and row[0] >= 0 else None
+    with _table_estimates_lock:
+        _table_estimates[key] = (
+            estimate, time.monotonic() + TABLE_ESTIMATE_TTL)
+    return estimate
+
+
+def plan_estimate(queryset):
+    """Оценка количества строк запроса планировщиком PostgreSQL."""
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_count(queryset):
+    """Оценка количества объектов queryset или None, если нужен COUNT(*).
+
+    Оценка используется только в PostgreSQL и только если таблица и
+    результат запроса содержат не меньше PAGINATOR_ESTIMATE_THRESHOLD
+    строк: для запроса без условий берется оценка количества строк
+    таблицы, для запроса с условиями, DISTINCT или группировкой —
+    оценка планировщика по EXPLAIN.
+    Для меньших таблиц и результатов точный подсчет недорог.
+    """
+    if not isinstance(queryset, QuerySet):
+        return None
+    query = queryset.query
+    if query.combinator or query.low_mark or query.high_mark is not None:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    threshold = settings.PAGINATOR_ESTIMATE_THRESHOLD
+    estimate = table_estimate(connection, queryset.model._meta.db_table)
+    if estimate is None or estimate < threshold:
+        return None
+    if query.where or query.distinct or query.group_by is not None:
+        estimate = plan_estimate(queryset)
+    return estimate if estimate >= threshold else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, не считающий строки больших таблиц через COUNT(*).
+
+    Количество объектов берется из оценок PostgreSQL (estimate_count), а
+    для небольших результатов и для SQLite выполняется COUNT(*). Атрибут
+    approximate показывает, что количество оценено: последние страницы
+    по оценке могут оказаться пустыми или не охватить часть объектов.
+    """
+
+    approximate = False
+
+    @cached_property
+    def count(self):
+        """Количество объектов, точное или оцененное."""
+        estimate = estimate_count(self.object_list)
+        if estimate is None:
+            return super().count
+        self.approximate = True
+        return estimate
+
+    async def acount(self):
+        """Асинхронный вариант count."""
+        estimate = await sync_to_async(estimate_count)(self.object_list)
+        if estimate is None:
+            self.count = await self.object_list.acount()
+        else:
+            self.count = estimate
+            self.approximate = True
+        return self.count
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -8,3 +116,48 @@ class CustomPageNumberPagination(PageNumberPagination):
      размер страницы для каждого запроса."""
 
     page_size_query_param = 'limit'
+    django_paginator_class = EstimatedCountPaginator
+
+    @property
+    def max_page_size(self):
+        """Наибольший размер страницы; больший limit уменьшается до него."""
+        return settings.MAX_PAGE_SIZE
+
+    async def apaginate_queryset(self, queryset, request):
+        """Асинхронный вариант paginate_queryset.
+
+        Количество объектов и страница запрашиваются через асинхронный
+        ORM, ответ формируется методом get_paginated_response.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        await paginator.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)))
+        self.request = request
+        return [item async for item in self.page.object_list]
+
+    def get_paginated_response(self, data):
+        """Страница с признаком оценочного количества объектов."""
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_approximate', self.page.paginator.approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        """Схема страницы с признаком оценочного количества объектов."""
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_approximate'] = {
+            'type': 'boolean',
+            'example': False,
+        }
+        return response_schema
@@ -0,0 +1,44 @@
+"""Парсеры запросов для приложения API."""
+
+import json
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import MultiPartParser
+
+
+class StreamingMultiPartParser(MultiPartParser):
+    """Парсер multipart/form-data, сохраняющий файлы сразу на диск.
+
+    Стандартный обработчик загрузки держит в памяти файлы размером до
+    FILE_UPLOAD_MAX_MEMORY_SIZE, здесь же каждый файл записывается
+    частями во временный файл.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']._request
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().parse(stream, media_type, parser_context)
+
+
+def form_to_data(form, list_fields=()):
+    """Данные формы в виде словаря, как при разборе JSON.
+
+    Поля list_fields передаются строкой JSON со списком или повторением
+    поля: tags=1&tags=2 и tags=[1, 2] дают список [1, 2]. Для остальных
+    полей берется последнее значение.
+    """
+    data = {}
+    for name, values in form.lists():
+        if name not in list_fields:
+            data[name] = values[-1]
+            continue
+        items = []
+        for value in values:
+            try:
+                value = json.loads(value)
+            except (TypeError, ValueError):
+                raise ParseError(f'Поле {name}: ожидается JSON.')
+            items.extend(value if isinstance(value, list) else [value])
+        data[name] = items
+    return data
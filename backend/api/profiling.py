@@ -0,0 +1,179 @@
+"""Профилирование отдельных запросов с сохранением результатов.
+
+Запрос профилируется, если staff-пользователь передал заголовок
+X-Profile или параметр ?profile=1, а также для случайной выборки
+запросов с частотой 1 из PROFILER_SAMPLE_RATE. Если установлен
+pyinstrument, используется семплирующий профилировщик, иначе cProfile.
+Результаты и выполненные SQL-запросы сохраняются в PROFILER_DIR.
+"""
+
+import cProfile
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.instrumentation import profile_request
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_PARAM = 'profile'
+
+
+def is_staff_request(request):
+    """Проверяет, что запрос выполнен staff-пользователем."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    drf_request = Request(request, authenticators=[
+        authenticator()
+        for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        return drf_request.user.is_staff
+    except APIException:
+        return False
+
+
+def is_profile_requested(request):
+    """Проверяет, запрошено ли профилирование заголовком или параметром."""
+    return (PROFILE_HEADER in request.META
+            or PROFILE_QUERY_PARAM in request.GET)
+
+
+def is_sampled():
+    """Случайная выборка запросов для профилирования."""
+    sample_rate = settings.PROFILER_SAMPLE_RATE
+    return sample_rate > 0 and random.randrange(sample_rate) == 0
+
+
+def should_profile(request):
+    """Проверяет, нужно ли профилировать запрос."""
+    if is_profile_requested(request):
+        return is_staff_request(request)
+    return is_sampled()
+
+
+async def ashould_profile(request):
+    """Асинхронный вариант should_profile.
+
+    Аутентификация может обращаться к БД, поэтому выполняется в потоке
+    и только для запросов с заголовком или параметром профилирования.
+    """
+    if is_profile_requested(request):
+        return await sync_to_async(is_staff_request)(request)
+    return is_sampled()
+
+
+class ProfilingSession:
+    """Профилирование обработки запроса вместе с SQL-запросами.
+
+    Для асинхронных запросов pyinstrument учитывает только время
+    текущей задачи, а cProfile — всю работу потока цикла событий.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        if SamplingProfiler is not None:
+            self.profiler = SamplingProfiler()
+            self.start, self.stop = self.profiler.start, self.profiler.stop
+        else:
+            self.profiler = cProfile.Profile()
+            self.start = self.profiler.enable
+            self.stop = self.profiler.disable
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        self.profile = self.stack.enter_context(profile_request(self.request))
+        self.profile.recorded = []
+        self.started = time.perf_counter()
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        duration = time.perf_counter() - self.started
+        queries, self.profile.recorded = self.profile.recorded, None
+        self.stack.close()
+        if exc_type is None:
+            save_profile(
+                self.request, self.response, self.profiler, queries,
+                duration)
+        return False
+
+
+def run_profiled(get_response, request):
+    """Выполняет запрос под профилировщиком и сохраняет результат."""
+    with ProfilingSession(request) as session:
+        session.response = get_response(request)
+    return session.response
+
+
+async def arun_profiled(get_response, request):
+    """Асинхронный вариант run_profiled."""
+    with ProfilingSession(request) as session:
+        session.response = await get_response(request)
+    return session.response
+
+
+def save_profile(request, response, profiler, queries, duration):
+    """Сохраняет профиль, SQL-запросы и сведения о запросе."""
+    directory = Path(settings.PROFILER_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    if SamplingProfiler is not None:
+        profile_file = f'{name}.txt'
+        (directory / profile_file).write_text(
+            profiler.output_text(unicode=True))
+        engine = 'pyinstrument'
+    else:
+        profile_file = f'{name}.prof'
+        profiler.dump_stats(directory / profile_file)
+        engine = 'cprofile'
+    match = request.resolver_match
+    meta = {
+        'method': request.method,
+        'path': request.get_full_path(),
+        'endpoint': match.view_name if match else None,
+        'status': response.status_code,
+        'duration': duration,
+        'created': time.time(),
+        'engine': engine,
+        'profile': profile_file,
+        'queries': queries,
+    }
+    (directory / f'{name}.json').write_text(
+        json.dumps(meta, ensure_ascii=False))
+    prune_profiles(directory)
+
+
+def prune_profiles(directory):
+    """Удаляет самые старые профили сверх PROFILER_MAX_PROFILES."""
+    metas = sorted(directory.glob('*.json'), key=os.path.getmtime)
+    for meta in metas[:max(len(metas) - settings.PROFILER_MAX_PROFILES, 0)]:
+        for path in directory.glob(f'{meta.stem}.*'):
+            path.unlink(missing_ok=True)
+
+
+def load_profiles(directory):
+    """Загружает сведения о сохраненных профилях."""
+    profiles = []
+    for path in Path(directory).glob('*.json'):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return profiles
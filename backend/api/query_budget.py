@@ -0,0 +1,32 @@
+"""Бюджеты запросов к БД для эндпойнтов API.
+
+Бюджет задается в настройке QUERY_BUDGETS как максимальное количество
+запросов к БД для имени эндпойнта, например {'api:recipes-list': 6}.
+"""
+
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Эндпойнт выполнил больше запросов к БД, чем позволяет бюджет."""
+
+
+def get_budget(endpoint):
+    """Возвращает бюджет запросов эндпойнта или None."""
+    return settings.QUERY_BUDGETS.get(endpoint)
+
+
+def check_budget(endpoint, queries):
+    """Сообщает о превышении бюджета в соответствии с QUERY_BUDGET_MODE."""
+    budget = get_budget(endpoint)
+    if budget is None or queries <= budget:
+        return
+    message = (f'Эндпойнт {endpoint} выполнил {queries} запросов к БД '
+               f'при бюджете {budget}.')
+    if settings.QUERY_BUDGET_MODE == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
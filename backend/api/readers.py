@@ -0,0 +1,220 @@
+"""Облегченное чтение данных для списочных эндпойнтов API.
+
+Функции модуля собирают ответы из кортежей values()/values_list() без
+создания экземпляров моделей и полей сериализаторов. Результат совпадает
+с выводом соответствующих сериализаторов из api/serializers.py.
+
+Для рецептов и подписок запросы и сборка ответа разделены: функции
+*_queries возвращают словарь ленивых QuerySet, а функции assemble_*
+собирают ответ из уже полученных строк. Функции aread_* получают те же
+строки через асинхронный ORM для асинхронных представлений.
+"""
+
+from django.db.models import Count, Exists, F, OuterRef, Q, Value, Window
+from django.db.models.functions import RowNumber
+
+from recipes.images import variant_urls
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    ShoppingCart,
+)
+from users.models import CustomUser, Subscription
+
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+USER_FIELDS = ('email', 'id', 'username', 'first_name', 'last_name')
+
+image_storage = Recipe._meta.get_field('image').storage
+
+
+def image_url(name):
+    """Возвращает URL изображения рецепта по имени файла."""
+    if not name:
+        return None
+    return image_storage.url(name)
+
+
+def read_tags(queryset):
+    """Возвращает список тегов в формате TagSerializer."""
+    return list(queryset.values(*TAG_FIELDS))
+
+
+def read_ingredients(queryset):
+    """Возвращает список ингредиентов в формате IngredientSerializer."""
+    return list(queryset.values(*INGREDIENT_FIELDS))
+
+
+async def fetch_rows(queries):
+    """Асинхронно получает строки QuerySet из словаря *_queries."""
+    return {
+        name: [row async for row in queryset]
+        for name, queryset in queries.items()
+    }
+
+
+async def aread_tags(queryset):
+    """Асинхронный вариант read_tags."""
+    return [tag async for tag in queryset.values(*TAG_FIELDS)]
+
+
+async def aread_ingredients(queryset):
+    """Асинхронный вариант read_ingredients."""
+    return [
+        ingredient
+        async for ingredient in queryset.values(*INGREDIENT_FIELDS)
+    ]
+
+
+def recipe_queries(recipe_ids, user):
+    """Запросы, необходимые для отображения переданных рецептов."""
+    if user.is_authenticated:
+        flags = {
+            'is_subscribed': Exists(Subscription.objects.filter(
+                subscriber=user, author=OuterRef('author'))),
+            'is_favorited': Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            'is_in_shopping_cart': Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+        }
+    else:
+        flags = dict.fromkeys(
+            ('is_subscribed', 'is_favorited', 'is_in_shopping_cart'),
+            Value(False)
+        )
+    return {
+        'recipes': Recipe.objects.filter(id__in=recipe_ids).annotate(
+            **flags
+        ).values_list(
+            'id', 'name', 'image', 'image_variants', 'text', 'cooking_time',
+            'is_favorited', 'is_in_shopping_cart',
+            *(f'author__{field}' for field in USER_FIELDS),
+            'is_subscribed'
+        ),
+        'tags': RecipeTag.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('tag__name').values_list(
+            'recipe_id', *(f'tag__{field}' for field in TAG_FIELDS)
+        ),
+        'ingredients': RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('id').values_list(
+            'recipe_id',
+            *(f'ingredient__{field}' for field in INGREDIENT_FIELDS),
+            'amount'
+        ),
+    }
+
+
+def assemble_recipes(recipe_ids, rows):
+    """Собирает рецепты в формате RecipeReadSerializer."""
+    tags = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, *tag in rows['tags']:
+        tags[recipe_id].append(dict(zip(TAG_FIELDS, tag)))
+    ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, *ingredient in rows['ingredients']:
+        ingredients[recipe_id].append(
+            dict(zip(INGREDIENT_FIELDS + ('amount',), ingredient)))
+    recipes = {}
+    for (recipe_id, name, image, image_variants, text, cooking_time,
+         is_favorited, is_in_shopping_cart, *author) in rows['recipes']:
+        author = dict(zip(USER_FIELDS + ('is_subscribed',), author))
+        recipes[recipe_id] = {
+            'id': recipe_id,
+            'ingredients': ingredients[recipe_id],
+            'tags': tags[recipe_id],
+            'author': author,
+            'image': image_url(image),
+            'image_variants': variant_urls(image, image_variants),
+            'is_favorited': is_favorited,
+            'is_in_shopping_cart': is_in_shopping_cart,
+            'name': name,
+            'text': text,
+            'cooking_time': cooking_time,
+        }
+    return [recipes[recipe_id] for recipe_id in recipe_ids
+            if recipe_id in recipes]
+
+
+def read_recipes(recipe_ids, user):
+    """Возвращает рецепты в формате RecipeReadSerializer."""
+    recipe_ids = list(recipe_ids)
+    rows = {
+        name: list(queryset)
+        for name, queryset in recipe_queries(recipe_ids, user).items()
+    }
+    return assemble_recipes(recipe_ids, rows)
+
+
+async def aread_recipes(recipe_ids, user):
+    """Асинхронный вариант read_recipes."""
+    recipe_ids = list(recipe_ids)
+    rows = await fetch_rows(recipe_queries(recipe_ids, user))
+    return assemble_recipes(recipe_ids, rows)
+
+
+def subscription_queries(author_ids, recipes_limit=None):
+    """Запросы, необходимые для отображения подписок на авторов."""
+    recipes = Recipe.objects.filter(author_id__in=author_ids)
+    if recipes_limit:
+        recipes = recipes.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=F('pub_date').desc()
+            )
+        ).filter(row_number__lte=int(recipes_limit))
+    return {
+        'authors': CustomUser.objects.filter(id__in=author_ids).annotate(
+            recipes_count=Count(
+                'recipes', filter=Q(recipes__deleted__isnull=True))
+        ).values_list(*USER_FIELDS, 'recipes_count'),
+        'recipes': recipes.values_list(
+            'author_id', 'id', 'name', 'image', 'image_variants',
+            'cooking_time'),
+    }
+
+
+def assemble_subscriptions(author_ids, rows):
+    """Собирает подписки в формате SubscriptionSerializer."""
+    recipes = {author_id: [] for author_id in author_ids}
+    for (author_id, recipe_id, name, image, image_variants,
+         cooking_time) in rows['recipes']:
+        recipes[author_id].append({
+            'id': recipe_id,
+            'name': name,
+            'image': image_url(image),
+            'image_variants': variant_urls(image, image_variants),
+            'cooking_time': cooking_time,
+        })
+    authors = {}
+    for *author, recipes_count in rows['authors']:
+        author = dict(zip(USER_FIELDS, author))
+        author_id = author['id']
+        # Список содержит только авторов, на которых подписан пользователь.
+        author['is_subscribed'] = True
+        author['recipes'] = recipes[author_id]
+        author['recipes_count'] = recipes_count
+        authors[author_id] = author
+    return [authors[author_id] for author_id in author_ids
+            if author_id in authors]
+
+
+def read_subscriptions(author_ids, recipes_limit=None):
+    """Возвращает подписки в формате SubscriptionSerializer."""
+    author_ids = list(author_ids)
+    rows = {
+        name: list(queryset)
+        for name, queryset in subscription_queries(
+            author_ids, recipes_limit).items()
+    }
+    return assemble_subscriptions(author_ids, rows)
+
+
+async def aread_subscriptions(author_ids, recipes_limit=None):
+    """Асинхронный вариант read_subscriptions."""
+    author_ids = list(author_ids)
+    rows = await fetch_rows(subscription_queries(author_ids, recipes_limit))
+    return assemble_subscriptions(author_ids, rows)
@@ -1,18 +1,23 @@
 """Сериализаторы для приложения API."""
 
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.serializers import (
     IntegerField,
     ModelSerializer,
+    ReadOnlyField,
     SerializerMethodField,
     SlugRelatedField,
     URLField,
 )
 from rest_framework.validators import ValidationError
 
+from api.fields import RecipeImageField
+from api.jobs import enqueue
+from api.parsers import form_to_data
+from recipes.images import image_storage, variant_urls
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -21,9 +26,35 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.similarity import refresh_signature
+from recipes.tag_masks import tag_mask
 from users.models import CustomUser, Subscription
 
 
+class ImageVariantsField(ReadOnlyField):
+    """Ссылки на уменьшенные копии фото рецепта по форматам и ширине.
+
+    Поле получает рецепт целиком, чтобы не отдавать копии прежнего
+    изображения. При absolute_urls=True ссылки, как и в ImageField,
+    строятся абсолютными, если в контексте сериализатора есть запрос.
+    """
+
+    def __init__(self, absolute_urls=False, **kwargs):
+        self.absolute_urls = absolute_urls
+        kwargs.setdefault('source', '*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        if not self.absolute_urls or request is None:
+            return variant_urls(value.image.name, value.image_variants)
+        return variant_urls(
+            value.image.name,
+            value.image_variants,
+            lambda name: request.build_absolute_uri(image_storage.url(name))
+        )
+
+
 class CustomUserSerializer(UserSerializer):
     """Сериализатор для отображения пользователей."""
 
@@ -49,6 +80,8 @@ class CustomUserSerializer(UserSerializer):
         user = request.user
         if request is None or user.is_anonymous:
             return False
+        if hasattr(object, 'is_subscribed'):
+            return object.is_subscribed
         return object.author.filter(subscriber=user).exists()
 
 
@@ -222,13 +255,14 @@ class RecipeReadSerializer(ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = CustomUserSerializer(read_only=True)
     image = URLField(source='image.url', read_only=True)
+    image_variants = ImageVariantsField()
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
 
     class Meta:
         """Поля сериализатора рецептов для режима чтения."""
 
-        exclude = ('pub_date',)
+        exclude = ('pub_date', 'tag_mask', 'deleted')
         model = Recipe
 
     def recipe_in(self, obj, model):
@@ -254,15 +288,26 @@ class RecipeWriteSerializer(RecipeReadSerializer):
     ingredients = RecipeIngredientWriteSerializer(
         source='recipeingredient_set', many=True)
     tags = PrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
-    image = Base64ImageField(max_length=None,)
+    image = RecipeImageField(max_length=None,)
     author = None
 
     class Meta:
         """Поля сериализатора рецептов для режима записи."""
 
-        exclude = ('pub_date', 'author')
+        exclude = ('pub_date', 'author', 'tag_mask', 'deleted')
         model = Recipe
 
+    def __init__(self, *args, **kwargs):
+        """Принимает данные рецепта в JSON и в multipart/form-data.
+
+        В форме ингредиенты передаются строкой JSON, теги — строкой JSON
+        или повторением поля tags.
+        """
+        data = kwargs.get('data')
+        if hasattr(data, 'getlist'):
+            kwargs['data'] = form_to_data(data, ('ingredients', 'tags'))
+        super().__init__(*args, **kwargs)
+
     def validate(self, attrs):
         """Валидация данных рецепта."""
         tags = self.initial_data['tags']
@@ -299,14 +344,27 @@ class RecipeWriteSerializer(RecipeReadSerializer):
             )
         return attrs
 
+    def save(self, **kwargs):
+        """Сохраняет рецепт и закрывает временный файл изображения.
+
+        Хранилище перемещает временный файл, поэтому он закрывается явно,
+        а не при сборке мусора.
+        """
+        try:
+            return super().save(**kwargs)
+        finally:
+            image = self.validated_data.get('image')
+            if image is not None:
+                image.close()
+
     def _add_tags(self, recipe, tags):
-        """Добавляет список тегов в рецепт."""
-        for tag in tags:
-            recipe.tags.add(tag)
-            recipe.save()
+        """Добавляет список тегов в рецепт и обновляет маску тегов."""
+        recipe.tags.add(*tags)
+        recipe.tag_mask = tag_mask(tag.id for tag in tags)
+        recipe.save(update_fields=('tag_mask',))
 
     def _add_ingredients(self, recipe, ingredients):
-        """Добавляет список ингредиентов в рецепт."""
+        """Добавляет ингредиенты в рецепт и планирует пересчет сигнатуры."""
         data = []
         for ingredient in ingredients:
             data.append(RecipeIngredient(
@@ -315,9 +373,19 @@ class RecipeWriteSerializer(RecipeReadSerializer):
                 amount=ingredient['amount']
             ))
         RecipeIngredient.objects.bulk_create(data)
+        enqueue(
+            refresh_signature,
+            key=f'recipe-signature:{recipe.id}',
+            recipe_id=recipe.id
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
-        """Создание нового рецепта."""
+        """Создание нового рецепта.
+
+        Копии фото начинают создаваться после фиксации транзакции, когда
+        рецепт больше не сохраняется.
+        """
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('recipeingredient_set')
         recipe = Recipe.objects.create(**validated_data)
@@ -325,6 +393,7 @@ class RecipeWriteSerializer(RecipeReadSerializer):
         self._add_ingredients(recipe, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Редактирование объекта."""
         instance.image = validated_data.get('image', instance.image)
@@ -353,6 +422,8 @@ class RecipeWriteSerializer(RecipeReadSerializer):
 class ShortRecipeSerializer(ModelSerializer):
     """Сериализатор для отображения рецептов в сокращенном виде."""
 
+    image_variants = ImageVariantsField(absolute_urls=True)
+
     class Meta:
         """Поля сериализации отображения рецептов в сокращенном виде."""
 
@@ -360,6 +431,7 @@ class ShortRecipeSerializer(ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
         read_only_fields = (
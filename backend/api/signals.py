@@ -0,0 +1,51 @@
+"""Обработчики сигналов приложения API."""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_token, invalidate_user_tokens
+from recipes.images import schedule_variants
+from recipes.models import Favorite, Recipe, RecipeTrend, ShoppingCart, Tag
+from recipes.tag_masks import clear_tag_bit
+from recipes.trending import EVENT_WEIGHTS, add_event
+
+
+@receiver((post_save, post_delete), sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Удаляет из кэша измененный или удаленный токен."""
+    invalidate_token(instance.key)
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Удаляет из кэша токены измененного или удаленного пользователя."""
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def build_image_variants(sender, instance, **kwargs):
+    """Планирует создание уменьшенных копий нового фото рецепта."""
+    schedule_variants(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_trend(sender, instance, created, **kwargs):
+    """Создает строку популярности нового рецепта."""
+    if created:
+        RecipeTrend.objects.create(recipe=instance)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def add_trending_event(sender, instance, created, **kwargs):
+    """Учитывает добавление рецепта в популярности рецепта."""
+    if created:
+        add_event(instance.recipe_id, EVENT_WEIGHTS[sender], instance.created)
+
+
+@receiver(post_delete, sender=Tag)
+def clear_deleted_tag_bit(sender, instance, **kwargs):
+    """Снимает бит удаленного тега с масок тегов рецептов."""
+    clear_tag_bit(instance.id)
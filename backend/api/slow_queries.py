@@ -0,0 +1,145 @@
+"""Журнал медленных SQL-запросов.
+
+Обертка устанавливается на каждое соединение с БД при его создании и
+записывает в журнал запросы дольше SLOW_QUERY_THRESHOLD_MS вместе с
+эндпойнтом и URL запроса, который их вызвал. На PostgreSQL для доли
+SLOW_QUERY_EXPLAIN_RATE медленных запросов дополнительно сохраняется
+план выполнения, не чаще одного раза на нормализованный отпечаток
+запроса.
+
+EXPLAIN ANALYZE выполняет запрос повторно, поэтому план с фактическим
+временем (EXPLAIN (ANALYZE, BUFFERS)) получают только SELECT без
+блокировки строк (FOR UPDATE, FOR SHARE) и без вызовов функций, кроме
+функций из SAFE_CALLS: функция может изменять данные или, как
+pg_prewarm, заново читать целые таблицы. Для остальных запросов
+сохраняется план EXPLAIN без выполнения.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from api.instrumentation import current_profile, endpoint_name
+
+logger = logging.getLogger(__name__)
+
+MAX_EXPLAINED_FINGERPRINTS = 1000
+
+NORMALIZE_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+# Запросы, для которых PostgreSQL строит план.
+EXPLAINABLE_STATEMENTS = ('select', 'insert', 'update', 'delete', 'with')
+LOCKING_CLAUSE = re.compile(
+    r'\bfor (?:no key )?(?:update|share|key share)\b')
+CALL = re.compile(r'\b([a-z_][a-z0-9_]*)\s*\(')
+# Функции без побочных эффектов, которые формирует ORM, и ключевые слова
+# SQL, после которых стоит скобка.
+SAFE_CALLS = frozenset((
+    'abs', 'array_agg', 'avg', 'cast', 'coalesce', 'count', 'exp',
+    'greatest', 'least', 'ln', 'lower', 'max', 'min', 'nullif',
+    'string_agg', 'sum', 'upper',
+    'all', 'and', 'any', 'array', 'as', 'by', 'exists', 'filter', 'from',
+    'in', 'join', 'lateral', 'not', 'on', 'or', 'over', 'select', 'then',
+    'using', 'when', 'where',
+))
+
+_state = threading.local()
+_explained = set()
+_explained_lock = threading.Lock()
+
+
+def fingerprint(sql):
+    """Нормализует запрос и возвращает его отпечаток."""
+    normalized = sql
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        normalized = pattern.sub(replacement, normalized)
+    normalized = normalized.strip().lower()
+    return hashlib.md5(normalized.encode()).hexdigest()[:12], normalized
+
+
+def claim_explain(query_fingerprint):
+    """Проверяет, что план запроса с этим отпечатком еще не сохранялся."""
+    with _explained_lock:
+        if query_fingerprint in _explained:
+            return False
+        if len(_explained) >= MAX_EXPLAINED_FINGERPRINTS:
+            _explained.clear()
+        _explained.add(query_fingerprint)
+        return True
+
+
+def can_analyze(normalized):
+    """Можно ли выполнить нормализованный запрос повторно для ANALYZE."""
+    return (
+        normalized.startswith('select')
+        and not LOCKING_CLAUSE.search(normalized)
+        and all(name in SAFE_CALLS for name in CALL.findall(normalized))
+    )
+
+
+def explain(connection, sql, params, analyze):
+    """Возвращает план выполнения запроса.
+
+    При analyze=True запрос выполняется: EXPLAIN (ANALYZE, BUFFERS).
+    """
+    command = 'EXPLAIN (ANALYZE, BUFFERS)' if analyze else 'EXPLAIN'
+    _state.explaining = True
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{command} {sql}', params)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+    except DatabaseError as error:
+        return f'EXPLAIN не выполнен: {error}'
+    finally:
+        _state.explaining = False
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Обертка connection.execute_wrapper для медленных запросов."""
+    if getattr(_state, 'explaining', False):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - started) * 1000
+    if duration < settings.SLOW_QUERY_THRESHOLD_MS:
+        return result
+    connection = context['connection']
+    query_fingerprint, normalized = fingerprint(sql)
+    profile = current_profile()
+    request = profile.request if profile is not None else None
+    endpoint = endpoint_name(request)
+    path = request.get_full_path() if request is not None else '-'
+    logger.warning(
+        'Медленный запрос %.1f мс [%s] %s %s: %s',
+        duration, query_fingerprint, endpoint, path, normalized
+    )
+    if (connection.vendor == 'postgresql'
+            and not many
+            and normalized.startswith(EXPLAINABLE_STATEMENTS)
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+            and claim_explain(query_fingerprint)):
+        logger.warning(
+            'План запроса [%s] %s:\n%s',
+            query_fingerprint, endpoint,
+            explain(connection, sql, params, can_analyze(normalized))
+        )
+    return result
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    """Подключает журнал медленных запросов к соединению с БД."""
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
@@ -0,0 +1,206 @@
+"""Ограничение частоты и количества одновременных дорогих запросов.
+
+Действиям вьюсета назначаются области (scope) в атрибуте
+throttle_scopes. Для каждой области действуют:
+
+- ограничения частоты из REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] с
+  ключами '<область>.user' (на пользователя, для анонимных — на IP) и
+  '<область>.ip' (на IP). Ограничение 'N/период' — ведро из N жетонов,
+  которое пополняется на N жетонов за период: клиент может сделать до N
+  запросов подряд, а дальше — не чаще N за период. Состояние ведер
+  хранится в кэше Django, поэтому общие для всех воркеров ограничения
+  требуют общего кэша (CACHE_BACKEND). Между чтением и записью ведра
+  параллельный запрос того же клиента может пройти сверх ограничения;
+- ограничение CONCURRENCY_LIMITS[область] количества одновременно
+  обрабатываемых запросов области в процессе воркера. Сверх него запрос
+  сразу отклоняется с кодом 503, а не ждет освобождения потока.
+
+Превышение ограничения частоты возвращает 429, оба ответа содержат
+заголовок Retry-After.
+"""
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from api.metrics import COUNTER, register, registry
+
+register(
+    'foodgram_throttled_requests_total', COUNTER,
+    'Количество запросов, отклоненных ограничением частоты.')
+register(
+    'foodgram_shed_requests_total', COUNTER,
+    'Количество запросов, отклоненных ограничением одновременных '
+    'запросов.')
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class Overloaded(APIException):
+    """Слишком много одновременных запросов в воркере."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен, повторите запрос позже.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+def parse_rate(rate):
+    """Емкость ведра и скорость пополнения в жетонах в секунду."""
+    tokens, period = rate.split('/')
+    tokens = int(tokens)
+    return tokens, tokens / PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение частоты запросов области по алгоритму ведра жетонов."""
+
+    kind = None
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.rate = api_settings.DEFAULT_THROTTLE_RATES.get(
+            f'{scope}.{self.kind}')
+        self.delay = 0
+
+    def get_cache_key(self, request):
+        """Ключ ведра клиента."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        """Берет жетон из ведра клиента, если он есть."""
+        if self.rate is None:
+            return True
+        capacity, refill = parse_rate(self.rate)
+        key = self.get_cache_key(request)
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            self.delay = (1 - tokens) / refill
+            registry.inc(
+                'foodgram_throttled_requests_total',
+                scope=self.scope,
+                kind=self.kind
+            )
+            return False
+        cache.set(key, (tokens - 1, now), math.ceil(capacity / refill))
+        return True
+
+    def wait(self):
+        """Время до появления жетона в секундах."""
+        return self.delay
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Ведро жетонов пользователя, для анонимных запросов — IP."""
+
+    kind = 'user'
+
+    def get_cache_key(self, request):
+        if request.user and request.user.is_authenticated:
+            ident = f'user-{request.user.pk}'
+        else:
+            ident = f'ip-{self.get_ident(request)}'
+        return f'throttle:{self.scope}.{self.kind}:{ident}'
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Ведро жетонов IP-адреса клиента."""
+
+    kind = 'ip'
+
+    def get_cache_key(self, request):
+        return f'throttle:{self.scope}.{self.kind}:{self.get_ident(request)}'
+
+
+class ConcurrencyLimiter:
+    """Счетчики одновременно обрабатываемых запросов по областям."""
+
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scope):
+        """Занимает место для запроса области, если оно есть."""
+        limit = settings.CONCURRENCY_LIMITS.get(scope)
+        with self._lock:
+            in_flight = self._in_flight.get(scope, 0)
+            if limit and in_flight >= limit:
+                return False
+            self._in_flight[scope] = in_flight + 1
+            return True
+
+    def release(self, scope):
+        """Освобождает место запроса области."""
+        with self._lock:
+            self._in_flight[scope] -= 1
+
+
+limiter = ConcurrencyLimiter()
+
+
+def scope_throttles(scope):
+    """Ограничения частоты запросов области."""
+    if scope is None or not settings.THROTTLE_ENABLED:
+        return []
+    return [UserTokenBucketThrottle(scope), IPTokenBucketThrottle(scope)]
+
+
+def enter_scope(scope):
+    """Занимает место для запроса области или отклоняет запрос.
+
+    Возвращает область, место которой нужно освободить, или None.
+    """
+    if scope is None or not settings.THROTTLE_ENABLED:
+        return None
+    if not limiter.acquire(scope):
+        registry.inc('foodgram_shed_requests_total', scope=scope)
+        raise Overloaded(settings.CONCURRENCY_RETRY_AFTER)
+    return scope
+
+
+def view_scope(view, method):
+    """Область действия вьюсета для метода запроса."""
+    actions = getattr(view, 'action_map', None) or {}
+    return view.throttle_scopes.get(actions.get(method.lower()))
+
+
+class ScopedThrottleMixin:
+    """Примесь к вьюсету с ограничениями по областям действий.
+
+    throttle_scopes — словарь {действие: область}.
+    """
+
+    throttle_scopes = {}
+    _entered_scope = None
+
+    def get_throttles(self):
+        """Ограничения частоты по умолчанию и области действия."""
+        return [
+            *super().get_throttles(),
+            *scope_throttles(view_scope(self, self.request.method)),
+        ]
+
+    def initial(self, request, *args, **kwargs):
+        """После проверки частоты занимает место для запроса области."""
+        super().initial(request, *args, **kwargs)
+        self._entered_scope = enter_scope(view_scope(self, request.method))
+
+    def dispatch(self, request, *args, **kwargs):
+        """Освобождает место запроса области после ответа."""
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._entered_scope is not None:
+                limiter.release(self._entered_scope)
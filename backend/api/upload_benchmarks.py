@@ -0,0 +1,112 @@
+"""Память и время загрузки фото рецепта в base64 и в multipart/form-data.
+
+Тела запросов собираются до начала измерений, поэтому пиковый объем
+памяти (по tracemalloc) включает только обработку запроса: разбор тела,
+декодирование и проверку изображения и сохранение рецепта. Запросы
+выполняются в транзакции, которая откатывается, а файлы сохраняются во
+временный каталог, поэтому данные в БД не меняются. Память буферов
+Pillow tracemalloc не учитывает; при проверке изображения пиксели не
+декодируются.
+"""
+
+import base64
+import io
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.db import transaction
+from django.test.client import ClientHandler, encode_multipart
+from django.test.utils import override_settings
+from PIL import Image
+
+from api.async_benchmarks import wsgi_environ
+from api.benchmarks import recipe_payload
+
+BOUNDARY = 'FoodgramUploadBoundary'
+# Примерный размер JPEG из шума при качестве 90, байт на пиксель.
+NOISE_JPEG_BYTES_PER_PIXEL = 0.9
+
+
+def noise_jpeg(size_mb):
+    """Фото в JPEG примерно заданного размера, плохо поддающееся сжатию."""
+    pixels = size_mb * 1024 * 1024 / NOISE_JPEG_BYTES_PER_PIXEL
+    width = int(math.sqrt(pixels * 4 / 3))
+    height = width * 3 // 4
+    image = Image.frombytes('RGB', (width, height),
+                            os.urandom(width * height * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def upload_bodies(photo):
+    """Тела запросов на создание рецепта: {способ: (тип, тело)}."""
+    payload = recipe_payload()
+    payload.pop('image')
+    encoded = base64.b64encode(photo).decode()
+    form_file = io.BytesIO(photo)
+    form_file.name = 'photo.jpg'
+    form = {
+        **payload,
+        'ingredients': json.dumps(payload['ingredients']),
+        'image': form_file,
+    }
+    return {
+        'base64': (
+            'application/json',
+            json.dumps({
+                **payload, 'image': f'data:image/jpeg;base64,{encoded}'
+            }).encode()
+        ),
+        'multipart': (
+            f'multipart/form-data; boundary={BOUNDARY}',
+            encode_multipart(BOUNDARY, form)
+        ),
+    }
+
+
+def measure_upload(handler, content_type, body, headers):
+    """Код ответа, время и пиковый объем памяти одной загрузки."""
+    environ = wsgi_environ(
+        'POST', '/api/recipes/', headers, body, content_type)
+    with transaction.atomic():
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = handler(environ)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        transaction.set_rollback(True)
+    return response.status_code, elapsed, peak
+
+
+def compare_uploads(headers, size_mb=10, iterations=3):
+    """Сравнивает загрузку фото в base64 и в multipart/form-data."""
+    photo = noise_jpeg(size_mb)
+    handler = ClientHandler(enforce_csrf_checks=False)
+    results = {
+        'photo_kb': round(len(photo) / 1024, 1),
+        'modes': {},
+    }
+    with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root, QUERY_BUDGET_MODE='off',
+            THROTTLE_ENABLED=False):
+        for mode, (content_type, body) in upload_bodies(photo).items():
+            runs = [
+                measure_upload(handler, content_type, body, headers)
+                for _ in range(iterations)
+            ]
+            results['modes'][mode] = {
+                'statuses': sorted({status for status, _, _ in runs}),
+                'body_kb': round(len(body) / 1024, 1),
+                'peak_kb': round(
+                    statistics.median(peak for _, _, peak in runs) / 1024, 1),
+                'ms': round(statistics.median(
+                    elapsed for _, elapsed, _ in runs) * 1000, 1),
+            }
+    return results
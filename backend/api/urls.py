@@ -1,11 +1,16 @@
 """Эндпойнты для приложения API."""
 
-from django.urls import include, path
+from django.conf import settings
+from django.urls import include, path, re_path
 from rest_framework import routers
 
+from api.async_views import ASYNC_READ_ROUTES, async_read_view
 from api.views import (
+    CustomTokenCreateView,
+    CustomTokenDestroyView,
     CustomUserSubscriptionViewSet,
     IngredientViewSet,
+    MetricsView,
     RecipeFavoriteShoppingCartViewSet,
     TagViewSet,
 )
@@ -24,6 +29,27 @@ router_version_1.register(
     'recipes', RecipeFavoriteShoppingCartViewSet, basename='recipes')
 
 urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router_version_1.urls)),
-    path('auth/', include("djoser.urls.authtoken")),
+    re_path(
+        r'^auth/token/login/?$',
+        CustomTokenCreateView.as_view(),
+        name='login'
+    ),
+    re_path(
+        r'^auth/token/logout/?$',
+        CustomTokenDestroyView.as_view(),
+        name='logout'
+    ),
 ]
+
+sync_views = {
+    pattern.name: pattern.callback for pattern in router_version_1.urls
+}
+async_urlpatterns = [
+    path(route, async_read_view(handler, sync_views[name]), name=name)
+    for route, handler, name in ASYNC_READ_ROUTES
+]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
@@ -1,18 +1,36 @@
 """Представления для приложения API."""
 
-from django.db.models import Sum
+from django.db.models import Exists, OuterRef, Prefetch, Sum
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from djoser.views import UserViewSet
+from djoser.views import TokenCreateView, TokenDestroyView, UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from api.facets import facet_counts, parse_facets
 from api.filters import IngredientFilter, RecipeFilter
+from api.instrumentation import InstrumentedViewMixin, measure
+from api.metrics import registry
+from api.parsers import StreamingMultiPartParser
 from api.permissions import IsAuthorOrAdmin
+from api.readers import (
+    read_ingredients,
+    read_recipes,
+    read_subscriptions,
+    read_tags,
+)
 from api.serializers import (
     CustomUserSerializer,
     FavoriteSerializer,
@@ -25,6 +43,8 @@ from api.serializers import (
     SubscriptionSerializer,
     TagSerializer,
 )
+from api.throttling import ScopedThrottleMixin
+from recipes.deletion import delete_recipe, delete_user
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -33,15 +53,38 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.similarity import similar_recipes
 from users.models import CustomUser, Subscription
 
+SIMILAR_RECIPES_LIMIT = 6
+SIMILAR_RECIPES_MAX_LIMIT = 50
 
-class CustomUserSubscriptionViewSet(UserViewSet):
+
+class CustomUserSubscriptionViewSet(
+        ScopedThrottleMixin, InstrumentedViewMixin, UserViewSet):
     """Вьюсет для моделей CustomUser и Subscription."""
 
-    queryset = CustomUser.objects.all()
+    queryset = CustomUser.objects.filter(deleted__isnull=True)
     serializer_class = CustomUserSerializer
     filter_backends = (DjangoFilterBackend,)
+    throttle_scopes = {
+        'get_subscriptions': 'subscriptions',
+    }
+
+    def get_queryset(self):
+        """Добавляет к пользователям признак подписки текущего
+         пользователя."""
+        queryset = super().get_queryset()
+        if self.request.user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Subscription.objects.filter(
+                    subscriber=self.request.user, author=OuterRef('pk'))
+            ))
+        return queryset
+
+    def perform_destroy(self, instance):
+        """Отмечает пользователя удаленным, удаление выполняется в фоне."""
+        delete_user(instance)
 
     @action(
         methods=['get'],
@@ -69,7 +112,8 @@ class CustomUserSubscriptionViewSet(UserViewSet):
         """Позволяет текущему пользователю подписаться на
          выбранного автора и отписаться от него."""
         subscriber = request.user
-        author = get_object_or_404(CustomUser, id=id)
+        author = get_object_or_404(
+            CustomUser, id=id, deleted__isnull=True)
         if request.method == 'POST':
             data = {'subscriber': subscriber.id, 'author': author.id}
             serializer = SubscribeSerializer(
@@ -98,15 +142,17 @@ class CustomUserSubscriptionViewSet(UserViewSet):
     def get_subscriptions(self, request):
         """Возвращает рецепты авторов, на которых подписан текущий
          пользователь."""
-        authors = CustomUser.objects.filter(author__subscriber=request.user)
+        authors = CustomUser.objects.filter(
+            author__subscriber=request.user, deleted__isnull=True
+        ).values_list('id', flat=True)
+        recipes_limit = request.query_params.get('recipes_limit')
         pages = self.paginate_queryset(authors)
-        serializer = SubscriptionSerializer(
-            pages, many=True, context={'request': request}
-        )
-        return self.get_paginated_response(serializer.data)
+        with measure('serialization'):
+            data = read_subscriptions(pages, recipes_limit)
+        return self.get_paginated_response(data)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(InstrumentedViewMixin, ReadOnlyModelViewSet):
     """Вьюсет для модели Tag."""
 
     queryset = Tag.objects.all()
@@ -114,8 +160,15 @@ class TagViewSet(ReadOnlyModelViewSet):
     permission_classes = (AllowAny,)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """Возвращает список тегов без создания экземпляров моделей."""
+        queryset = self.filter_queryset(self.get_queryset())
+        with measure('serialization'):
+            data = read_tags(queryset)
+        return Response(data)
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+
+class IngredientViewSet(InstrumentedViewMixin, ReadOnlyModelViewSet):
     """Вьюсет для модели Ingredient."""
 
     queryset = Ingredient.objects.all()
@@ -125,14 +178,45 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        """Возвращает список ингредиентов без создания экземпляров
+         моделей."""
+        queryset = self.filter_queryset(self.get_queryset())
+        with measure('serialization'):
+            data = read_ingredients(queryset)
+        return Response(data)
+
 
-class RecipeFavoriteShoppingCartViewSet(ModelViewSet):
+class RecipeFavoriteShoppingCartViewSet(
+        ScopedThrottleMixin, InstrumentedViewMixin, ModelViewSet):
     """Вьюсет для моделей Recipe, Favorite и ShoppingCart."""
 
     queryset = Recipe.objects.all()
     serializer_class = RecipeWriteSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    parser_classes = (JSONParser, StreamingMultiPartParser)
+    throttle_scopes = {
+        'list': 'recipes_list',
+        'create': 'recipes_write',
+        'update': 'recipes_write',
+        'partial_update': 'recipes_write',
+        'download_shopping_cart': 'shopping_cart',
+    }
+
+    def get_queryset(self):
+        """Загружает связанные объекты для отображения рецепта."""
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.select_related('author').prefetch_related(
+                'tags',
+                Prefetch(
+                    'recipeingredient_set',
+                    queryset=RecipeIngredient.objects.select_related(
+                        'ingredient')
+                )
+            )
+        return queryset
 
     def get_serializer_class(self):
         """Выбор сериализатора данных в зависимости от метода запроса."""
@@ -148,6 +232,26 @@ class RecipeFavoriteShoppingCartViewSet(ModelViewSet):
             return (IsAuthenticated(),)
         return (IsAuthorOrAdmin(),)
 
+    def list(self, request, *args, **kwargs):
+        """Возвращает список рецептов без создания экземпляров моделей.
+
+        С параметром facets к странице добавляются счетчики фасетов.
+        """
+        facets = parse_facets(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        recipe_ids = queryset.values_list('id', flat=True)
+        page = self.paginate_queryset(recipe_ids)
+        with measure('serialization'):
+            data = read_recipes(
+                recipe_ids if page is None else page, request.user)
+        if page is None:
+            return Response(data)
+        response = self.get_paginated_response(data)
+        if facets:
+            with measure('facets'):
+                response.data['facets'] = facet_counts(request, facets)
+        return response
+
     def perform_create(self, serializer):
         """Назначение автором текущего пользователя при создании объекта."""
         serializer.save(author=self.request.user)
@@ -156,6 +260,10 @@ class RecipeFavoriteShoppingCartViewSet(ModelViewSet):
         """Назначение автором текущего пользователя при обновлении объекта."""
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Отмечает рецепт удаленным, удаление выполняется в фоне."""
+        delete_recipe(instance)
+
     def recipe__add_in__delete_out(self, request, pk, serializer_name, model):
         """Позволяет текущему пользователю добавить рецепт в список объектов
          передаваемой модели и удалить из него."""
@@ -205,6 +313,32 @@ class RecipeFavoriteShoppingCartViewSet(ModelViewSet):
         return self.recipe__add_in__delete_out(
             request, pk, ShoppingCartSerializer, ShoppingCart)
 
+    @action(
+        methods=['get'],
+        detail=True,
+        url_path='similar',
+        url_name='similar'
+    )
+    def similar(self, request, pk):
+        """Возвращает рецепты с наиболее похожим набором ингредиентов."""
+        recipe = get_object_or_404(Recipe, pk=pk)
+        try:
+            limit = int(request.query_params.get(
+                'limit', SIMILAR_RECIPES_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        limit = min(max(limit, 1), SIMILAR_RECIPES_MAX_LIMIT)
+        scored = similar_recipes(recipe.id, limit) or []
+        recipes = Recipe.objects.in_bulk(
+            [recipe_id for _, recipe_id in scored])
+        serializer = ShortRecipeSerializer(
+            [recipes[recipe_id] for _, recipe_id in scored
+             if recipe_id in recipes],
+            many=True,
+            context={'request': request}
+        )
+        return Response(serializer.data)
+
     @action(
         methods=['get'],
         detail=False,
@@ -215,7 +349,8 @@ class RecipeFavoriteShoppingCartViewSet(ModelViewSet):
     def download_shopping_cart(self, request):
         """Позволяет текущему пользователю скачать файл списка покупок."""
         recipes_in_shopping_cart = RecipeIngredient.objects.filter(
-            recipe__recipes_shoppingcart_related__user=request.user)
+            recipe__recipes_shoppingcart_related__user=request.user,
+            recipe__deleted__isnull=True)
         ingredients = (recipes_in_shopping_cart
                        .values('ingredient__name',
                                'ingredient__measurement_unit')
@@ -235,3 +370,24 @@ class RecipeFavoriteShoppingCartViewSet(ModelViewSet):
             "attachment; filename='shopping-cart.txt'"
         )
         return response
+
+
+class CustomTokenCreateView(InstrumentedViewMixin, TokenCreateView):
+    """Получение токена авторизации."""
+
+
+class CustomTokenDestroyView(InstrumentedViewMixin, TokenDestroyView):
+    """Удаление токена авторизации."""
+
+
+class MetricsView(APIView):
+    """Показатели эндпойнтов API в текстовом формате Prometheus."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        """Возвращает показатели, агрегированные по всем воркерам."""
+        return HttpResponse(
+            registry.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -0,0 +1,166 @@
+"""Прогрев кэшей после развертывания.
+
+Запросы к основным эндпойнтам чтения выполняются через обработчик WSGI
+от имени анонимного пользователя: каталоги тегов и ингредиентов, первые
+WARM_CACHES_PAGES страниц списка рецептов (без фильтров, по каждому
+тегу и по популярности) и WARM_CACHES_RECIPES самых популярных рецептов.
+Эти запросы загружают в буферный кэш PostgreSQL страницы таблиц и
+индексов, которые читает основной трафик. На PostgreSQL с расширением
+pg_prewarm таблицы и индексы рецептов дополнительно загружаются в
+буферный кэш целиком.
+
+Команда warm_caches выполняет шаги параллельно в отдельном процессе,
+поэтому прогревает только БД. Хук post_worker_init в gunicorn.conf.py
+при WARM_CACHES_ON_BOOT последовательно выполняет в каждом воркере
+каталоги и первые страницы списков: воркер открывает соединение с БД,
+загружает модули и заполняет кэши процесса до первого запроса.
+Показатели прогревочных запросов не сохраняются.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.test.utils import override_settings
+
+from api.async_benchmarks import wsgi_get
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    RecipeTrend,
+    ShoppingCart,
+    Tag,
+)
+from users.models import CustomUser
+
+# Таблицы, которые читает основной трафик, в порядке важности.
+PREWARM_MODELS = (
+    Recipe, RecipeTag, Tag, RecipeIngredient, Ingredient, RecipeTrend,
+    CustomUser, Favorite, ShoppingCart,
+)
+PREWARM_SQL = (
+    'SELECT COALESCE(SUM(pg_prewarm(relation)), 0) FROM ('
+    'SELECT %s::regclass AS relation UNION ALL '
+    'SELECT indexrelid::regclass FROM pg_index '
+    'WHERE indrelid = %s::regclass) AS relations'
+)
+
+
+def warmup_handler():
+    """Обработчик WSGI без сохранения показателей запросов."""
+    with override_settings(METRICS_ENABLED=False):
+        return WSGIHandler()
+
+
+def warmup_requests(pages, recipes):
+    """Прогревочные запросы: список (шаг, URL)."""
+    requests = [
+        ('каталоги', '/api/tags/'),
+        ('каталоги', '/api/ingredients/'),
+    ]
+    for page in range(1, pages + 1):
+        requests.append(('рецепты', f'/api/recipes/?page={page}'))
+        requests.append((
+            'рецепты по популярности',
+            f'/api/recipes/?ordering=trending&page={page}'))
+        requests.extend(
+            ('рецепты по тегам', f'/api/recipes/?tags={slug}&page={page}')
+            for slug in Tag.objects.values_list('slug', flat=True))
+    requests.extend(
+        ('популярные рецепты', f'/api/recipes/{recipe_id}/')
+        for recipe_id in RecipeTrend.objects.filter(
+            recipe__deleted__isnull=True
+        ).order_by('-score', '-recipe').values_list(
+            'recipe_id', flat=True)[:recipes]
+    )
+    return requests
+
+
+def prewarm_buffers(alias):
+    """Загружает таблицы и индексы в буферный кэш PostgreSQL.
+
+    Возвращает количество загруженных блоков или None, если БД не
+    PostgreSQL или расширение pg_prewarm не установлено.
+    """
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'")
+            if cursor.fetchone() is None:
+                return None
+            blocks = 0
+            for model in PREWARM_MODELS:
+                table = model._meta.db_table
+                cursor.execute(PREWARM_SQL, [table, table])
+                blocks += cursor.fetchone()[0]
+            return blocks
+    finally:
+        connection.close()
+
+
+def timed(function, *args):
+    """Результат вызова и его длительность в секундах."""
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def summarize(results):
+    """Сводка по шагам: {шаг: {запросов, ошибок, мс, макс. мс}}."""
+    steps = {}
+    for step, status, elapsed in results:
+        summary = steps.setdefault(
+            step, {'requests': 0, 'errors': 0, 'ms': 0.0, 'max_ms': 0.0})
+        summary['requests'] += 1
+        summary['errors'] += status != 200
+        summary['ms'] += elapsed * 1000
+        summary['max_ms'] = max(summary['max_ms'], elapsed * 1000)
+    for summary in steps.values():
+        summary['ms'] = round(summary['ms'], 1)
+        summary['max_ms'] = round(summary['max_ms'], 1)
+    return steps
+
+
+def warm_caches(pages, recipes, workers, aliases=()):
+    """Выполняет прогрев в workers потоках.
+
+    Возвращает сводку по шагам, количество блоков, загруженных
+    pg_prewarm, по БД из aliases и общее время в секундах.
+    """
+    started = time.perf_counter()
+    handler = warmup_handler()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        prewarms = {
+            alias: executor.submit(timed, prewarm_buffers, alias)
+            for alias in aliases
+        }
+        requests = [
+            (step, executor.submit(timed, wsgi_get, handler, url, {}))
+            for step, url in warmup_requests(pages, recipes)
+        ]
+        results = []
+        for step, future in requests:
+            (status, _), elapsed = future.result()
+            results.append((step, status, elapsed))
+        prewarmed = {}
+        for alias, future in prewarms.items():
+            prewarmed[alias], elapsed = future.result()
+            results.append(('буферы БД', 200, elapsed))
+    return summarize(results), prewarmed, time.perf_counter() - started
+
+
+def warm_worker(pages):
+    """Прогревает процесс воркера последовательными запросами."""
+    handler = warmup_handler()
+    results = []
+    for step, url in warmup_requests(pages, 0):
+        (status, _), elapsed = timed(wsgi_get, handler, url, {})
+        results.append((step, status, elapsed))
+    return summarize(results)
@@ -1,6 +1,7 @@
 """Django settings for foodgram project."""
 
 import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,6 +35,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,6 +46,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -63,14 +69,54 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+# Время жизни соединения с БД в секундах: 0 — новое соединение на каждый
+# запрос, None — без ограничения. Под uvicorn каждый запрос выполняется в
+# своем потоке, поэтому постоянные соединения там нужно отключать (0).
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', '60')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'api.db_backends.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'foodgram'),
         'USER': os.getenv('POSTGRES_USER', 'foodgram'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': (
+            None if DB_CONN_MAX_AGE == 'None' else int(DB_CONN_MAX_AGE)),
+        # Проверка переиспользуемого соединения в начале запроса, чтобы
+        # после перезапуска БД запрос получил новое соединение.
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        # Для пулера PgBouncer в режиме transaction.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
+    }
+}
+
+# Реплики для чтения: DB_REPLICA_HOSTS=host1,host2:5433. Остальные
+# параметры подключения совпадают с основной БД.
+for number, replica_host in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    replica_host, _, replica_port = replica_host.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.db_routing.ReplicaRouter']
+# Время, в течение которого клиент после записи читает с основной БД.
+DB_PIN_SECONDS = int(os.getenv('DB_PIN_SECONDS', 5))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -110,7 +156,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -118,7 +164,61 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS':
     'api.pagination.CustomPageNumberPagination',
     'PAGE_SIZE': 6,
+    # Ограничения частоты запросов областей действий вьюсетов
+    # (api/throttling.py): '<область>.user' — на пользователя,
+    # '<область>.ip' — на IP. Переопределяются переменной THROTTLE_RATES
+    # вида 'recipes_write.user=10/min,shopping_cart.ip=20/min'.
+    'DEFAULT_THROTTLE_RATES': {
+        'recipes_list.user': '120/min',
+        'recipes_list.ip': '600/min',
+        'recipes_write.user': '20/min',
+        'recipes_write.ip': '60/min',
+        'shopping_cart.user': '10/min',
+        'shopping_cart.ip': '30/min',
+        'subscriptions.user': '60/min',
+        'subscriptions.ip': '300/min',
+    },
+    # Количество прокси перед приложением (nginx) для определения IP
+    # клиента по X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
 }
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].update(
+    item.split('=') for item in os.getenv('THROTTLE_RATES', '').split(',')
+    if item
+)
+# Наибольшее значение параметра limit в списках с пагинацией.
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+
+# Ограничения частоты и количества одновременных запросов областей;
+# при THROTTLE_ENABLED=False не действуют. Ведра жетонов хранятся в кэше
+# Django, поэтому с LocMemCache ограничения частоты действуют на каждый
+# процесс отдельно; docker compose использует общий DatabaseCache.
+# Наибольшее количество одновременно обрабатываемых запросов области в
+# процессе воркера переопределяется переменной CONCURRENCY_LIMITS вида
+# 'recipes_write=2,recipes_list=8' и достижимо только с потоками воркера
+# (gunicorn.conf.py); отклоненному запросу предлагается повторить его
+# через CONCURRENCY_RETRY_AFTER секунд.
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True') == 'True'
+CONCURRENCY_LIMITS = {
+    'recipes_list': 16,
+    'recipes_write': 4,
+    'shopping_cart': 2,
+    'subscriptions': 8,
+}
+CONCURRENCY_LIMITS.update(
+    (scope, int(limit)) for scope, limit in (
+        item.split('=') for item in os.getenv(
+            'CONCURRENCY_LIMITS', '').split(',') if item
+    )
+)
+CONCURRENCY_RETRY_AFTER = int(os.getenv('CONCURRENCY_RETRY_AFTER', 1))
+
+# Время жизни записей кэша токенов (api/authentication.py) в кэше Django
+# и в кэше процесса. Кэш Django используется, только если он общий для
+# процессов (CACHE_BACKEND не LocMemCache и не DummyCache).
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 300))
+TOKEN_CACHE_LOCAL_TTL = float(os.getenv('TOKEN_CACHE_LOCAL_TTL', 5))
+TOKEN_CACHE_LOCAL_SIZE = int(os.getenv('TOKEN_CACHE_LOCAL_SIZE', 1024))
 
 DJOSER = {
     'HIDE_USERS': False,
@@ -134,6 +234,111 @@ DJOSER = {
     }
 }
 
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'foodgram_metrics')
+)
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+
+# Асинхронные представления для чтения; включать при запуске через
+# foodgram.asgi (gunicorn -k uvicorn.workers.UvicornWorker foodgram.asgi).
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+
+PROFILER_DIR = os.getenv(
+    'PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'foodgram_profiles')
+)
+PROFILER_SAMPLE_RATE = int(os.getenv('PROFILER_SAMPLE_RATE', 0))
+PROFILER_MAX_PROFILES = int(os.getenv('PROFILER_MAX_PROFILES', 500))
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+
+# Начиная с этого количества строк пагинатор EstimatedCountPaginator
+# берет количество объектов из оценок PostgreSQL (статистика таблицы или
+# EXPLAIN) вместо COUNT(*); в ответе API при этом count_approximate=true.
+PAGINATOR_ESTIMATE_THRESHOLD = int(
+    os.getenv('PAGINATOR_ESTIMATE_THRESHOLD', 100000))
+
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'raise' if DEBUG else 'off')
+QUERY_BUDGETS = {
+    'api:users-list': 3,
+    'api:users-detail': 2,
+    'api:users-me': 2,
+    'api:users-subscriptions': 5,
+    'api:tags-list': 2,
+    'api:tags-detail': 2,
+    'api:ingredients-list': 2,
+    'api:ingredients-detail': 2,
+    'api:recipes-list': 6,
+    'api:recipes-detail': 7,
+    'api:recipes-download_shopping_cart': 2,
+    'api:recipes-similar': 6,
+}
+
+# Ширина уменьшенных копий фото рецептов и размер пула их обработки;
+# при IMAGE_WORKERS=0 копии создаются в потоке запроса.
+IMAGE_VARIANT_WIDTHS = [
+    int(width) for width in os.getenv(
+        'IMAGE_VARIANT_WIDTHS', '320,960').split(',')
+]
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+# Наибольшая ширина и высота загружаемого фото рецепта.
+IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', 8000))
+
+# Период полураспада популярности рецепта (сортировка ordering=trending).
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', 24))
+
+# Очередь фоновых задач в БД (api/jobs.py), выполняемых командой
+# run_workers. При JOB_QUEUE_ENABLED=False задачи выполняются сразу в
+# потоке запроса, кроме удаления пользователей и рецептов: его выполняет
+# команда purge_deleted. Конфигурации docker compose запускают воркер и
+# включают очередь. Задержка повтора после n-й неудачной попытки —
+# JOB_RETRY_DELAY · 2^(n - 1) секунд; задача дольше JOB_TIMEOUT секунд
+# считается прерванной и возвращается в очередь.
+JOB_QUEUE_ENABLED = os.getenv('JOB_QUEUE_ENABLED', 'False') == 'True'
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', 10))
+JOB_TIMEOUT = float(os.getenv('JOB_TIMEOUT', 600))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1))
+
+# Размер пачки строк, удаляемых в одной транзакции при фоновом удалении
+# пользователей и рецептов (recipes/deletion.py).
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 1000))
+
+# Счетчики фасетов списка рецептов (параметр facets, api/facets.py):
+# время хранения в кэше в секундах и количество авторов в фасете author.
+FACETS_CACHE_TTL = int(os.getenv('FACETS_CACHE_TTL', 60))
+FACET_AUTHORS_LIMIT = int(os.getenv('FACET_AUTHORS_LIMIT', 20))
+
+# Прогрев после развертывания (команда warm_caches): количество страниц
+# списков рецептов и популярных рецептов. При WARM_CACHES_ON_BOOT каждый
+# воркер gunicorn прогревается перед первым запросом (gunicorn.conf.py).
+WARM_CACHES_PAGES = int(os.getenv('WARM_CACHES_PAGES', 3))
+WARM_CACHES_RECIPES = int(os.getenv('WARM_CACHES_RECIPES', 50))
+WARM_CACHES_ON_BOOT = os.getenv('WARM_CACHES_ON_BOOT', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'recipes': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.CustomUser'
@@ -0,0 +1,17 @@
+"""Настройки gunicorn для контейнера бэкенда.
+
+Воркеры gthread обрабатывают в каждом процессе до GUNICORN_THREADS
+запросов одновременно. Ограничения CONCURRENCY_LIMITS действуют на
+процесс (api/throttling.py), поэтому потоков должно быть больше самого
+большого из них: с синхронными воркерами процесс обрабатывает один
+запрос, и ограничения никогда не срабатывают. Каждый поток держит свое
+соединение с БД, всего до GUNICORN_WORKERS · GUNICORN_THREADS
+соединений.
+"""
+
+import os
+
+bind = '0.0.0.0:8000'
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 24))
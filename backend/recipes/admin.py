@@ -2,8 +2,17 @@
 
 from django.contrib import admin
 from django.contrib.admin import ModelAdmin, TabularInline
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.forms import BaseInlineFormSet, ValidationError
 
+from api.admin_performance import (
+    DeferredDeletionAdminMixin,
+    PerformanceAdminMixin,
+)
+from recipes.deletion import delete_recipe
+from recipes.tag_masks import refresh_tag_mask
+
 from .models import (
     Favorite,
     Ingredient,
@@ -27,14 +36,32 @@ class TagAdmin(ModelAdmin):
 
 
 @admin.register(RecipeTag)
-class RecipeTagAdmin(ModelAdmin):
+class RecipeTagAdmin(PerformanceAdminMixin, ModelAdmin):
     """Отображение данных модели RecipeTag в админ-зоне."""
 
     list_display = ('recipe', 'tag')
-    list_filter = ('recipe__name', 'tag__name')
+    list_select_related = ('recipe', 'tag')
+    list_filter = ('tag',)
     search_fields = ('recipe__name', 'tag__name')
-    list_per_page = 50
-    empty_value_display = "-пусто-"
+    autocomplete_fields = ('recipe',)
+
+    def save_model(self, request, obj, form, change):
+        """Сохраняет тег рецепта и пересчитывает маски тегов рецептов."""
+        super().save_model(request, obj, form, change)
+        for recipe_id in {form.initial.get('recipe'), obj.recipe_id} - {None}:
+            refresh_tag_mask(recipe_id)
+
+    def delete_model(self, request, obj):
+        """Удаляет тег рецепта и пересчитывает маску тегов рецепта."""
+        super().delete_model(request, obj)
+        refresh_tag_mask(obj.recipe_id)
+
+    def delete_queryset(self, request, queryset):
+        """Удаляет теги рецептов и пересчитывает маски тегов рецептов."""
+        recipe_ids = set(queryset.values_list('recipe_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for recipe_id in recipe_ids:
+            refresh_tag_mask(recipe_id)
 
 
 class RecipeTagInlineFormset(BaseInlineFormSet):
@@ -52,30 +79,33 @@ class TagsInline(TabularInline):
 
     model = Recipe.tags.through
     formset = RecipeTagInlineFormset
-    extra = 5
+    extra = 0
     min_num = 1
 
+    def get_queryset(self, request):
+        """Теги рецепта с объектами для строкового представления."""
+        return super().get_queryset(request).select_related('recipe', 'tag')
+
 
 @admin.register(Ingredient)
 class IngredientAdmin(ModelAdmin):
     """Отображение данных модели Ingredient в админ-зоне."""
 
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
     search_fields = ('name',)
     list_per_page = 50
     empty_value_display = '-пусто-'
 
 
 @admin.register(RecipeIngredient)
-class RecipeIngredientAdmin(ModelAdmin):
+class RecipeIngredientAdmin(PerformanceAdminMixin, ModelAdmin):
     """Отображение данных модели RecipeIngredient в админ-зоне."""
 
     list_display = ('recipe', 'ingredient', 'amount')
-    list_filter = ('recipe__name', 'ingredient__name')
+    list_select_related = ('recipe', 'ingredient')
     search_fields = ('recipe__name', 'ingredient__name')
-    list_per_page = 50
-    empty_value_display = "-пусто-"
+    autocomplete_fields = ('recipe', 'ingredient')
 
 
 class RecipeIngredientInlineFormset(BaseInlineFormSet):
@@ -94,27 +124,59 @@ class IngredientsInline(TabularInline):
 
     model = Recipe.ingredients.through
     formset = RecipeIngredientInlineFormset
-    extra = 5
+    extra = 0
     min_num = 1
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        """Ингредиенты рецепта с объектами для строкового представления."""
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient')
 
 
 @admin.register(Recipe)
-class RecipeAdmin(ModelAdmin):
+class RecipeAdmin(
+        DeferredDeletionAdminMixin, PerformanceAdminMixin, ModelAdmin):
     """Отображение данных модели Recipe в админ-зоне."""
 
     list_display = ('name', 'author', 'favorites_count')
-    list_filter = ('name', 'author__username', 'tags__name')
+    list_select_related = ('author',)
+    list_filter = ('tags', 'pub_date')
     readonly_fields = ('favorites_count',)
-    search_fields = ('author__username', 'name', 'tags__name')
-    date_hierarchy = 'pub_date'
-    list_per_page = 50
-    empty_value_display = '-пусто-'
+    search_fields = ('author__username', 'name')
+    autocomplete_fields = ('author',)
     inlines = [TagsInline, IngredientsInline]
 
+    def get_queryset(self, request):
+        """Рецепты с количеством добавлений в избранное.
+
+        Количество считается подзапросом только для строк страницы.
+        """
+        return super().get_queryset(request).annotate(
+            favorites_total=Coalesce(
+                Subquery(
+                    Favorite.objects.filter(recipe=OuterRef('pk'))
+                    .order_by().values('recipe')
+                    .annotate(total=Count('id')).values('total'),
+                    output_field=IntegerField()
+                ),
+                0
+            )
+        )
+
+    def save_related(self, request, form, formsets, change):
+        """Сохраняет теги и ингредиенты рецепта и обновляет маску тегов."""
+        super().save_related(request, form, formsets, change)
+        form.instance.tag_mask = refresh_tag_mask(form.instance.pk)
+
+    def delete_later(self, obj):
+        """Отмечает рецепт удаленным."""
+        delete_recipe(obj)
+
     @admin.display(description='Количество добавлений в избранное')
     def favorites_count(self, object):
         """Подсчет количества рецептов в избранном для интерфейса админа."""
-        return object.recipes_favorite_related.count()
+        return object.favorites_total
 
     @admin.display
     def author_username(self, object):
@@ -123,22 +185,20 @@ class RecipeAdmin(ModelAdmin):
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(ModelAdmin):
+class FavoriteAdmin(PerformanceAdminMixin, ModelAdmin):
     """Отображение данных модели Favorite в админ-зоне."""
 
     list_display = ('recipe', 'user')
-    list_filter = ('recipe__name', 'user__username')
+    list_select_related = ('recipe', 'user')
     search_fields = ('recipe__name', 'user__username')
-    list_per_page = 50
-    empty_value_display = '-пусто-'
+    autocomplete_fields = ('recipe', 'user')
 
 
 @admin.register(ShoppingCart)
-class ShoppingListAdmin(ModelAdmin):
+class ShoppingListAdmin(PerformanceAdminMixin, ModelAdmin):
     """Отображение данных модели Comment в админ-зоне."""
 
     list_display = ('recipe', 'user')
-    list_filter = ('recipe__name', 'user__username')
+    list_select_related = ('recipe', 'user')
     search_fields = ('recipe__name', 'user__username')
-    list_per_page = 50
-    empty_value_display = '-пусто-'
+    autocomplete_fields = ('recipe', 'user')
@@ -0,0 +1,156 @@
+"""Удаление пользователей и рецептов в фоне.
+
+Каскадное удаление автора со всеми рецептами, ингредиентами и тегами
+рецептов, избранным, списками покупок и подписками в одной транзакции
+надолго блокирует строки и не укладывается во время ожидания ответа.
+Поэтому запрос на удаление только отмечает объект удаленным полем
+deleted и ставит в очередь задачу окончательного удаления:
+
+- рецепт скрывается менеджером Recipe.objects, в том числе из
+  избранного, списков покупок и подписок;
+- пользователь деактивируется (его токены перестают действовать) и
+  скрывается из списков пользователей и подписок, а его рецепты
+  отмечаются удаленными одним запросом UPDATE.
+
+Задача удаляет зависимые строки пачками по PURGE_BATCH_SIZE, каждую
+пачку в отдельной короткой транзакции, и затем сам объект. Задача
+идемпотентна: после ошибки она продолжает с оставшихся строк.
+
+Задача ставится в очередь после фиксации транзакции запроса и никогда
+не выполняется в потоке запроса. При JOB_QUEUE_ENABLED=False объекты
+остаются отмеченными до запуска команды purge_deleted, которая удаляет
+все отмеченные объекты; ее же можно запускать по расписанию, чтобы
+удалить объекты, задачи которых потерялись.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.jobs import enqueue
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeBucket,
+    RecipeIngredient,
+    RecipeSignature,
+    RecipeTag,
+    RecipeTrend,
+    ShoppingCart,
+)
+from users.models import CustomUser, Subscription
+
+logger = logging.getLogger(__name__)
+
+# Модели со ссылкой на рецепт, строки которых удаляются до рецепта.
+RECIPE_DEPENDENTS = (
+    Favorite,
+    ShoppingCart,
+    RecipeIngredient,
+    RecipeTag,
+    RecipeBucket,
+    RecipeSignature,
+    RecipeTrend,
+)
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """Удаляет строки queryset пачками в отдельных транзакциях.
+
+    Возвращает количество удаленных строк.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    manager = queryset.model._base_manager
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += manager.filter(pk__in=ids).delete()[0]
+
+
+def purge_recipes(recipes):
+    """Удаляет рецепты из queryset recipes и их зависимые строки."""
+    for model in RECIPE_DEPENDENTS:
+        delete_in_batches(model.objects.filter(recipe__in=recipes))
+    delete_in_batches(recipes)
+
+
+def purge_recipe(recipe_id):
+    """Задача окончательного удаления отмеченного рецепта."""
+    purge_recipes(
+        Recipe.all_objects.filter(pk=recipe_id, deleted__isnull=False))
+
+
+def purge_user(user_id):
+    """Задача окончательного удаления отмеченного пользователя."""
+    user = CustomUser.objects.filter(pk=user_id, deleted__isnull=False)
+    if not user.exists():
+        return
+    purge_recipes(Recipe.all_objects.filter(author_id=user_id))
+    for queryset in (
+        Favorite.objects.filter(user_id=user_id),
+        ShoppingCart.objects.filter(user_id=user_id),
+        Subscription.objects.filter(subscriber_id=user_id),
+        Subscription.objects.filter(author_id=user_id),
+    ):
+        delete_in_batches(queryset)
+    with transaction.atomic():
+        user.delete()
+
+
+def schedule_purge(function, key, **payload):
+    """Ставит задачу удаления в очередь после фиксации транзакции.
+
+    При отключенной очереди задача не ставится: объект удалит команда
+    purge_deleted.
+    """
+    if not settings.JOB_QUEUE_ENABLED:
+        logger.info('Очередь задач отключена, %s ждет purge_deleted', key)
+        return
+    transaction.on_commit(
+        lambda: enqueue(function, key=key, **payload))
+
+
+def delete_recipe(recipe):
+    """Отмечает рецепт удаленным и ставит в очередь его удаление."""
+    with transaction.atomic():
+        Recipe.all_objects.filter(pk=recipe.pk).update(
+            deleted=timezone.now())
+        schedule_purge(
+            purge_recipe,
+            key=f'purge-recipe:{recipe.pk}',
+            recipe_id=recipe.pk
+        )
+
+
+def delete_user(user):
+    """Деактивирует пользователя, отмечает удаленными его и его рецепты
+    и ставит в очередь их удаление."""
+    now = timezone.now()
+    with transaction.atomic():
+        user.deleted = now
+        user.is_active = False
+        user.save(update_fields=('deleted', 'is_active'))
+        Recipe.objects.filter(author=user).update(deleted=now)
+        schedule_purge(
+            purge_user, key=f'purge-user:{user.pk}', user_id=user.pk)
+
+
+def purge_deleted():
+    """Удаляет все отмеченные удаленными пользователи и рецепты.
+
+    Возвращает количество удаленных пользователей и рецептов.
+    """
+    users = list(CustomUser.objects.filter(
+        deleted__isnull=False).values_list('pk', flat=True))
+    for user_id in users:
+        purge_user(user_id)
+    recipes = list(Recipe.all_objects.filter(
+        deleted__isnull=False).values_list('pk', flat=True))
+    for recipe_id in recipes:
+        purge_recipe(recipe_id)
+    return len(users), len(recipes)
@@ -0,0 +1,235 @@
+"""Уменьшенные копии фотографий рецептов в форматах WebP и JPEG.
+
+После сохранения рецепта с новым изображением копии шириной из
+настройки IMAGE_VARIANT_WIDTHS создаются фоновой задачей (при
+JOB_QUEUE_ENABLED) или в пуле из IMAGE_WORKERS потоков, не задерживая
+ответ на запрос. Результат сохраняется в поле
+Recipe.image_variants:
+
+    {'source': 'recipes/images/3f/3f…a1.jpg',
+     'srcset': {'webp': {'320w': 'recipes/images/variants/9c/9c…07.webp'},
+                'jpeg': {'320w': 'recipes/images/variants/d2/d2…5e.jpg'}}}
+
+Файлы называются по хэшу содержимого (recipes.storage), поэтому
+одинаковые копии сохраняются один раз. Пока копии не созданы, поле пусто
+или относится к прежнему изображению (source не совпадает с
+Recipe.image), ссылок на копии нет и клиент использует исходное
+изображение. Копии для уже загруженных
+изображений создает команда build_image_variants, а файлы, на которые не
+ссылается ни один рецепт, удаляет команда collect_image_garbage.
+"""
+
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from api.jobs import enqueue
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+IMAGES_DIR = 'recipes/images'
+VARIANTS_DIR = f'{IMAGES_DIR}/variants'
+# (формат в srcset, расширение файла, формат Pillow, параметры сохранения)
+VARIANT_FORMATS = (
+    ('webp', 'webp', 'WEBP', {'quality': 75, 'method': 4}),
+    ('jpeg', 'jpg', 'JPEG', {
+        'quality': 80, 'optimize': True, 'progressive': True}),
+)
+
+image_storage = Recipe._meta.get_field('image').storage
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_name(source, width, extension):
+    """Имя файла копии изображения."""
+    return f'{VARIANTS_DIR}/{PurePosixPath(source).stem}_{width}.{extension}'
+
+
+def encode(image, image_format, options):
+    """Изображение в заданном формате."""
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(source):
+    """Создает копии изображения и возвращает srcset по форматам.
+
+    Изображение не увеличивается: копии шире исходного изображения
+    заменяются одной копией исходной ширины.
+    """
+    with image_storage.open(source) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        transparent = (image.mode in ('LA', 'PA')
+                       or 'transparency' in image.info)
+        image = image.convert('RGBA' if transparent else 'RGB')
+    widths = sorted({
+        min(width, image.width) for width in settings.IMAGE_VARIANT_WIDTHS})
+    srcset = {name: {} for name, *_ in VARIANT_FORMATS}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = (image if width == image.width
+                   else image.resize((width, height), Image.LANCZOS))
+        for name, extension, image_format, options in VARIANT_FORMATS:
+            srcset[name][f'{width}w'] = image_storage.save(
+                variant_name(source, width, extension),
+                ContentFile(encode(resized, image_format, options))
+            )
+    return srcset
+
+
+def save_variants(source):
+    """Создает копии изображения и сохраняет их в рецепты с этим фото.
+
+    Рецепты, изображение которых уже заменено, не изменяются.
+    """
+    srcset = build_variants(source)
+    Recipe.objects.filter(image=source).update(
+        image_variants={'source': source, 'srcset': srcset})
+
+
+def process_image(source):
+    """save_variants с записью ошибки в журнал.
+
+    Возвращает True, если копии созданы.
+    """
+    try:
+        save_variants(source)
+        return True
+    except Exception:
+        logger.exception('Не удалось создать копии изображения %s', source)
+        return False
+
+
+def process_in_worker(source):
+    """process_image в потоке пула.
+
+    Соединения потока с БД обслуживаются так же, как в начале и в конце
+    запроса: закрываются с ошибками или старше CONN_MAX_AGE.
+    """
+    close_old_connections()
+    try:
+        return process_image(source)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    """Пул потоков для обработки изображений."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                thread_name_prefix='image-variants'
+            )
+        return _executor
+
+
+def submit(source):
+    """Ставит обработку изображения в очередь пула потоков.
+
+    При IMAGE_WORKERS=0 изображение обрабатывается сразу.
+    """
+    if not settings.IMAGE_WORKERS:
+        process_image(source)
+        return
+    get_executor().submit(process_in_worker, source)
+
+
+def schedule_variants(recipe):
+    """Планирует создание копий, если изображение рецепта изменилось.
+
+    При JOB_QUEUE_ENABLED копии создает фоновая задача, поставленная в
+    очередь в транзакции, в которой сохранен рецепт. Иначе обработка
+    начинается в пуле потоков после фиксации транзакции. Обработка
+    планируется один раз при нескольких сохранениях.
+    """
+    source = recipe.image.name
+    if (not source
+            or recipe.image_variants.get('source') == source
+            or getattr(recipe, '_scheduled_image', None) == source):
+        return
+    recipe._scheduled_image = source
+    if settings.JOB_QUEUE_ENABLED:
+        enqueue(save_variants, key=f'image-variants:{source}', source=source)
+        return
+    transaction.on_commit(lambda: submit(source))
+
+
+def pending_sources(force=False):
+    """Изображения рецептов, для которых нет актуальных копий."""
+    sources = set()
+    for source, image_variants in Recipe.objects.exclude(
+            image='').values_list('image', 'image_variants').iterator():
+        if force or image_variants.get('source') != source:
+            sources.add(source)
+    return sorted(sources)
+
+
+def variant_urls(source, image_variants, build_url=image_storage.url):
+    """srcset из поля image_variants со ссылками вместо имен файлов.
+
+    Копии прежнего изображения рецепта (не source) не возвращаются.
+    """
+    if image_variants.get('source') != source:
+        return {}
+    return {
+        name: {
+            descriptor: build_url(file_name)
+            for descriptor, file_name in files.items()
+        }
+        for name, files in image_variants.get('srcset', {}).items()
+    }
+
+
+def referenced_files():
+    """Имена файлов фото и их копий, на которые ссылаются рецепты."""
+    names = set()
+    for source, image_variants in Recipe.objects.exclude(
+            image='').values_list('image', 'image_variants').iterator():
+        names.add(source)
+        for files in image_variants.get('srcset', {}).values():
+            names.update(files.values())
+    return names
+
+
+def stored_files(directory=IMAGES_DIR):
+    """Имена файлов в каталоге хранилища и его подкаталогах."""
+    directories, files = image_storage.listdir(directory)
+    for file_name in files:
+        yield posixpath.join(directory, file_name)
+    for subdirectory in directories:
+        yield from stored_files(posixpath.join(directory, subdirectory))
+
+
+def unreferenced_files(min_age):
+    """Файлы, на которые не ссылается ни один рецепт: (имя, размер).
+
+    Файлы моложе min_age пропускаются: они могут принадлежать рецепту,
+    транзакция которого еще не зафиксирована, или копиям, которые еще
+    не записаны в рецепт. Повторное сохранение существующего файла
+    обновляет время его изменения.
+    """
+    referenced = referenced_files()
+    threshold = timezone.now() - min_age
+    for name in stored_files():
+        if (name not in referenced
+                and image_storage.get_modified_time(name) < threshold):
+            yield name, image_storage.size(name)
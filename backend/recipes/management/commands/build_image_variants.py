@@ -0,0 +1,53 @@
+"""Создание уменьшенных копий фото уже сохраненных рецептов."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.images import pending_sources, process_in_worker
+
+
+class Command(BaseCommand):
+    """Класс создания копий фото рецептов в форматах WebP и JPEG.
+
+    Обрабатывает изображения рецептов, у которых нет копий или копии
+    созданы для прежнего изображения. Каждый файл обрабатывается один
+    раз, даже если он используется в нескольких рецептах.
+    """
+
+    help = 'Создает уменьшенные копии фото рецептов в WebP и JPEG.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии для всех изображений.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=max(settings.IMAGE_WORKERS, 1),
+            help='Количество потоков обработки.'
+        )
+
+    def handle(self, *args, **options):
+        """Функция фактической логики создания копий."""
+        started = time.perf_counter()
+        sources = pending_sources(options['force'])
+        self.stdout.write(f'Изображений для обработки: {len(sources)}')
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for number, processed in enumerate(
+                    executor.map(process_in_worker, sources), 1):
+                failed += not processed
+                if number % 100 == 0:
+                    self.stdout.write(
+                        f'[{time.perf_counter() - started:8.1f} с] '
+                        f'обработано {number}')
+        if failed:
+            raise CommandError(
+                f'Не удалось обработать изображений: {failed}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Копии созданы за {time.perf_counter() - started:.1f} с.'))
@@ -0,0 +1,47 @@
+"""Удаление файлов фото, на которые не ссылается ни один рецепт."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from recipes.images import image_storage, unreferenced_files
+
+
+class Command(BaseCommand):
+    """Класс удаления неиспользуемых фото рецептов и их копий.
+
+    Файлы с именами по содержимому не перезаписываются и не удаляются
+    при замене или удалении рецепта, поэтому неиспользуемые файлы
+    удаляются этой командой по расписанию.
+    """
+
+    help = ('Удаляет фото рецептов и их копии, на которые не ссылается '
+            'ни один рецепт.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age-hours',
+            type=float,
+            default=24,
+            help='Не удалять файлы моложе заданного количества часов.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести файлы, которые будут удалены.'
+        )
+
+    def handle(self, *args, **options):
+        """Функция фактической логики удаления файлов."""
+        count = freed = 0
+        for name, size in unreferenced_files(
+                timedelta(hours=options['min_age_hours'])):
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                image_storage.delete(name)
+            count += 1
+            freed += size
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} файлов: {count}, {freed / 1024 / 1024:.1f} МБ.'))
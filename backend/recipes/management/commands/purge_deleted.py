@@ -0,0 +1,27 @@
+"""Окончательное удаление отмеченных удаленными объектов."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.deletion import purge_deleted
+
+
+class Command(BaseCommand):
+    """Класс окончательного удаления пользователей и рецептов.
+
+    Нужен при JOB_QUEUE_ENABLED=False, когда задачи удаления не ставятся
+    в очередь, и как страховка для объектов, задачи которых потерялись.
+    Запускается вручную или по расписанию.
+    """
+
+    help = ('Удаляет пользователей и рецепты, отмеченные удаленными, '
+            'вместе с зависимыми строками.')
+
+    def handle(self, *args, **options):
+        """Функция фактической логики удаления."""
+        started = time.perf_counter()
+        users, recipes = purge_deleted()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено пользователей: {users}, рецептов: {recipes} '
+            f'за {time.perf_counter() - started:.1f} с.'))
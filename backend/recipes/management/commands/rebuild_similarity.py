@@ -0,0 +1,43 @@
+"""Пересчет MinHash-сигнатур и LSH-корзин всех рецептов."""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import Recipe
+from recipes.similarity import numpy, rebuild_batch
+from recipes.trending import id_batches
+
+
+class Command(BaseCommand):
+    """Класс пересчета сигнатур рецептов для поиска похожих рецептов.
+
+    Сигнатуры пакета рецептов вычисляются одной матричной операцией
+    NumPy; без NumPy используется медленный расчет по одному рецепту.
+    Каждый пакет сохраняется в отдельной транзакции.
+    """
+
+    help = ('Пересчитывает MinHash-сигнатуры и LSH-корзины рецептов '
+            'для поиска похожих рецептов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        """Функция фактической логики пересчета."""
+        if numpy is None:
+            self.stdout.write(self.style.WARNING(
+                'NumPy не установлен, сигнатуры считаются без него.'))
+        started = time.perf_counter()
+        total = 0
+        for batch in id_batches(
+                Recipe.objects.all(), 'id', options['batch_size']):
+            with transaction.atomic():
+                total += rebuild_batch(batch)
+            self.stdout.write(
+                f'[{time.perf_counter() - started:8.1f} с] '
+                f'обработано рецептов: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Сигнатуры пересчитаны для {total} рецептов за '
+            f'{time.perf_counter() - started:.1f} с.'))
@@ -0,0 +1,59 @@
+"""Заполнение БД синтетическими данными для бенчмарков."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.seeding import seed_dataset, seed_image
+
+
+class Command(BaseCommand):
+    """Класс заполнения БД синтетическими данными заданного масштаба.
+
+    Пример для нагрузочного масштаба:
+    manage.py seed_dataset --users 100000 --recipes 1000000
+    --ingredients-per-recipe 10
+    """
+
+    help = 'Заполняет БД синтетическими пользователями, рецептами и связями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=10)
+        parser.add_argument(
+            '--favorites-per-user', type=int, default=20,
+            help='Среднее количество рецептов в избранном и в списке '
+                 'покупок одного пользователя.')
+        parser.add_argument(
+            '--subscriptions-per-user', type=int, default=10,
+            help='Среднее количество подписок одного пользователя.')
+        parser.add_argument(
+            '--zipf-exponent', type=float, default=1.1,
+            help='Показатель распределения Ципфа для популярности авторов '
+                 'и рецептов.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Функция фактической логики заполнения БД."""
+        started = time.perf_counter()
+
+        def progress(message):
+            self.stdout.write(
+                f'[{time.perf_counter() - started:8.1f} с] {message}')
+
+        seed_image()
+        seed_dataset(
+            users=options['users'],
+            recipes=options['recipes'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            favorites_per_user=options['favorites_per_user'],
+            subscriptions_per_user=options['subscriptions_per_user'],
+            zipf_exponent=options['zipf_exponent'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Синтетические данные успешно созданы.'))
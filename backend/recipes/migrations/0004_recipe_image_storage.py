@@ -0,0 +1,19 @@
+# Generated by Django 4.2.4 on 2026-10-19 03:44
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(help_text='Загрузите фото блюда', storage=recipes.storage.ContentAddressedStorage(), upload_to='recipes/images/', verbose_name='Фото блюда'),
+        ),
+    ]
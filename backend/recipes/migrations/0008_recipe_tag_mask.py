@@ -0,0 +1,33 @@
+# Generated by Django 4.2.4 on 2026-10-19 04:21
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_tag_masks(apps, schema_editor):
+    """Заполняет маски тегов существующих рецептов (recipes/tag_masks.py)."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Tag = apps.get_model('recipes', 'Tag')
+    for tag_id in Tag.objects.filter(id__lte=63).values_list('id', flat=True):
+        Recipe.objects.filter(recipetag__tag_id=tag_id).update(
+            tag_mask=F('tag_mask').bitor(1 << (tag_id - 1)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_deleted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Маска тегов'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('deleted__isnull', True)), fields=['-pub_date', 'tag_mask', 'id'], name='recipe_tag_mask_idx'),
+        ),
+        migrations.RunPython(fill_tag_masks, migrations.RunPython.noop),
+    ]
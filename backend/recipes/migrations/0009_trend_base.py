@@ -0,0 +1,49 @@
+# Generated by Django 4.2.4 on 2026-10-19 04:35
+
+from django.db import migrations, models
+
+# RecipeTrend.NO_EVENTS.
+NO_EVENTS = -1e9
+
+
+def create_trend_base(apps, schema_editor):
+    """Создает строку начала отсчета и отмечает рецепты без событий.
+
+    Раньше score = 0 означал отсутствие событий.
+    """
+    apps.get_model('recipes', 'TrendBase').objects.create(pk=1, shift=0)
+    apps.get_model('recipes', 'RecipeTrend').objects.filter(
+        score=0).update(score=NO_EVENTS)
+
+
+def restore_zero_scores(apps, schema_editor):
+    """Возвращает score = 0 рецептам без событий."""
+    apps.get_model('recipes', 'RecipeTrend').objects.filter(
+        score__lte=NO_EVENTS).update(score=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_tag_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendBase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shift', models.FloatField(default=0, verbose_name='Сдвиг популярности')),
+            ],
+            options={
+                'verbose_name': 'Начало отсчета популярности',
+                'verbose_name_plural': 'Начало отсчета популярности',
+            },
+        ),
+        migrations.AlterField(
+            model_name='recipetrend',
+            name='score',
+            field=models.FloatField(default=-1000000000.0, verbose_name='Популярность'),
+        ),
+        migrations.RunPython(create_trend_base, restore_zero_scores),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.4 on 2026-10-19 05:10
+
+from django.db import migrations
+
+# RecipeTrend.NO_EVENTS.
+NO_EVENTS = -1e9
+BATCH_SIZE = 1000
+
+
+def create_recipe_trends(apps, schema_editor):
+    """Создает строки RecipeTrend для рецептов, созданных без них.
+
+    Сортировка ?ordering=trending соединяет рецепты с RecipeTrend
+    внутренним соединением, поэтому рецепт без строки в нее не попадет.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeTrend = apps.get_model('recipes', 'RecipeTrend')
+    missing = Recipe.objects.filter(trend__isnull=True).order_by('id')
+    while True:
+        batch = list(missing.values_list('id', flat=True)[:BATCH_SIZE])
+        if not batch:
+            return
+        RecipeTrend.objects.bulk_create(
+            RecipeTrend(recipe_id=recipe_id, score=NO_EVENTS)
+            for recipe_id in batch
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_trend_base'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_recipe_trends, migrations.RunPython.noop),
+    ]
@@ -4,19 +4,28 @@ from colorfield.fields import ColorField
 from django.core.validators import MinValueValidator
 from django.db.models import (
     CASCADE,
+    BigIntegerField,
+    BinaryField,
     CharField,
     DateTimeField,
+    FloatField,
     ForeignKey,
     ImageField,
+    Index,
     IntegerField,
+    JSONField,
+    Manager,
     ManyToManyField,
     Model,
+    OneToOneField,
     PositiveSmallIntegerField,
+    Q,
     SlugField,
     TextField,
     UniqueConstraint,
 )
 
+from recipes.storage import ContentAddressedStorage
 from users.models import CustomUser
 
 
@@ -89,8 +98,21 @@ class Ingredient(Model):
         return f'{self.name}, {self.measurement_unit}'
 
 
+class RecipeManager(Manager):
+    """Менеджер рецептов без рецептов, ожидающих удаления."""
+
+    def get_queryset(self):
+        """Рецепты, не отмеченные удаленными."""
+        return super().get_queryset().filter(deleted__isnull=True)
+
+
 class Recipe(Model):
-    """Модель рецептов."""
+    """Модель рецептов.
+
+    Удаленный рецепт отмечается полем deleted и скрывается менеджером
+    objects, а удаляется из БД в фоне (recipes/deletion.py). Все
+    рецепты, включая отмеченные, доступны через all_objects.
+    """
 
     author = ForeignKey(
         CustomUser,
@@ -106,6 +128,7 @@ class Recipe(Model):
     image = ImageField(
         'Фото блюда',
         upload_to='recipes/images/',
+        storage=ContentAddressedStorage(),
         help_text='Загрузите фото блюда'
     )
     text = TextField(
@@ -140,6 +163,25 @@ class Recipe(Model):
         'Дата публикации',
         auto_now_add=True
     )
+    image_variants = JSONField(
+        'Уменьшенные копии фото',
+        default=dict,
+        editable=False
+    )
+    tag_mask = BigIntegerField(
+        'Маска тегов',
+        default=0,
+        editable=False
+    )
+    deleted = DateTimeField(
+        'Дата удаления',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    objects = RecipeManager()
+    all_objects = Manager()
 
     class Meta:
         """Общие параметры модели рецептов."""
@@ -152,6 +194,13 @@ class Recipe(Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = (
+            Index(
+                fields=('-pub_date', 'tag_mask', 'id'),
+                condition=Q(deleted__isnull=True),
+                name='recipe_tag_mask_idx'
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта Recipe."""
@@ -259,6 +308,12 @@ class CommonFavoriteShopingCart(Model):
         related_name='%(app_label)s_%(class)s_related',
         verbose_name='Рецепт'
     )
+    created = DateTimeField(
+        'Дата добавления',
+        auto_now_add=True,
+        null=True,
+        db_index=True
+    )
 
     class Meta:
         """Общие параметры моделей избранного и списка покупок."""
@@ -319,3 +374,115 @@ class ShoppingCart(CommonFavoriteShopingCart):
         """Строковое представление объекта ShoppingCart."""
         return (f'Рецепт {self.recipe.name} в списке покупок'
                 f'у пользователя {self.user.username}')
+
+
+class RecipeTrend(Model):
+    """Модель популярности рецептов за последнее время.
+
+    Хранится отдельно от Recipe, чтобы обновление популярности при
+    каждом добавлении в избранное или список покупок не блокировало
+    строки рецептов. Значение score описано в recipes/trending.py,
+    NO_EVENTS — score рецепта без недавних событий.
+    """
+
+    NO_EVENTS = -1e9
+
+    recipe = OneToOneField(
+        Recipe,
+        on_delete=CASCADE,
+        primary_key=True,
+        related_name='trend',
+        verbose_name='Рецепт'
+    )
+    score = FloatField(
+        'Популярность',
+        default=NO_EVENTS
+    )
+
+    class Meta:
+        """Общие параметры модели популярности рецептов."""
+
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        indexes = (
+            Index(
+                fields=('-score', '-recipe'),
+                name='recipe_trend_score_idx'
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта RecipeTrend."""
+        return f'Популярность рецепта {self.recipe_id}: {self.score:.2f}'
+
+
+class TrendBase(Model):
+    """Модель начала отсчета популярности рецептов.
+
+    Единственная строка хранит сдвиг shift, который вычитается из score
+    всех рецептов при перенормировке (recipes/trending.py).
+    """
+
+    shift = FloatField(
+        'Сдвиг популярности',
+        default=0
+    )
+
+    class Meta:
+        """Общие параметры модели начала отсчета популярности."""
+
+        verbose_name = 'Начало отсчета популярности'
+        verbose_name_plural = 'Начало отсчета популярности'
+
+    def __str__(self):
+        """Строковое представление объекта TrendBase."""
+        return f'Сдвиг популярности {self.shift:.2f}'
+
+
+class RecipeSignature(Model):
+    """Модель MinHash-сигнатур наборов ингредиентов рецептов.
+
+    Сигнатура из recipes/similarity.py хранится как массив 32-битных
+    целых фиксированной длины в двоичном виде.
+    """
+
+    recipe = OneToOneField(
+        Recipe,
+        on_delete=CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Рецепт'
+    )
+    minhash = BinaryField('MinHash-сигнатура')
+
+    class Meta:
+        """Общие параметры модели сигнатур рецептов."""
+
+        verbose_name = 'Сигнатура рецепта'
+        verbose_name_plural = 'Сигнатуры рецептов'
+
+    def __str__(self):
+        """Строковое представление объекта RecipeSignature."""
+        return f'Сигнатура рецепта {self.recipe_id}'
+
+
+class RecipeBucket(Model):
+    """Модель LSH-корзин рецептов для поиска похожих рецептов."""
+
+    recipe = ForeignKey(
+        Recipe,
+        on_delete=CASCADE,
+        related_name='buckets',
+        verbose_name='Рецепт'
+    )
+    key = BigIntegerField('Ключ корзины', db_index=True)
+
+    class Meta:
+        """Общие параметры модели LSH-корзин рецептов."""
+
+        verbose_name = 'Корзина похожих рецептов'
+        verbose_name_plural = 'Корзины похожих рецептов'
+
+    def __str__(self):
+        """Строковое представление объекта RecipeBucket."""
+        return f'Корзина {self.key} рецепта {self.recipe_id}'
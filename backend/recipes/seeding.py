@@ -0,0 +1,189 @@
+"""Заполнение БД синтетическими данными для проверок и бенчмарков.
+
+Данные создаются пакетами через bulk_create. Популярность авторов и
+рецептов подчиняется закону Ципфа: немногие авторы публикуют большую
+часть рецептов, а немногие рецепты собирают большую часть добавлений
+в избранное и список покупок.
+"""
+
+import io
+import itertools
+import random
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    RecipeTrend,
+    ShoppingCart,
+    Tag,
+)
+from recipes.tag_masks import fill_tag_masks
+from users.models import CustomUser, Subscription
+
+SEED_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+SEED_IMAGE_NAME = 'recipes/images/seed.png'
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса закона Ципфа для рангов от 1 до count."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def batched(iterable, size):
+    """Разбивает последовательность на пакеты заданного размера."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def seed_image():
+    """Сохраняет общее изображение для синтетических рецептов."""
+    if not default_storage.exists(SEED_IMAGE_NAME):
+        buffer = io.BytesIO()
+        Image.new('RGB', (600, 400), '#E26C2D').save(buffer, 'PNG')
+        default_storage.save(SEED_IMAGE_NAME, ContentFile(buffer.getvalue()))
+
+
+def seed_tags():
+    """Создает теги, если их нет в БД."""
+    for name, color, slug in SEED_TAGS:
+        Tag.objects.get_or_create(
+            slug=slug, defaults={'name': name, 'color': color})
+    return list(Tag.objects.values_list('id', flat=True))
+
+
+def seed_ingredients(count):
+    """Дополняет ингредиенты в БД до count."""
+    existing = Ingredient.objects.count()
+    if existing < count:
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+                for number in range(existing, count)
+            ),
+            ignore_conflicts=True
+        )
+    return list(Ingredient.objects.values_list('id', flat=True))
+
+
+def sample_distinct(generator, population, cum_weights, count, exclude=None):
+    """Выбирает до count различных элементов с заданными весами."""
+    chosen = set(generator.choices(
+        population, cum_weights=cum_weights, k=count))
+    chosen.discard(exclude)
+    return chosen
+
+
+def seed_dataset(users=10, recipes=50, ingredients_per_recipe=5,
+                 favorites_per_user=5, subscriptions_per_user=3,
+                 zipf_exponent=1.1, batch_size=5000, seed=0,
+                 progress=None):
+    """Создает пользователей, рецепты и связи между ними.
+
+    Количество избранного, списков покупок и подписок на пользователя
+    задается средним значением. Возвращает идентификаторы созданных
+    пользователей.
+    """
+    generator = random.Random(seed)
+    report = progress or (lambda message: None)
+    tag_ids = seed_tags()
+    ingredient_ids = seed_ingredients(ingredients_per_recipe * 10)
+    offset = CustomUser.objects.order_by('-id').values_list(
+        'id', flat=True).first() or 0
+
+    user_ids = []
+    for batch in batched(range(offset, offset + users), batch_size):
+        user_ids.extend(user.id for user in CustomUser.objects.bulk_create(
+            CustomUser(
+                username=f'seed{number}',
+                email=f'seed{number}@example.com',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            for number in batch
+        ))
+    report(f'Пользователи: {len(user_ids)}')
+    user_weights = zipf_weights(len(user_ids), zipf_exponent)
+
+    recipe_ids = []
+    for batch in batched(range(recipes), batch_size):
+        authors = generator.choices(
+            user_ids, cum_weights=user_weights, k=len(batch))
+        created = Recipe.objects.bulk_create(
+            Recipe(
+                author_id=author_id,
+                name=f'Рецепт {number}',
+                image=SEED_IMAGE_NAME,
+                text='Описание рецепта',
+                cooking_time=generator.randint(1, 120),
+            )
+            for number, author_id in zip(batch, authors)
+        )
+        batch_ids = [recipe.id for recipe in created]
+        recipe_ids.extend(batch_ids)
+        # bulk_create не отправляет post_save, строки популярности
+        # создаются здесь.
+        RecipeTrend.objects.bulk_create(
+            RecipeTrend(recipe_id=recipe_id) for recipe_id in batch_ids)
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in batch_ids
+            for tag_id in generator.sample(
+                tag_ids, generator.randint(1, len(tag_ids)))
+        )
+        fill_tag_masks(Recipe.objects.filter(id__in=batch_ids), tag_ids)
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=generator.randint(1, 500),
+                )
+                for recipe_id in batch_ids
+                for ingredient_id in generator.sample(
+                    ingredient_ids,
+                    min(ingredients_per_recipe, len(ingredient_ids)))
+            ),
+            batch_size=batch_size
+        )
+        report(f'Рецепты: {len(recipe_ids)}')
+    recipe_weights = zipf_weights(len(recipe_ids), zipf_exponent)
+
+    relations = (
+        (Favorite, 'user_id', 'recipe_id', recipe_ids, recipe_weights,
+         favorites_per_user),
+        (ShoppingCart, 'user_id', 'recipe_id', recipe_ids, recipe_weights,
+         favorites_per_user),
+        (Subscription, 'subscriber_id', 'author_id', user_ids, user_weights,
+         subscriptions_per_user),
+    )
+    for (model, owner_field, target_field, population, weights,
+         per_user) in relations:
+        if not population or not per_user:
+            continue
+        for batch in batched(user_ids, max(batch_size // per_user, 1)):
+            model.objects.bulk_create(
+                (
+                    model(**{owner_field: user_id, target_field: target_id})
+                    for user_id in batch
+                    for target_id in sample_distinct(
+                        generator, population, weights,
+                        generator.randint(0, 2 * per_user),
+                        exclude=user_id if model is Subscription else None)
+                ),
+                ignore_conflicts=True
+            )
+        report(f'{model._meta.verbose_name_plural}: готово')
+    return user_ids
@@ -0,0 +1,182 @@
+"""Похожие рецепты по MinHash-сигнатурам наборов ингредиентов.
+
+Сходство рецептов — коэффициент Жаккара их наборов ингредиентов. Он
+оценивается долей совпадающих значений MinHash-сигнатур: значение i
+сигнатуры — минимум хэш-функции h_i(x) = (a_i·x + b_i) mod P по
+идентификаторам ингредиентов рецепта, и у двух рецептов оно совпадает с
+вероятностью, равной коэффициенту Жаккара.
+
+Кандидаты ищутся без перебора пар (LSH): сигнатура делится на BANDS
+полос по ROWS значений, и ключ каждой полосы хранится в RecipeBucket.
+Рецепты с коэффициентом Жаккара J попадают хотя бы в одну общую корзину
+с вероятностью 1 - (1 - J^ROWS)^BANDS: около 0,99 при J = 0,7, 0,64 при
+J = 0,5 и 0,12 при J = 0,3.
+
+Сигнатура рецепта обновляется фоновой задачей refresh_signature при
+создании и редактировании рецепта через API, для всех рецептов
+сигнатуры пересчитывает команда rebuild_similarity, вычисляющая их
+пакетами с помощью NumPy.
+"""
+
+import random
+import struct
+
+from django.db.models import Count
+
+from recipes.models import RecipeBucket, RecipeIngredient, RecipeSignature
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Простое число Мерсенна 2^31 - 1: значения сигнатуры помещаются в int32,
+# а произведение a·x в int64.
+PRIME = (1 << 31) - 1
+_generator = random.Random(20240101)
+PERMUTATIONS = [
+    (_generator.randrange(1, PRIME), _generator.randrange(PRIME))
+    for _ in range(NUM_PERM)
+]
+BAND_MULTIPLIER = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+SIGNATURE_FORMAT = f'<{NUM_PERM}i'
+# Сколько рецептов с наибольшим числом общих корзин сравнивается по
+# сигнатурам.
+MAX_CANDIDATES = 200
+
+
+def signature(ingredient_ids):
+    """MinHash-сигнатура набора ингредиентов."""
+    return tuple(
+        min((a * ingredient + b) % PRIME for ingredient in ingredient_ids)
+        for a, b in PERMUTATIONS
+    )
+
+
+def band_keys(minhash):
+    """Ключи LSH-корзин сигнатуры, по одному на полосу.
+
+    Ключ — полиномиальный хэш номера полосы и ее значений по модулю 2^64,
+    приведенный к знаковому 64-битному целому для BigIntegerField.
+    """
+    keys = []
+    for band in range(BANDS):
+        key = band + 1
+        for value in minhash[band * ROWS:(band + 1) * ROWS]:
+            key = (key * BAND_MULTIPLIER + value + 1) & MASK64
+        keys.append(key - (1 << 64) if key >= 1 << 63 else key)
+    return keys
+
+
+def pack(minhash):
+    """Сигнатура в двоичном виде для RecipeSignature.minhash."""
+    return struct.pack(SIGNATURE_FORMAT, *minhash)
+
+
+def unpack(packed):
+    """Сигнатура из двоичного вида."""
+    return struct.unpack(SIGNATURE_FORMAT, bytes(packed))
+
+
+def save_signatures(minhashes):
+    """Сохраняет сигнатуры и корзины рецептов {id рецепта: сигнатура}."""
+    RecipeBucket.objects.filter(recipe_id__in=list(minhashes)).delete()
+    RecipeSignature.objects.bulk_create(
+        [
+            RecipeSignature(recipe_id=recipe_id, minhash=pack(minhash))
+            for recipe_id, minhash in minhashes.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['recipe'],
+        update_fields=['minhash']
+    )
+    RecipeBucket.objects.bulk_create(
+        RecipeBucket(recipe_id=recipe_id, key=key)
+        for recipe_id, minhash in minhashes.items()
+        for key in band_keys(minhash)
+    )
+
+
+def bulk_signatures(recipe_ids, ingredient_ids):
+    """Сигнатуры рецептов по парам (рецепт, ингредиент) средствами NumPy.
+
+    Пары отсортированы по рецепту. Хэши всех пар вычисляются одной
+    матрицей NUM_PERM × пар, минимумы по рецептам — numpy.minimum.reduceat.
+    Возвращает {id рецепта: сигнатура}.
+    """
+    recipe_ids = numpy.asarray(recipe_ids, dtype=numpy.int64)
+    ingredient_ids = numpy.asarray(ingredient_ids, dtype=numpy.int64)
+    starts = numpy.flatnonzero(
+        numpy.concatenate(([True], recipe_ids[1:] != recipe_ids[:-1])))
+    a, b = (numpy.array(column, dtype=numpy.int64)
+            for column in zip(*PERMUTATIONS))
+    hashes = (a[:, None] * ingredient_ids[None, :] + b[:, None]) % PRIME
+    minhashes = numpy.minimum.reduceat(hashes, starts, axis=1).T
+    return {
+        int(recipe_id): tuple(minhash.tolist())
+        for recipe_id, minhash in zip(recipe_ids[starts], minhashes)
+    }
+
+
+def rebuild_batch(recipe_ids):
+    """Пересчитывает сигнатуры пакета рецептов."""
+    pairs = list(
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by('recipe_id').values_list('recipe_id', 'ingredient_id'))
+    if numpy is not None and pairs:
+        minhashes = bulk_signatures(*zip(*pairs))
+    else:
+        ingredients = {}
+        for recipe_id, ingredient_id in pairs:
+            ingredients.setdefault(recipe_id, []).append(ingredient_id)
+        minhashes = {
+            recipe_id: signature(ingredient_ids)
+            for recipe_id, ingredient_ids in ingredients.items()
+        }
+    empty = set(recipe_ids) - set(minhashes)
+    RecipeSignature.objects.filter(recipe_id__in=empty).delete()
+    RecipeBucket.objects.filter(recipe_id__in=empty).delete()
+    save_signatures(minhashes)
+    return len(minhashes)
+
+
+def refresh_signature(recipe_id):
+    """Пересчитывает сигнатуру рецепта по его ингредиентам в БД."""
+    rebuild_batch([recipe_id])
+
+
+def similar_recipes(recipe_id, limit):
+    """Похожие рецепты: список (оценка сходства, id рецепта).
+
+    Кандидаты — рецепты, попавшие хотя бы в одну корзину рецепта; из
+    MAX_CANDIDATES кандидатов с наибольшим числом общих корзин
+    выбираются limit с наибольшей долей совпадающих значений сигнатур.
+    Возвращает None, если у рецепта нет сигнатуры.
+    """
+    packed = RecipeSignature.objects.filter(
+        recipe_id=recipe_id).values_list('minhash', flat=True).first()
+    if packed is None:
+        return None
+    minhash = unpack(packed)
+    candidates = [
+        candidate_id
+        for candidate_id, _ in RecipeBucket.objects.filter(
+            key__in=band_keys(minhash)
+        ).exclude(recipe_id=recipe_id).values('recipe_id').annotate(
+            matches=Count('id')
+        ).order_by('-matches', 'recipe_id').values_list(
+            'recipe_id', 'matches')[:MAX_CANDIDATES]
+    ]
+    scored = []
+    for candidate_id, other in RecipeSignature.objects.filter(
+            recipe_id__in=candidates).values_list('recipe_id', 'minhash'):
+        matches = sum(
+            value == other_value
+            for value, other_value in zip(minhash, unpack(other)))
+        scored.append((matches / NUM_PERM, candidate_id))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:limit]
@@ -0,0 +1,50 @@
+"""Хранилище файлов с именами по содержимому."""
+
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 их содержимого.
+
+    Файл сохраняется как <каталог>/<2 первых символа хэша>/<хэш>.<расширение>.
+    Файл с тем же содержимым уже лежит под тем же именем, поэтому
+    повторное сохранение не записывает файл, а содержимое файла по
+    ссылке никогда не меняется и может кэшироваться бессрочно.
+    Неиспользуемые файлы удаляет команда collect_image_garbage.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, file_name = posixpath.split(name)
+        hexdigest = digest.hexdigest()
+        extension = posixpath.splitext(file_name)[1].lower()
+        name = posixpath.join(
+            directory, hexdigest[:2], f'{hexdigest}{extension}')
+        return super().save(name, content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        """Имя по содержимому не меняется: файл с ним уже тот же."""
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            # Время изменения защищает снова используемый файл от
+            # удаления командой collect_image_garbage.
+            os.utime(self.path(name))
+            return name
+        # Запись под временным именем и атомарная замена: одновременное
+        # сохранение одного файла не оставит читателям неполный файл.
+        temporary_name = super()._save(
+            f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
@@ -0,0 +1,101 @@
+"""Маски тегов рецептов для фильтрации без соединений.
+
+Теги — небольшой постоянный набор, поэтому теги рецепта дублируются в
+поле Recipe.tag_mask: тегу с идентификатором n соответствует бит n - 1.
+Фильтр по нескольким тегам становится побитовым условием на одной
+таблице без соединения с RecipeTag и Tag и без DISTINCT. Условие
+tag_mask & m не может быть ключом индекса и проверяется для каждой
+строки индекса recipe_tag_mask_idx по (-pub_date, tag_mask, id), зато
+без обращения к таблице: сканированием только индекса выполняется
+подсчет рецептов (count пагинатора, фасеты). Страница списка выбирает
+все поля рецепта, поэтому строки страницы читаются из таблицы, но
+только для рецептов, прошедших условие по маске.
+
+Маску обновляют сохранение рецепта через API (RecipeWriteSerializer) и
+изменение тегов в интерфейсе администратора, а при удалении тега его бит
+снимается со всех рецептов (api/signals.py). Теги, добавленные в обход
+этих путей, учитываются после fill_tag_masks или refresh_tag_mask.
+Теги с идентификатором больше MAX_MASK_TAG_ID в маску не попадают и
+фильтруются подзапросом к RecipeTag.
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.db.models import Exists, F, OuterRef, Q
+
+from recipes.models import Recipe, RecipeTag
+
+# Старший бит BigIntegerField знаковый, поэтому используются биты 0–62.
+MAX_MASK_TAG_ID = 63
+
+
+def tag_bit(tag_id):
+    """Бит тега в маске или 0, если тег в маску не попадает."""
+    if 0 < tag_id <= MAX_MASK_TAG_ID:
+        return 1 << (tag_id - 1)
+    return 0
+
+
+def tag_mask(tag_ids):
+    """Маска набора тегов."""
+    return reduce(or_, map(tag_bit, tag_ids), 0)
+
+
+def refresh_tag_mask(recipe_id):
+    """Пересчитывает маску тегов рецепта по строкам RecipeTag.
+
+    Возвращает новую маску.
+    """
+    mask = tag_mask(RecipeTag.objects.filter(
+        recipe_id=recipe_id).values_list('tag_id', flat=True))
+    Recipe.all_objects.filter(pk=recipe_id).update(tag_mask=mask)
+    return mask
+
+
+def fill_tag_masks(recipes, tag_ids):
+    """Добавляет в маски рецептов queryset recipes биты их тегов.
+
+    Выполняет по одному запросу UPDATE на тег из tag_ids.
+    """
+    for tag_id in tag_ids:
+        bit = tag_bit(tag_id)
+        if bit:
+            recipes.filter(recipetag__tag_id=tag_id).update(
+                tag_mask=F('tag_mask').bitor(bit))
+
+
+def clear_tag_bit(tag_id):
+    """Снимает бит тега с масок всех рецептов."""
+    bit = tag_bit(tag_id)
+    if bit:
+        Recipe.all_objects.alias(
+            tag_match=F('tag_mask').bitand(bit)
+        ).filter(tag_match__gt=0).update(tag_mask=F('tag_mask').bitand(~bit))
+
+
+def filter_any_tags(queryset, tag_ids):
+    """Рецепты queryset, у которых есть хотя бы один тег из tag_ids."""
+    mask = tag_mask(tag_ids)
+    unmasked = [tag_id for tag_id in tag_ids if not tag_bit(tag_id)]
+    condition = Q()
+    if mask:
+        queryset = queryset.alias(tag_match=F('tag_mask').bitand(mask))
+        condition |= Q(tag_match__gt=0)
+    if unmasked:
+        condition |= Q(Exists(RecipeTag.objects.filter(
+            recipe=OuterRef('pk'), tag_id__in=unmasked)))
+    return queryset.filter(condition)
+
+
+def filter_all_tags(queryset, tag_ids):
+    """Рецепты queryset, у которых есть все теги из tag_ids."""
+    mask = tag_mask(tag_ids)
+    if mask:
+        queryset = queryset.alias(
+            tag_match=F('tag_mask').bitand(mask)).filter(tag_match=mask)
+    for tag_id in tag_ids:
+        if not tag_bit(tag_id):
+            queryset = queryset.filter(Exists(RecipeTag.objects.filter(
+                recipe=OuterRef('pk'), tag_id=tag_id)))
+    return queryset
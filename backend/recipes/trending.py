@@ -0,0 +1,219 @@
+"""Популярность рецептов с экспоненциальным затуханием.
+
+Каждое добавление рецепта в избранное или список покупок в момент t
+добавляет к популярности рецепта вес события, который уменьшается вдвое
+за TRENDING_HALF_LIFE_HOURS часов:
+
+    P(now) = Σ w · exp(-(now - t) / τ),  τ = T½ / ln 2.
+
+P(now) меняется со временем у всех рецептов, поэтому в RecipeTrend.score
+хранится не зависящая от текущего момента величина
+
+    score = ln Σ w · exp((t - EPOCH) / τ - shift)
+          = ln P(now) + (now - EPOCH) / τ - shift.
+
+Она отличается от ln P(now) одинаковым для всех рецептов слагаемым,
+поэтому сортировка по score по индексу совпадает с сортировкой по
+текущей популярности. Событие добавляется к score одним UPDATE строки
+RecipeTrend по формуле logaddexp, без блокировки строки Recipe.
+Показатель экспоненты в SQL ограничен MAX_EXP_ARGUMENT: PostgreSQL
+завершает exp() ошибкой при потере значимости. Рецепты без событий
+имеют score = RecipeTrend.NO_EVENTS.
+
+Слагаемое (now - EPOCH) / τ растет со временем, поэтому score
+периодически перенормируется: когда score нового события превышает
+RENORMALIZE_ABOVE, команда recompute_trending одним UPDATE вычитает
+разницу из score всех рецептов и прибавляет ее к сдвигу shift из
+TrendBase. UPDATE блокирует только строки RecipeTrend.
+
+Удаление из избранного и списка покупок score не уменьшает. Команда
+recompute_trending периодически пересчитывает score по событиям за
+последние WINDOW_HALF_LIVES периодов полураспада: учитывает удаления,
+сбрасывает популярность рецептов без недавних событий и добавляет строки
+RecipeTrend для рецептов, созданных в обход сигналов.
+"""
+
+import math
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Subquery, Value
+from django.db.models.functions import Abs, Exp, Greatest, Least, Ln, TruncHour
+from django.utils import timezone
+
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeTrend,
+    ShoppingCart,
+    TrendBase,
+)
+
+EPOCH = datetime.fromisoformat('2024-01-01T00:00:00+00:00')
+# Вес события по модели.
+EVENT_WEIGHTS = {
+    Favorite: 1.0,
+    ShoppingCart: 1.0,
+}
+# События старше стольких периодов полураспада весят меньше 0,1%.
+WINDOW_HALF_LIVES = 10
+# Идентификатор единственной строки TrendBase.
+TREND_BASE_ID = 1
+# Наибольший показатель exp() в SQL: exp(-700) еще больше DBL_MIN.
+MAX_EXP_ARGUMENT = 700.0
+# score нового события, после которого score перенормируется.
+RENORMALIZE_ABOVE = 100.0
+
+
+def decay_seconds():
+    """Постоянная времени затухания τ в секундах."""
+    return settings.TRENDING_HALF_LIFE_HOURS * 3600 / math.log(2)
+
+
+def event_score(weight, moment):
+    """Вклад события в score без сдвига: ln w + (t - EPOCH) / τ."""
+    return (math.log(weight)
+            + (moment - EPOCH).total_seconds() / decay_seconds())
+
+
+def logaddexp(first, second):
+    """ln(exp(first) + exp(second)) без переполнения."""
+    if first == -math.inf:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def shift_query():
+    """Подзапрос сдвига score из TrendBase."""
+    return Subquery(TrendBase.objects.filter(
+        pk=TREND_BASE_ID).values('shift'))
+
+
+def add_event(recipe_id, weight, moment):
+    """Добавляет событие к популярности рецепта.
+
+    Сдвиг читается подзапросом в том же запросе, поэтому событие не
+    требует отдельного запроса к TrendBase.
+    """
+    score = Value(event_score(weight, moment)) - shift_query()
+    if RecipeTrend.objects.filter(recipe_id=recipe_id).update(
+            score=Greatest(F('score'), score) + Ln(1 + Exp(-Least(
+                Abs(F('score') - score), Value(MAX_EXP_ARGUMENT))))):
+        return
+    try:
+        with transaction.atomic():
+            RecipeTrend.objects.create(recipe_id=recipe_id, score=score)
+    except IntegrityError:
+        # Строку одновременно создал другой запрос.
+        add_event(recipe_id, weight, moment)
+
+
+def renormalize(now):
+    """Перенормирует score, если score нового события велик.
+
+    Возвращает величину, вычтенную из score, или 0.
+    """
+    with transaction.atomic():
+        base, _ = TrendBase.objects.select_for_update().get_or_create(
+            pk=TREND_BASE_ID)
+        delta = event_score(1, now) - base.shift
+        if delta <= RENORMALIZE_ABOVE:
+            return 0
+        RecipeTrend.objects.filter(score__gt=RecipeTrend.NO_EVENTS).update(
+            score=F('score') - delta)
+        base.shift += delta
+        base.save(update_fields=('shift',))
+    return delta
+
+
+def id_batches(queryset, field, batch_size):
+    """Значения field из queryset пакетами по возрастанию.
+
+    Каждый пакет выбирается отдельным запросом по условию field > последнее
+    значение, поэтому таблицу можно изменять между пакетами.
+    """
+    last = None
+    while True:
+        batch_query = queryset.order_by(field)
+        if last is not None:
+            batch_query = batch_query.filter(**{f'{field}__gt': last})
+        batch = list(
+            batch_query.values_list(field, flat=True)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def create_missing(batch_size=1000):
+    """Создает строки RecipeTrend для рецептов без них."""
+    created = 0
+    for batch in id_batches(
+            Recipe.objects.filter(trend__isnull=True), 'id', batch_size):
+        RecipeTrend.objects.bulk_create(
+            (RecipeTrend(recipe_id=recipe_id) for recipe_id in batch),
+            ignore_conflicts=True
+        )
+        created += len(batch)
+    return created
+
+
+def recompute_batch(recipe_ids, now, shift):
+    """Пересчитывает score рецептов по событиям за окно затухания.
+
+    shift — текущий сдвиг score из TrendBase.
+
+    События группируются по часам, время события — середина часа.
+    Блокируются только строки RecipeTrend пересчитываемых рецептов,
+    записываются только изменившиеся значения. Рецепты, строки которых
+    удалены после выбора пакета (например, фоновым удалением рецепта),
+    пропускаются.
+    """
+    since = now - timedelta(
+        hours=settings.TRENDING_HALF_LIFE_HOURS * WINDOW_HALF_LIVES)
+    with transaction.atomic():
+        current = dict(RecipeTrend.objects.select_for_update().filter(
+            recipe_id__in=recipe_ids).values_list('recipe_id', 'score'))
+        scores = dict.fromkeys(current, -math.inf)
+        for model, weight in EVENT_WEIGHTS.items():
+            events = model.objects.filter(
+                recipe_id__in=list(current), created__gte=since
+            ).order_by().annotate(hour=TruncHour('created')).values_list(
+                'recipe_id', 'hour').annotate(total=Count('id'))
+            for recipe_id, hour, total in events:
+                scores[recipe_id] = logaddexp(
+                    scores[recipe_id],
+                    event_score(weight * total, hour + timedelta(minutes=30))
+                    - shift
+                )
+        scores = {
+            recipe_id: max(score, RecipeTrend.NO_EVENTS)
+            for recipe_id, score in scores.items()
+        }
+        changed = [
+            RecipeTrend(recipe_id=recipe_id, score=score)
+            for recipe_id, score in scores.items()
+            if not math.isclose(score, current[recipe_id])
+        ]
+        RecipeTrend.objects.bulk_update(changed, ['score'])
+
+
+def recompute_scores(batch_size=1000):
+    """Перенормирует и пересчитывает популярность всех рецептов пакетами.
+
+    Пересчет после перенормировки исправляет score событий, добавленных
+    одновременно с ней. Возвращает количество созданных строк,
+    пересчитанных рецептов и величину перенормировки.
+    """
+    now = timezone.now()
+    shifted = renormalize(now)
+    shift = TrendBase.objects.get(pk=TREND_BASE_ID).shift
+    created = create_missing(batch_size)
+    recomputed = 0
+    for batch in id_batches(
+            RecipeTrend.objects.all(), 'recipe_id', batch_size):
+        recompute_batch(batch, now, shift)
+        recomputed += len(batch)
+    return created, recomputed, shifted
@@ -4,11 +4,17 @@ from django.contrib import admin
 from django.contrib.admin import ModelAdmin
 from django.contrib.auth.admin import UserAdmin
 
+from api.admin_performance import (
+    DeferredDeletionAdminMixin,
+    PerformanceAdminMixin,
+)
+from recipes.deletion import delete_user
 from users.models import CustomUser, Subscription
 
 
 @admin.register(CustomUser)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(
+        DeferredDeletionAdminMixin, PerformanceAdminMixin, UserAdmin):
     """Отображение данных модели CustomUser в интерфейсе администратора."""
 
     list_display = (
@@ -18,33 +24,41 @@ class CustomUserAdmin(UserAdmin):
         'last_name'
     )
     list_filter = (
-        'username',
-        'email'
+        'is_staff',
+        'is_active'
     )
     search_fields = (
         'username',
         'email',
         'last_name'
     )
-    list_per_page = 50
-    empty_value_display = '-пусто-'
+
+    def get_queryset(self, request):
+        """Пользователи, не отмеченные удаленными."""
+        return super().get_queryset(request).filter(deleted__isnull=True)
+
+    def delete_later(self, obj):
+        """Отмечает пользователя удаленным."""
+        delete_user(obj)
 
 
 @admin.register(Subscription)
-class SubscriptionAdmin(ModelAdmin):
+class SubscriptionAdmin(PerformanceAdminMixin, ModelAdmin):
     """Отображение данных модели Subscription в интерфейсе администратора."""
 
     list_display = (
         'subscriber',
         'author'
     )
-    list_filter = (
-        'subscriber__username',
-        'author__username'
+    list_select_related = (
+        'subscriber',
+        'author'
     )
     search_fields = (
         'subscriber__username',
         'author__username'
     )
-    list_per_page = 50
-    empty_value_display = '-пусто-'
+    autocomplete_fields = (
+        'subscriber',
+        'author'
+    )
@@ -6,6 +6,7 @@ from django.db.models import (
     CASCADE,
     BooleanField,
     CharField,
+    DateTimeField,
     EmailField,
     ForeignKey,
     Model,
@@ -16,7 +17,13 @@ from users.validators import validate_username
 
 
 class CustomUser(AbstractUser):
-    """Кастомная модель пользователей."""
+    """Кастомная модель пользователей.
+
+    Удаленный пользователь отмечается полем deleted, деактивируется и
+    удаляется из БД в фоне вместе с рецептами (recipes/deletion.py).
+    Менеджер objects такого пользователя не скрывает: адрес почты и имя
+    остаются занятыми до окончательного удаления.
+    """
 
     username = CharField(
         'Пользовательское имя',
@@ -43,6 +50,12 @@ class CustomUser(AbstractUser):
         'Администратор',
         default=False
     )
+    deleted = DateTimeField(
+        'Дата удаления',
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (